@@ -0,0 +1,18 @@
+from __future__ import annotations
+
+from fastapi import HTTPException, Request, Response
+
+from app.services.response_cache import response_etag
+
+
+def _etag_matches(header: str, etag: str) -> bool:
+    candidates = [item.strip() for item in header.split(",")]
+    return "*" in candidates or any(item.removeprefix("W/") == etag for item in candidates)
+
+
+async def conditional_get(request: Request, response: Response) -> None:
+    etag = response_etag(request.url.path, request.query_params.multi_items())
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if _etag_matches(request.headers.get("if-none-match", ""), etag):
+        raise HTTPException(status_code=304, headers=headers)
+    response.headers.update(headers)
@@ -0,0 +1,108 @@
+from __future__ import annotations
+
+import gzip
+import json
+import zlib
+from typing import Any, Callable, Hashable, Iterable, Iterator
+
+from fastapi import Request, Response
+
+from app.core.config import settings
+from app.db.database import get_data_generation
+from app.services.response_cache import cached_response
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+def dumps(content: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(content)
+    return json.dumps(content, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+class FastJSONResponse(Response):
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        if isinstance(content, bytes):
+            return content
+        return dumps(content)
+
+
+def accepted_encodings(header: str) -> set[str]:
+    accepted: set[str] = set()
+    for item in header.split(","):
+        name, _, params = item.strip().partition(";")
+        quality = params.strip().removeprefix("q=")
+        try:
+            if params and float(quality) <= 0:
+                continue
+        except ValueError:
+            continue
+        accepted.add(name.strip().lower())
+    return accepted
+
+
+def negotiate_encoding(header: str) -> str:
+    accepted = accepted_encodings(header)
+    if brotli is not None and "br" in accepted:
+        return "br"
+    if "gzip" in accepted:
+        return "gzip"
+    return "identity"
+
+
+def _compress(payload: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(payload, quality=5)
+    return gzip.compress(payload, compresslevel=6)
+
+
+def rows_response(
+    request: Request,
+    response: Response,
+    endpoint: str,
+    params: Hashable,
+    fetch: Callable[[], list[dict]],
+    page_headers: Callable[[list[dict]], dict[str, str]] | None = None,
+) -> Response:
+    def encode() -> tuple[bytes, dict[str, str]]:
+        rows = fetch()
+        return dumps(rows), page_headers(rows) if page_headers else {}
+
+    generation = get_data_generation()
+    payload, extra = cached_response(endpoint, (params, "identity"), encode, generation)
+    encoding = negotiate_encoding(request.headers.get("accept-encoding", ""))
+    headers = {
+        name: value for name, value in response.headers.items() if name != "content-length"
+    }
+    headers.update(extra)
+    headers["vary"] = "Accept-Encoding"
+    if encoding != "identity" and len(payload) >= settings.response_compress_min_bytes:
+        payload = cached_response(
+            endpoint, (params, encoding), lambda: _compress(payload, encoding), generation
+        )
+        headers["content-encoding"] = encoding
+        if "etag" in headers:
+            headers["etag"] = f"W/{headers['etag']}"
+    return FastJSONResponse(payload, headers=headers)
+
+
+def ndjson_stream(pages: Iterable[list[dict]], encoding: str = "identity") -> Iterator[bytes]:
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31) if encoding == "gzip" else None
+    for page in pages:
+        chunk = b"".join(dumps(row) + b"\n" for row in page)
+        if compressor is not None:
+            chunk = compressor.compress(chunk)
+        if chunk:
+            yield chunk
+    if compressor is not None:
+        yield compressor.flush()
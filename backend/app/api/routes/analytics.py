@@ -2,10 +2,12 @@ from __future__ import annotations
 
 from typing import Optional
 
-from fastapi import APIRouter, Query
+from fastapi import APIRouter, Depends, Query, Request, Response
 
 from datetime import datetime, timezone
 
+from app.api.conditional import conditional_get
+from app.api.responses import rows_response
 from app.models.schemas import (
     DashboardSummary,
     EmergingTopicSummary,
@@ -36,32 +38,53 @@ from app.repositories.subreddit_analytics import (
     fetch_subreddit_sentiment,
     fetch_subreddit_topics,
 )
+from app.services.response_cache import cached_response
 
-router = APIRouter(prefix="/analytics")
+router = APIRouter(prefix="/analytics", dependencies=[Depends(conditional_get)])
 
 
 @router.get("/sentiment", response_model=list[SentimentSummary])
 def get_sentiment(
+    request: Request,
+    response: Response,
     hours: int = Query(24, ge=1, le=168),
     subreddit: Optional[str] = None,
-) -> list[SentimentSummary]:
-    return fetch_sentiment_series(hours=hours, subreddit=subreddit)
+) -> Response:
+    return rows_response(
+        request,
+        response,
+        "sentiment",
+        (hours, subreddit),
+        lambda: fetch_sentiment_series(hours=hours, subreddit=subreddit),
+    )
 
 
 @router.get("/trends", response_model=list[TrendSummary])
-def get_trends(hours: int = Query(24, ge=1, le=168)) -> list[TrendSummary]:
-    return fetch_trend_snapshots(hours=hours)
+def get_trends(
+    request: Request, response: Response, hours: int = Query(24, ge=1, le=168)
+) -> Response:
+    return rows_response(
+        request, response, "trends", hours, lambda: fetch_trend_snapshots(hours=hours)
+    )
 
 
 @router.get("/emerging-topics", response_model=list[EmergingTopicSummary])
 def get_emerging_topics(
     hours: int = Query(24, ge=1, le=168), limit: int = Query(20, ge=1, le=100)
 ) -> list[EmergingTopicSummary]:
-    return fetch_emerging_topics(hours=hours, limit=limit)
+    return cached_response(
+        "emerging-topics",
+        (hours, limit),
+        lambda: fetch_emerging_topics(hours=hours, limit=limit),
+    )
 
 
 @router.get("/dashboard", response_model=DashboardSummary)
 def get_dashboard(hours: int = Query(24, ge=1, le=168)) -> DashboardSummary:
+    return cached_response("dashboard", hours, lambda: _build_dashboard(hours))
+
+
+def _build_dashboard(hours: int) -> DashboardSummary:
     kpis, previous = fetch_kpis_window(hours=hours)
     sentiment_timeline = fetch_sentiment_timeline(hours=hours)
     volume_trend = fetch_volume_series(hours=hours)
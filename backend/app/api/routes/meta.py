@@ -3,10 +3,27 @@ from __future__ import annotations
 from fastapi import APIRouter, Query
 from pydantic import BaseModel
 
+from app.clients.reddit import get_reddit_client_stats
 from app.core.config import settings
-from app.models.schemas import PollingState
+from app.core.executors import get_executor_stats, get_loop_lag_stats
+from app.db.database import get_pool_stats
+from app.models.schemas import (
+    DatabasePoolStats,
+    EventLoopStats,
+    ExecutorStats,
+    PipelineStageStats,
+    PollingState,
+    RedditClientStats,
+    ResponseCacheStats,
+    RuntimeStats,
+    ScheduledJobState,
+    SentimentCacheStats,
+)
 from app.repositories.dashboard import fetch_active_events, fetch_active_subreddits
-from app.services.scheduler import get_polling_state, is_ingestion_enabled, set_ingestion_enabled
+from app.services.ingestion import get_pipeline_stats
+from app.services.response_cache import get_response_cache_stats
+from app.services.sentiment import get_sentiment_cache_stats
+from app.services.scheduler import get_polling_state, set_ingestion_enabled
 
 router = APIRouter(prefix="/meta")
 
@@ -20,10 +37,30 @@ def get_polling() -> PollingState:
     state = get_polling_state()
     interval = int(state.get("interval_seconds") or settings.poll_interval_seconds)
     return PollingState(
-        enabled=is_ingestion_enabled(),
+        enabled=bool(state["enabled"]),
         intervalSeconds=interval,
         lastRun=state.get("last_run"),
         nextRun=state.get("next_run"),
+        leader=state.get("leader"),
+        isLeader=bool(state["is_leader"]),
+        leaseExpiresAt=state.get("lease_expires_at"),
+        jobs=[
+            ScheduledJobState(
+                name=job["name"],
+                intervalSeconds=float(job["interval_seconds"]),
+                aligned=bool(job["aligned"]),
+                running=bool(job["running"]),
+                lastRun=job["last_run"],
+                nextRun=job["next_run"],
+                lastDurationSeconds=float(job["last_duration_seconds"]),
+                avgDurationSeconds=float(job["avg_duration_seconds"]),
+                runs=int(job["runs"]),
+                skipped=int(job["skipped"]),
+                failures=int(job["failures"]),
+                lastError=job["last_error"],
+            )
+            for job in state["jobs"]
+        ],
     )
 
 
@@ -33,6 +70,115 @@ def toggle_ingestion(payload: IngestionToggle) -> PollingState:
     return get_polling()
 
 
+@router.get("/database", response_model=DatabasePoolStats)
+def get_database_stats() -> DatabasePoolStats:
+    stats = get_pool_stats()
+    return DatabasePoolStats(
+        path=str(stats["path"]),
+        wal=bool(stats["wal"]),
+        readersOpen=int(stats["readers_open"]),
+        writerOpen=bool(stats["writer_open"]),
+        writerBusy=bool(stats["writer_busy"]),
+        connectionsOpened=int(stats["connections_opened"]),
+        connectionsClosed=int(stats["connections_closed"]),
+        readerCheckouts=int(stats["reader_checkouts"]),
+        writerCheckouts=int(stats["writer_checkouts"]),
+        commits=int(stats["commits"]),
+        rollbacks=int(stats["rollbacks"]),
+        writerWaitSeconds=float(stats["writer_wait_seconds"]),
+    )
+
+
+@router.get("/sentiment-cache", response_model=SentimentCacheStats)
+def get_sentiment_cache() -> SentimentCacheStats:
+    stats = get_sentiment_cache_stats()
+    return SentimentCacheStats(
+        size=stats["size"],
+        maxEntries=stats["max_entries"],
+        pending=stats["pending"],
+        memoryHits=stats["memory_hits"],
+        storeHits=stats["store_hits"],
+        misses=stats["misses"],
+    )
+
+
+@router.get("/response-cache", response_model=ResponseCacheStats)
+def get_response_cache() -> ResponseCacheStats:
+    stats = get_response_cache_stats()
+    return ResponseCacheStats(
+        generation=stats["generation"],
+        size=stats["size"],
+        maxEntries=stats["max_entries"],
+        inflight=stats["inflight"],
+        hits=stats["hits"],
+        misses=stats["misses"],
+        coalesced=stats["coalesced"],
+        evictions=stats["evictions"],
+    )
+
+
+@router.get("/pipeline", response_model=list[PipelineStageStats])
+def get_pipeline() -> list[PipelineStageStats]:
+    return [
+        PipelineStageStats(
+            name=str(stage["name"]),
+            workers=int(stage["workers"]),
+            queueSize=int(stage["queue_size"]),
+            batches=int(stage["batches"]),
+            items=int(stage["items"]),
+            itemsPerSecond=float(stage["items_per_second"]),
+            busySeconds=float(stage["busy_seconds"]),
+            avgLatencySeconds=float(stage["avg_latency_seconds"]),
+            maxLatencySeconds=float(stage["max_latency_seconds"]),
+            maxQueueDepth=int(stage["max_queue_depth"]),
+            blockedSeconds=float(stage["blocked_seconds"]),
+        )
+        for stage in get_pipeline_stats()
+    ]
+
+
+@router.get("/runtime", response_model=RuntimeStats)
+def get_runtime() -> RuntimeStats:
+    lag = get_loop_lag_stats()
+    return RuntimeStats(
+        eventLoop=EventLoopStats(
+            samples=int(lag["samples"]),
+            lastLagSeconds=float(lag["last_seconds"]),
+            maxLagSeconds=float(lag["max_seconds"]),
+            avgLagSeconds=float(lag["avg_seconds"]),
+            slowTicks=int(lag["slow_ticks"]),
+        ),
+        executors=[
+            ExecutorStats(
+                name=str(stats["name"]),
+                kind=str(stats["kind"]),
+                workers=int(stats["workers"]),
+                pending=int(stats["pending"]),
+                calls=int(stats["calls"]),
+                failures=int(stats["failures"]),
+                busySeconds=float(stats["busy_seconds"]),
+                avgWaitSeconds=float(stats["avg_wait_seconds"]),
+                maxWaitSeconds=float(stats["max_wait_seconds"]),
+            )
+            for stats in get_executor_stats()
+        ],
+    )
+
+
+@router.get("/reddit", response_model=RedditClientStats)
+def get_reddit_stats() -> RedditClientStats:
+    stats = get_reddit_client_stats()
+    return RedditClientStats(
+        active=bool(stats["active"]),
+        requests=int(stats["requests"]),
+        errors=int(stats["errors"]),
+        tokenRequests=int(stats["token_requests"]),
+        requestSeconds=float(stats["request_seconds"]),
+        cycles=int(stats["cycles"]),
+        lastCycleRequests=int(stats["last_cycle_requests"]),
+    )
+
+
 @router.get("/subreddits", response_model=list[str])
 def get_active_subreddits(limit: int | None = Query(None, ge=1)) -> list[str]:
     return fetch_active_subreddits(limit=limit)
@@ -1,18 +1,95 @@
 from __future__ import annotations
 
+import base64
+import json
+from datetime import datetime, timezone
 from typing import Optional
 
-from fastapi import APIRouter, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
 
+from app.api.conditional import conditional_get
+from app.api.responses import accepted_encodings, ndjson_stream, rows_response
+from app.core.config import settings
 from app.models.schemas import PostResponse
-from app.repositories.raw import fetch_posts
+from app.repositories.raw import fetch_posts, iter_posts
 
-router = APIRouter(prefix="/raw")
+router = APIRouter(prefix="/raw", dependencies=[Depends(conditional_get)])
+
+
+def _encode_cursor(row: dict) -> str:
+    raw = json.dumps([row["timestamp"], row["id"]]).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def _decode_cursor(cursor: str) -> tuple[str, str]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        timestamp, post_id = json.loads(raw)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor") from None
+    if not isinstance(timestamp, str) or not isinstance(post_id, str):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return timestamp, post_id
+
+
+def _utc_iso(value: Optional[datetime]) -> Optional[str]:
+    if value is None:
+        return None
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc).isoformat()
 
 
 @router.get("/posts", response_model=list[PostResponse])
 def get_posts(
+    request: Request,
+    response: Response,
     limit: int = Query(100, ge=1, le=500),
     subreddit: Optional[str] = None,
-) -> list[PostResponse]:
-    return fetch_posts(limit=limit, subreddit=subreddit)
+    cursor: Optional[str] = None,
+) -> Response:
+    before = _decode_cursor(cursor) if cursor else None
+
+    def next_cursor(rows: list[dict]) -> dict[str, str]:
+        if len(rows) < limit:
+            return {}
+        return {"x-next-cursor": _encode_cursor(rows[-1])}
+
+    return rows_response(
+        request,
+        response,
+        "raw-posts",
+        (limit, subreddit, before),
+        lambda: fetch_posts(limit=limit, subreddit=subreddit, before=before),
+        next_cursor,
+    )
+
+
+@router.get("/posts/export")
+def export_posts(
+    request: Request,
+    response: Response,
+    subreddit: Optional[str] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+) -> StreamingResponse:
+    accepted = accepted_encodings(request.headers.get("accept-encoding", ""))
+    encoding = "gzip" if "gzip" in accepted else "identity"
+    pages = iter_posts(
+        subreddit=subreddit,
+        since=_utc_iso(since),
+        until=_utc_iso(until) or datetime.now(tz=timezone.utc).isoformat(),
+        batch_size=settings.raw_export_batch_size,
+    )
+    headers = {
+        name: value for name, value in response.headers.items() if name != "content-length"
+    }
+    headers["vary"] = "Accept-Encoding"
+    if encoding == "gzip":
+        headers["content-encoding"] = "gzip"
+        if "etag" in headers:
+            headers["etag"] = f"W/{headers['etag']}"
+    return StreamingResponse(
+        ndjson_stream(pages, encoding), media_type="application/x-ndjson", headers=headers
+    )
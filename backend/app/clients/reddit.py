@@ -1,45 +1,309 @@
 from __future__ import annotations
 
-from typing import Any
+from contextlib import contextmanager
+from typing import Any, Callable, Iterator, Optional
 import asyncio
 import logging
+import threading
+import time
 
 import praw
+import prawcore
+import requests
+from requests.adapters import HTTPAdapter
 
 from app.core.config import settings
+from app.models.schemas import FetchCursor
 
 logger = logging.getLogger("reddit_trends.reddit")
 
+_PAGE_SIZE = 100
+
+
+class RequestStats:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.errors = 0
+        self.token_requests = 0
+        self.request_seconds = 0.0
+        self.cycles = 0
+        self.cycle_requests = 0
+        self.last_cycle_requests = 0
+
+    def record(self, url: str, elapsed: float, failed: bool) -> None:
+        with self._lock:
+            self.requests += 1
+            self.cycle_requests += 1
+            self.request_seconds += elapsed
+            if failed:
+                self.errors += 1
+            if url.endswith("/access_token"):
+                self.token_requests += 1
+
+    def end_cycle(self) -> int:
+        with self._lock:
+            self.cycles += 1
+            self.last_cycle_requests = self.cycle_requests
+            self.cycle_requests = 0
+            return self.last_cycle_requests
+
+    def snapshot(self) -> dict[str, int | float]:
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "errors": self.errors,
+                "token_requests": self.token_requests,
+                "request_seconds": self.request_seconds,
+                "cycles": self.cycles,
+                "last_cycle_requests": self.last_cycle_requests,
+            }
+
+
+class _CountingRequestor(prawcore.Requestor):
+    def __init__(self, *args: Any, stats: RequestStats, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self._stats = stats
+
+    def request(self, *args: Any, **kwargs: Any) -> Any:
+        started = time.perf_counter()
+        failed = True
+        try:
+            response = super().request(*args, **kwargs)
+            failed = response.status_code >= 400
+            return response
+        finally:
+            url = str(args[1] if len(args) > 1 else kwargs.get("url", ""))
+            self._stats.record(url, time.perf_counter() - started, failed)
+
+
+def _build_session() -> requests.Session:
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=2, pool_maxsize=1)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def fetch_concurrency(remaining: float | None, reserve: int = 0) -> int:
+    slots = max(settings.reddit_fetch_concurrency, 1)
+    if remaining is None:
+        return slots
+    return max(1, min(slots, int(remaining) - reserve))
+
+
+class _InstancePool:
+    def __init__(self, factory: Callable[[], Any], size: int) -> None:
+        self._factory = factory
+        self._slots = threading.BoundedSemaphore(max(size, 1))
+        self._lock = threading.Lock()
+        self._idle: list[Any] = []
+        self.instances: list[Any] = []
+
+    @contextmanager
+    def checkout(self) -> Iterator[Any]:
+        with self._slots:
+            with self._lock:
+                instance = self._idle.pop() if self._idle else None
+            if instance is None:
+                instance = self._factory()
+                with self._lock:
+                    self.instances.append(instance)
+            try:
+                yield instance
+            finally:
+                with self._lock:
+                    self._idle.append(instance)
+
 
 class RedditClient:
     def __init__(self) -> None:
-        self._client = praw.Reddit(
+        self.stats = RequestStats()
+        self._sessions: list[requests.Session] = []
+        self._pool = _InstancePool(self._build_reddit, settings.reddit_fetch_concurrency)
+
+    def _build_reddit(self) -> praw.Reddit:
+        session = _build_session()
+        self._sessions.append(session)
+        return praw.Reddit(
             client_id=settings.reddit_client_id,
             client_secret=settings.reddit_client_secret,
             user_agent=settings.reddit_user_agent,
+            requestor_class=_CountingRequestor,
+            requestor_kwargs={"session": session, "stats": self.stats},
         )
 
-    async def fetch_new_posts(self, subreddit: str, limit: int = 50) -> list[dict[str, Any]]:
-        logger.info("Fetching new posts | subreddit=%s | limit=%s", subreddit, limit)
-        posts = await asyncio.to_thread(self._fetch_new_posts_sync, subreddit, limit)
+    def end_cycle(self) -> int:
+        return self.stats.end_cycle()
+
+    def rate_limit_remaining(self) -> float | None:
+        values = [
+            reddit.auth.limits.get("remaining") for reddit in list(self._pool.instances)
+        ]
+        known = [float(value) for value in values if value is not None]
+        return min(known) if known else None
+
+    async def fetch_engagement(self, post_ids: list[str]) -> dict[str, tuple[int, int]]:
+        engagement = await asyncio.to_thread(self._fetch_engagement_sync, post_ids)
         logger.info(
-            "Fetch complete | subreddit=%s | count=%s",
-            subreddit,
-            len(posts),
+            "Engagement fetch complete | requested=%s | returned=%s",
+            len(post_ids),
+            len(engagement),
         )
-        return posts
+        return engagement
+
+    def _fetch_engagement_sync(self, post_ids: list[str]) -> dict[str, tuple[int, int]]:
+        fullnames = [f"t3_{post_id}" for post_id in post_ids]
+        with self._pool.checkout() as reddit:
+            return {
+                submission.id: (int(submission.score), int(submission.num_comments))
+                for submission in reddit.info(fullnames=fullnames)
+            }
+
+    async def fetch_top_comments(self, post_id: str, limit: int = 25) -> list[dict[str, Any]]:
+        comments = await asyncio.to_thread(self._fetch_top_comments_sync, post_id, limit)
+        logger.info("Comment fetch complete | post=%s | count=%s", post_id, len(comments))
+        return comments
 
-    def _fetch_new_posts_sync(self, subreddit: str, limit: int) -> list[dict[str, Any]]:
+    def _fetch_top_comments_sync(self, post_id: str, limit: int) -> list[dict[str, Any]]:
+        with self._pool.checkout() as reddit:
+            submission = reddit.submission(id=post_id)
+            submission.comment_sort = "top"
+            submission.comment_limit = limit
+            submission.comments.replace_more(limit=0)
         items = []
-        for submission in self._client.subreddit(subreddit).new(limit=limit):
+        for comment in submission.comments:
+            if getattr(comment, "stickied", False):
+                continue
+            if comment.body in ("[deleted]", "[removed]"):
+                continue
             items.append(
                 {
-                    "id": submission.id,
-                    "created_utc": submission.created_utc,
-                    "title": submission.title,
-                    "selftext": submission.selftext,
-                    "score": submission.score,
-                    "num_comments": submission.num_comments,
+                    "id": comment.id,
+                    "created_utc": comment.created_utc,
+                    "body": comment.body,
+                    "score": comment.score,
                 }
             )
+            if len(items) >= limit:
+                break
         return items
+
+    def close(self) -> None:
+        for session in self._sessions:
+            session.close()
+
+    async def fetch_new_posts(
+        self,
+        subreddit: str,
+        limit: int = 50,
+        cursor: Optional[FetchCursor] = None,
+    ) -> list[dict[str, Any]]:
+        logger.info(
+            "Fetching new posts | subreddit=%s | limit=%s | since=%s",
+            subreddit,
+            limit,
+            cursor.last_fullname if cursor else None,
+        )
+        posts = await asyncio.to_thread(self._fetch_new_posts_sync, subreddit, limit, cursor)
+        logger.info(
+            "Fetch complete | subreddit=%s | count=%s",
+            subreddit,
+            len(posts),
+        )
+        return posts
+
+    def _fetch_new_posts_sync(
+        self,
+        subreddit: str,
+        limit: int,
+        cursor: Optional[FetchCursor] = None,
+    ) -> list[dict[str, Any]]:
+        with self._pool.checkout() as reddit:
+            return self._fetch_new_posts_with(reddit, subreddit, limit, cursor)
+
+    def _fetch_new_posts_with(
+        self,
+        reddit: praw.Reddit,
+        subreddit: str,
+        limit: int,
+        cursor: Optional[FetchCursor] = None,
+    ) -> list[dict[str, Any]]:
+        if cursor is None or (cursor.last_fullname is None and cursor.last_created_utc is None):
+            return [
+                _serialize(submission)
+                for submission in reddit.subreddit(subreddit).new(limit=limit)
+            ]
+
+        items: list[dict[str, Any]] = []
+        page_limit = max(1, min(limit, _PAGE_SIZE))
+        after: Optional[str] = None
+        while True:
+            params = {"after": after} if after else None
+            page = list(reddit.subreddit(subreddit).new(limit=page_limit, params=params))
+            for submission in page:
+                if _is_known(submission, cursor):
+                    return items
+                items.append(_serialize(submission))
+            if len(page) < page_limit:
+                return items
+            if len(items) >= settings.reddit_fetch_max_posts:
+                logger.warning(
+                    "Fetch cursor not reached | subreddit=%s | fetched=%s | posts may be missing",
+                    subreddit,
+                    len(items),
+                )
+                return items
+            after = page[-1].name
+            page_limit = _PAGE_SIZE
+
+
+def _is_known(submission: Any, cursor: FetchCursor) -> bool:
+    if cursor.last_fullname is not None and submission.name == cursor.last_fullname:
+        return True
+    return (
+        cursor.last_created_utc is not None
+        and submission.created_utc < cursor.last_created_utc
+    )
+
+
+def _serialize(submission: Any) -> dict[str, Any]:
+    return {
+        "id": submission.id,
+        "name": submission.name,
+        "created_utc": submission.created_utc,
+        "title": submission.title,
+        "selftext": submission.selftext,
+        "score": submission.score,
+        "num_comments": submission.num_comments,
+    }
+
+
+_reddit_client: RedditClient | None = None
+_client_lock = threading.Lock()
+
+
+def get_reddit_client() -> RedditClient:
+    global _reddit_client
+    with _client_lock:
+        if _reddit_client is None:
+            _reddit_client = RedditClient()
+            logger.info("Reddit client created")
+        return _reddit_client
+
+
+def close_reddit_client() -> None:
+    global _reddit_client
+    with _client_lock:
+        client = _reddit_client
+        _reddit_client = None
+    if client is not None:
+        client.close()
+        logger.info("Reddit client closed | stats=%s", client.stats.snapshot())
+
+
+def get_reddit_client_stats() -> dict[str, int | float | bool]:
+    client = _reddit_client
+    if client is None:
+        return {"active": False, **RequestStats().snapshot()}
+    return {"active": True, **client.stats.snapshot()}
@@ -13,11 +13,49 @@ class Settings(BaseSettings):
     reddit_user_agent: str = "reddit-trends/0.1"
 
     poll_interval_seconds: int = 300
+    poll_jitter_seconds: float = 0.0
+    trend_rollover_offset_seconds: float = 30.0
+    sentiment_backfill_interval_seconds: int = 900
+    reddit_fetch_concurrency: int = 4
+    reddit_fetch_limit: int = 50
+    reddit_fetch_max_posts: int = 1000
+    reddit_fetch_timeout_seconds: float = 30.0
+    ingestion_queue_size: int = 2
     database_url: str = "sqlite:///./data.db"
+    sqlite_wal: bool = False
+    sqlite_mmap_size: int = 268435456
+    sqlite_busy_timeout_ms: int = 5000
     enable_ingestion: bool = False
+    embedded_worker: bool = True
+    schema_wait_seconds: float = 60.0
+    data_generation_poll_seconds: float = 1.0
+    blocking_executor_workers: int = 2
+    cpu_executor_workers: int = 2
+    loop_lag_interval_seconds: float = 0.5
+    loop_lag_warn_seconds: float = 0.25
+    leader_lease_seconds: float = 30.0
+    leader_heartbeat_seconds: float = 10.0
+    engagement_refresh_hours: int = 3
+    engagement_refresh_max_posts: int = 1000
+    comment_crawl_enabled: bool = True
+    comment_min_comments: int = 20
+    comment_posts_per_cycle: int = 10
+    comment_limit_per_post: int = 25
+    comment_max_age_hours: int = 24
+    comment_budget_seconds: float = 30.0
+    comment_min_ratelimit_remaining: int = 100
     subreddits: str = "worldnews,india,technology,artificial,business,politics,science,movies,news"
     keywords: str = "elections,ai releases,geopolitical conflicts,inflation,layoffs,climate,entertainment,launch-week"
     cors_origins: str = "http://localhost:3000"
     backfill_trends_hours: int = 24
+    sentiment_workers: int = 0
+    sentiment_chunk_size: int = 256
+    sentiment_parallel_threshold: int = 2000
+    sentiment_backfill_batch_size: int = 5000
+    sentiment_cache_size: int = 50000
+    response_cache_size: int = 256
+    response_cache_ttl_seconds: float = 60.0
+    response_compress_min_bytes: int = 1024
+    raw_export_batch_size: int = 1000
 
 settings = Settings()
@@ -0,0 +1,189 @@
+from __future__ import annotations
+
+import asyncio
+import contextvars
+import logging
+import multiprocessing
+import threading
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+from typing import Any, Callable, TypeVar
+
+from app.core.config import settings
+
+T = TypeVar("T")
+
+logger = logging.getLogger("reddit_trends.executors")
+
+
+def _timed_call(call: Callable[[], T]) -> tuple[float, float, T]:
+    started = time.time()
+    result = call()
+    return started, time.time(), result
+
+
+class TrackedExecutor:
+    def __init__(self, name: str, workers: int, processes: bool = False) -> None:
+        self.name = name
+        self.workers = max(1, workers)
+        self.processes = processes
+        self._pool: Executor | None = None
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.failures = 0
+        self.pending = 0
+        self.busy_seconds = 0.0
+        self.wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+
+    def _get_pool(self) -> Executor:
+        with self._lock:
+            if self._pool is None:
+                if self.processes:
+                    self._pool = ProcessPoolExecutor(
+                        max_workers=self.workers, mp_context=multiprocessing.get_context("spawn")
+                    )
+                else:
+                    self._pool = ThreadPoolExecutor(
+                        max_workers=self.workers, thread_name_prefix=f"reddit-trends-{self.name}"
+                    )
+            return self._pool
+
+    def _record(self, submitted: float, started: float, finished: float, failed: bool) -> None:
+        with self._lock:
+            self.calls += 1
+            self.failures += int(failed)
+            self.busy_seconds += finished - started
+            self.wait_seconds += started - submitted
+            self.max_wait_seconds = max(self.max_wait_seconds, started - submitted)
+
+    async def _run_process(self, call: Callable[[], T]) -> T:
+        submitted = time.time()
+        try:
+            started, finished, result = await asyncio.get_running_loop().run_in_executor(
+                self._get_pool(), _timed_call, call
+            )
+        except BaseException:
+            self._record(submitted, submitted, time.time(), True)
+            raise
+        self._record(submitted, max(started, submitted), finished, False)
+        return result
+
+    async def _run_thread(self, call: Callable[[], T]) -> T:
+        submitted = time.perf_counter()
+        context = contextvars.copy_context()
+
+        def invoke() -> T:
+            started = time.perf_counter()
+            failed = False
+            try:
+                return context.run(call)
+            except BaseException:
+                failed = True
+                raise
+            finally:
+                self._record(submitted, started, time.perf_counter(), failed)
+
+        return await asyncio.get_running_loop().run_in_executor(self._get_pool(), invoke)
+
+    async def run(self, func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        call = partial(func, *args, **kwargs)
+        with self._lock:
+            self.pending += 1
+        try:
+            if self.processes:
+                return await self._run_process(call)
+            return await self._run_thread(call)
+        finally:
+            with self._lock:
+                self.pending -= 1
+
+    def shutdown(self) -> None:
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=True)
+
+    def stats(self) -> dict[str, str | int | float]:
+        with self._lock:
+            return {
+                "name": self.name,
+                "kind": "process" if self.processes else "thread",
+                "workers": self.workers,
+                "pending": self.pending,
+                "calls": self.calls,
+                "failures": self.failures,
+                "busy_seconds": round(self.busy_seconds, 4),
+                "avg_wait_seconds": round(self.wait_seconds / self.calls, 4) if self.calls else 0.0,
+                "max_wait_seconds": round(self.max_wait_seconds, 4),
+            }
+
+
+db_executor = TrackedExecutor("db", 1)
+blocking_executor = TrackedExecutor("blocking", settings.blocking_executor_workers)
+cpu_executor = TrackedExecutor("cpu", settings.cpu_executor_workers, processes=True)
+
+
+async def run_db(func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    return await db_executor.run(func, *args, **kwargs)
+
+
+async def run_blocking(func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    return await blocking_executor.run(func, *args, **kwargs)
+
+
+async def run_cpu(func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    return await cpu_executor.run(func, *args, **kwargs)
+
+
+def get_executor_stats() -> list[dict[str, str | int | float]]:
+    return [db_executor.stats(), blocking_executor.stats(), cpu_executor.stats()]
+
+
+def shutdown_executors() -> None:
+    db_executor.shutdown()
+    blocking_executor.shutdown()
+    cpu_executor.shutdown()
+
+
+_loop_lag = {
+    "samples": 0,
+    "last_seconds": 0.0,
+    "max_seconds": 0.0,
+    "total_seconds": 0.0,
+    "slow_ticks": 0,
+}
+
+
+async def monitor_loop_lag(interval: float | None = None, warn: float | None = None) -> None:
+    interval = settings.loop_lag_interval_seconds if interval is None else interval
+    warn = settings.loop_lag_warn_seconds if warn is None else warn
+    while True:
+        started = time.perf_counter()
+        await asyncio.sleep(interval)
+        lag = max(0.0, time.perf_counter() - started - interval)
+        _loop_lag["samples"] += 1
+        _loop_lag["last_seconds"] = lag
+        _loop_lag["max_seconds"] = max(_loop_lag["max_seconds"], lag)
+        _loop_lag["total_seconds"] += lag
+        if warn > 0 and lag >= warn:
+            _loop_lag["slow_ticks"] += 1
+            logger.warning("Event loop lag | lag=%.3fs", lag)
+
+
+def start_loop_monitor() -> asyncio.Task | None:
+    if settings.loop_lag_interval_seconds <= 0:
+        return None
+    return asyncio.create_task(monitor_loop_lag())
+
+
+def get_loop_lag_stats() -> dict[str, int | float]:
+    samples = int(_loop_lag["samples"])
+    return {
+        "samples": samples,
+        "last_seconds": round(_loop_lag["last_seconds"], 4),
+        "max_seconds": round(_loop_lag["max_seconds"], 4),
+        "avg_seconds": round(_loop_lag["total_seconds"] / samples, 4) if samples else 0.0,
+        "slow_ticks": int(_loop_lag["slow_ticks"]),
+    }
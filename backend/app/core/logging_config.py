@@ -0,0 +1,33 @@
+from __future__ import annotations
+
+import logging
+import sys
+from logging.handlers import RotatingFileHandler
+from pathlib import Path
+
+LOG_FORMAT = "%(asctime)s %(levelname)s [%(name)s] %(message)s"
+
+
+def configure_logging(filename: str = "app.log") -> None:
+    root_logger = logging.getLogger()
+    root_logger.setLevel(logging.INFO)
+
+    if not any(isinstance(handler, RotatingFileHandler) for handler in root_logger.handlers):
+        log_path = Path("/app/logs")
+        log_path.mkdir(parents=True, exist_ok=True)
+        file_handler = RotatingFileHandler(
+            log_path / filename,
+            maxBytes=5 * 1024 * 1024,
+            backupCount=5,
+        )
+        file_handler.setFormatter(logging.Formatter(LOG_FORMAT))
+        root_logger.addHandler(file_handler)
+
+    if not any(
+        isinstance(handler, logging.StreamHandler)
+        and getattr(handler, "stream", None) is sys.stdout
+        for handler in root_logger.handlers
+    ):
+        stream_handler = logging.StreamHandler(sys.stdout)
+        stream_handler.setFormatter(logging.Formatter(LOG_FORMAT))
+        root_logger.addHandler(stream_handler)
@@ -0,0 +1,32 @@
+from __future__ import annotations
+
+from datetime import datetime, timedelta, timezone
+
+HOUR_SECONDS = 3600
+
+
+def to_epoch(timestamp: str | None) -> int | None:
+    if not timestamp:
+        return None
+    value = datetime.fromisoformat(timestamp)
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return int(value.timestamp())
+
+
+def hour_bucket(epoch: int | None) -> int | None:
+    if epoch is None:
+        return None
+    return epoch - epoch % HOUR_SECONDS
+
+
+def format_hour_bucket(bucket: int) -> str:
+    return datetime.fromtimestamp(bucket, tz=timezone.utc).strftime("%Y-%m-%dT%H")
+
+
+def now_epoch() -> int:
+    return int(datetime.now(tz=timezone.utc).timestamp())
+
+
+def epoch_hours_ago(hours: int) -> int:
+    return int((datetime.now(tz=timezone.utc) - timedelta(hours=hours)).timestamp())
@@ -2,12 +2,19 @@ from __future__ import annotations
 
 import logging
 import sqlite3
+import threading
+import time
+import weakref
+from contextlib import contextmanager
 from pathlib import Path
+from typing import Callable, Iterator
 
 from app.core.config import settings
 
 logger = logging.getLogger("reddit_trends.db")
 
+SCHEMA_VERSION = 1
+
 
 def _resolve_sqlite_path(database_url: str) -> Path:
     if database_url == "sqlite:///:memory:":
@@ -17,14 +24,348 @@ def _resolve_sqlite_path(database_url: str) -> Path:
     raise ValueError("Only sqlite:/// URLs are supported in this prototype")
 
 
-def get_connection() -> sqlite3.Connection:
-    path = _resolve_sqlite_path(settings.database_url)
+def _open_connection(path: Path, wal: bool = False) -> sqlite3.Connection:
     connection = sqlite3.connect(path, check_same_thread=False)
     connection.row_factory = sqlite3.Row
     connection.execute("PRAGMA foreign_keys = ON;")
+    if wal:
+        connection.execute(f"PRAGMA busy_timeout = {int(settings.sqlite_busy_timeout_ms)};")
+        connection.execute("PRAGMA journal_mode = WAL;")
+        connection.execute("PRAGMA synchronous = NORMAL;")
+        connection.execute(f"PRAGMA mmap_size = {int(settings.sqlite_mmap_size)};")
     return connection
 
 
+def get_connection() -> sqlite3.Connection:
+    return _open_connection(_resolve_sqlite_path(settings.database_url), settings.sqlite_wal)
+
+
+class ConnectionPool:
+    def __init__(self, path: Path, wal: bool = False) -> None:
+        self.path = path
+        self.wal = wal
+        self._local = threading.local()
+        self._readers: dict[int, tuple[weakref.ref[threading.Thread], sqlite3.Connection]] = {}
+        self._readers_lock = threading.Lock()
+        self._writer: sqlite3.Connection | None = None
+        self._writer_lock = threading.RLock()
+        self._writer_owner: int | None = None
+        self._writer_depth = 0
+        self._writer_changes = 0
+        self._closed = False
+        self._stats = {
+            "connections_opened": 0,
+            "connections_closed": 0,
+            "reader_checkouts": 0,
+            "writer_checkouts": 0,
+            "commits": 0,
+            "rollbacks": 0,
+            "writer_wait_seconds": 0.0,
+        }
+
+    @property
+    def in_memory(self) -> bool:
+        return str(self.path) == ":memory:"
+
+    def _open(self) -> sqlite3.Connection:
+        connection = _open_connection(self.path, self.wal)
+        self._stats["connections_opened"] += 1
+        return connection
+
+    def _close(self, connection: sqlite3.Connection) -> None:
+        try:
+            connection.close()
+        except sqlite3.Error:
+            logger.exception("Failed to close pooled connection")
+        self._stats["connections_closed"] += 1
+
+    def _prune_readers(self) -> None:
+        stale = [
+            ident
+            for ident, (thread_ref, _) in self._readers.items()
+            if (thread := thread_ref()) is None or not thread.is_alive()
+        ]
+        for ident in stale:
+            _, connection = self._readers.pop(ident)
+            self._close(connection)
+
+    def _reader(self) -> sqlite3.Connection:
+        connection = getattr(self._local, "connection", None)
+        if connection is not None:
+            return connection
+        if self._closed:
+            raise RuntimeError("Connection pool is closed")
+        connection = self._open()
+        thread = threading.current_thread()
+        with self._readers_lock:
+            self._prune_readers()
+            self._readers[thread.ident or 0] = (weakref.ref(thread), connection)
+        self._local.connection = connection
+        return connection
+
+    def _get_writer(self) -> sqlite3.Connection:
+        if self._writer is None:
+            if self._closed:
+                raise RuntimeError("Connection pool is closed")
+            self._writer = self._open()
+        return self._writer
+
+    def _owns_writer(self) -> bool:
+        return self._writer_owner == threading.get_ident() and self._writer_depth > 0
+
+    @contextmanager
+    def read(self) -> Iterator[sqlite3.Connection]:
+        self._stats["reader_checkouts"] += 1
+        if self.in_memory or self._owns_writer():
+            with self.write() as connection:
+                yield connection
+            return
+        connection = self._reader()
+        try:
+            yield connection
+        finally:
+            if connection.in_transaction:
+                connection.rollback()
+
+    @contextmanager
+    def write(self, data_change: bool = True) -> Iterator[sqlite3.Connection]:
+        started = time.perf_counter()
+        with self._writer_lock:
+            if self._writer_depth == 0:
+                self._stats["writer_wait_seconds"] += time.perf_counter() - started
+                self._stats["writer_checkouts"] += 1
+            connection = self._get_writer()
+            if self._writer_depth == 0:
+                self._writer_changes = connection.total_changes
+            self._writer_owner = threading.get_ident()
+            self._writer_depth += 1
+            entered_changes = connection.total_changes
+            try:
+                yield connection
+            except BaseException:
+                self._writer_depth -= 1
+                if self._writer_depth == 0:
+                    self._writer_owner = None
+                    connection.rollback()
+                    self._stats["rollbacks"] += 1
+                    _reset_caches()
+                raise
+            if not data_change:
+                self._writer_changes += connection.total_changes - entered_changes
+            self._writer_depth -= 1
+            if self._writer_depth == 0:
+                self._writer_owner = None
+                changed = connection.total_changes != self._writer_changes
+                if changed and _hold_generation_change():
+                    changed = False
+                marker = _advance_marker(connection) if changed else None
+                connection.commit()
+                self._stats["commits"] += 1
+                if changed:
+                    _bump_data_generation(marker)
+
+    def close(self) -> None:
+        with self._writer_lock:
+            self._closed = True
+            if self._writer is not None:
+                self._close(self._writer)
+                self._writer = None
+        with self._readers_lock:
+            for _, connection in self._readers.values():
+                self._close(connection)
+            self._readers.clear()
+
+    def stats(self) -> dict[str, int | float | str | bool]:
+        with self._readers_lock:
+            self._prune_readers()
+            readers_open = len(self._readers)
+        return {
+            "path": str(self.path),
+            "wal": self.wal,
+            "readers_open": readers_open,
+            "writer_open": self._writer is not None,
+            "writer_busy": self._writer_depth > 0,
+            **{
+                key: round(value, 4) if isinstance(value, float) else value
+                for key, value in self._stats.items()
+            },
+        }
+
+
+_pool: ConnectionPool | None = None
+_pool_lock = threading.Lock()
+_reset_hooks: list[Callable[[], None]] = []
+_data_generation = 0
+_generation_lock = threading.Lock()
+_marker: int | None = None
+_marker_checked_at = float("-inf")
+_marker_lock = threading.Lock()
+_generation_holds = 0
+_held_changes = False
+
+
+def register_cache_reset(hook: Callable[[], None]) -> Callable[[], None]:
+    _reset_hooks.append(hook)
+    return hook
+
+
+def _advance_marker(connection: sqlite3.Connection) -> int | None:
+    try:
+        row = connection.execute(
+            "UPDATE data_generation SET value = value + 1 WHERE id = 1 RETURNING value;"
+        ).fetchone()
+    except sqlite3.OperationalError:
+        return None
+    return int(row[0]) if row is not None else None
+
+
+def _bump_data_generation(marker: int | None = None) -> None:
+    global _data_generation, _marker
+    with _generation_lock:
+        _data_generation += 1
+        if marker is not None:
+            _marker = marker
+
+
+def _hold_generation_change() -> bool:
+    global _held_changes
+    with _generation_lock:
+        if _generation_holds > 0:
+            _held_changes = True
+            return True
+    return False
+
+
+def hold_data_generation() -> None:
+    global _generation_holds
+    with _generation_lock:
+        _generation_holds += 1
+
+
+def release_data_generation() -> bool:
+    global _generation_holds, _held_changes
+    with _generation_lock:
+        _generation_holds = max(_generation_holds - 1, 0)
+        publish = _generation_holds == 0 and _held_changes
+        if publish:
+            _held_changes = False
+    return publish
+
+
+def publish_data_generation() -> None:
+    with write_connection() as connection:
+        connection.execute("UPDATE data_generation SET value = value WHERE id = 1;")
+
+
+def _reset_caches() -> None:
+    global _marker_checked_at
+    _marker_checked_at = float("-inf")
+    _bump_data_generation()
+    for hook in _reset_hooks:
+        hook()
+
+
+def _observe_marker(pool: ConnectionPool) -> None:
+    global _data_generation, _marker, _marker_checked_at
+    if time.monotonic() - _marker_checked_at < settings.data_generation_poll_seconds:
+        return
+    with _marker_lock:
+        if time.monotonic() - _marker_checked_at < settings.data_generation_poll_seconds:
+            return
+        try:
+            with pool.read() as connection:
+                row = connection.execute(
+                    "SELECT value FROM data_generation WHERE id = 1;"
+                ).fetchone()
+        except sqlite3.Error:
+            logger.warning("Data generation marker unavailable")
+            row = None
+        if row is not None:
+            with _generation_lock:
+                if int(row[0]) != _marker:
+                    _marker = int(row[0])
+                    _data_generation += 1
+        _marker_checked_at = time.monotonic()
+
+
+def get_data_generation() -> int:
+    _observe_marker(get_pool())
+    return _data_generation
+
+
+def refresh_data_marker() -> None:
+    _observe_marker(get_pool())
+
+
+def peek_data_state() -> tuple[int | None, int]:
+    with _generation_lock:
+        return _marker, _data_generation
+
+
+def get_pool() -> ConnectionPool:
+    global _pool
+    path = _resolve_sqlite_path(settings.database_url)
+    wal = settings.sqlite_wal
+    pool = _pool
+    if pool is not None and pool.path == path and pool.wal == wal:
+        return pool
+    with _pool_lock:
+        if _pool is None or _pool.path != path or _pool.wal != wal:
+            if _pool is not None:
+                _pool.close()
+            _pool = ConnectionPool(path, wal)
+            _reset_caches()
+            logger.info("Connection pool ready | path=%s wal=%s", path, wal)
+        return _pool
+
+
+def close_pool() -> None:
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.close()
+            _pool = None
+
+
+@contextmanager
+def read_connection() -> Iterator[sqlite3.Connection]:
+    with get_pool().read() as connection:
+        yield connection
+
+
+@contextmanager
+def write_connection(data_change: bool = True) -> Iterator[sqlite3.Connection]:
+    with get_pool().write(data_change) as connection:
+        yield connection
+
+
+@contextmanager
+def control_connection() -> Iterator[sqlite3.Connection]:
+    pool = get_pool()
+    if pool.in_memory:
+        with pool.write() as connection:
+            yield connection
+        return
+    connection = _open_connection(pool.path, pool.wal)
+    try:
+        yield connection
+        connection.commit()
+    except BaseException:
+        connection.rollback()
+        raise
+    finally:
+        connection.close()
+
+
+def get_pool_stats() -> dict[str, int | float | str | bool]:
+    return get_pool().stats()
+
+
+def get_schema_version() -> int:
+    with read_connection() as connection:
+        return int(connection.execute("PRAGMA user_version;").fetchone()[0])
+
+
 def init_db() -> None:
     connection = get_connection()
     cursor = connection.cursor()
@@ -171,18 +512,117 @@ def init_db() -> None:
         """
     )
 
+    cursor.execute(
+        """
+        CREATE TABLE IF NOT EXISTS term_hour_counts (
+            hour_bucket INTEGER NOT NULL,
+            term TEXT NOT NULL,
+            raw_count INTEGER NOT NULL,
+            weighted_count REAL NOT NULL,
+            unique_posts INTEGER NOT NULL,
+            first_seen TEXT NOT NULL,
+            PRIMARY KEY (hour_bucket, term)
+        ) WITHOUT ROWID;
+        """
+    )
+
+    cursor.execute(
+        """
+        CREATE TABLE IF NOT EXISTS sentiment_cache (
+            text_hash TEXT PRIMARY KEY,
+            compound REAL NOT NULL,
+            pos REAL NOT NULL,
+            neg REAL NOT NULL,
+            neu REAL NOT NULL
+        ) WITHOUT ROWID;
+        """
+    )
+
+    cursor.execute(
+        """
+        CREATE TABLE IF NOT EXISTS data_generation (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            value INTEGER NOT NULL
+        );
+        """
+    )
+    cursor.execute("INSERT OR IGNORE INTO data_generation (id, value) VALUES (1, 0);")
+
+    cursor.execute(
+        """
+        CREATE TABLE IF NOT EXISTS scheduler_leases (
+            name TEXT PRIMARY KEY,
+            owner TEXT,
+            acquired_at REAL,
+            expires_at REAL NOT NULL DEFAULT 0,
+            enabled INTEGER,
+            interval_seconds INTEGER,
+            last_run TEXT,
+            next_run TEXT,
+            jobs TEXT
+        );
+        """
+    )
+
+    cursor.execute(
+        """
+        CREATE TABLE IF NOT EXISTS subreddit_fetch_cursors (
+            subreddit_id INTEGER PRIMARY KEY,
+            last_fullname TEXT,
+            last_created_utc REAL,
+            fetch_limit INTEGER NOT NULL,
+            updated_at TEXT NOT NULL,
+            FOREIGN KEY (subreddit_id) REFERENCES subreddits(id)
+        );
+        """
+    )
+
+    cursor.execute(
+        """
+        CREATE TABLE IF NOT EXISTS hourly_subreddit_rollups (
+            hour_bucket INTEGER NOT NULL,
+            subreddit_id INTEGER NOT NULL,
+            post_count INTEGER NOT NULL DEFAULT 0,
+            sentiment_sum REAL NOT NULL DEFAULT 0,
+            sentiment_count INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (hour_bucket, subreddit_id)
+        ) WITHOUT ROWID;
+        """
+    )
+
+    cursor.execute(
+        """
+        CREATE TABLE IF NOT EXISTS hourly_rollups (
+            hour_bucket INTEGER PRIMARY KEY,
+            post_count INTEGER NOT NULL DEFAULT 0,
+            sentiment_sum REAL NOT NULL DEFAULT 0,
+            sentiment_count INTEGER NOT NULL DEFAULT 0,
+            subreddit_bitmap BLOB,
+            spike_count INTEGER NOT NULL DEFAULT 0,
+            spike_keywords TEXT
+        );
+        """
+    )
+
     def ensure_column(table: str, column: str, definition: str) -> None:
         cursor.execute(f"PRAGMA table_info({table});")
         existing = {row[1] for row in cursor.fetchall()}
         if column not in existing:
             cursor.execute(f"ALTER TABLE {table} ADD COLUMN {definition};")
 
+    ensure_column("scheduler_leases", "jobs", "jobs TEXT")
     ensure_column("posts", "subreddit_id", "subreddit_id INTEGER")
     ensure_column("posts", "sentiment_compound", "sentiment_compound REAL")
     ensure_column("posts", "sentiment_pos", "sentiment_pos REAL")
     ensure_column("posts", "sentiment_neg", "sentiment_neg REAL")
     ensure_column("posts", "sentiment_neu", "sentiment_neu REAL")
+    ensure_column("posts", "terms_indexed", "terms_indexed INTEGER")
+    ensure_column("posts", "keyword_version", "keyword_version INTEGER")
+    ensure_column("posts", "comments_crawled_count", "comments_crawled_count INTEGER")
+    ensure_column("posts", "comments_crawled_at", "comments_crawled_at TEXT")
     ensure_column("comments", "subreddit_id", "subreddit_id INTEGER")
+    ensure_column("comments", "sentiment_compound", "sentiment_compound REAL")
+    ensure_column("comments", "terms_indexed", "terms_indexed INTEGER")
     ensure_column("sentiment_series", "subreddit_id", "subreddit_id INTEGER")
     ensure_column("sentiment_series", "event_id", "event_id INTEGER")
     ensure_column("trend_snapshots", "subreddit_id", "subreddit_id INTEGER")
@@ -192,22 +632,120 @@ def init_db() -> None:
     ensure_column("trend_snapshots", "previous_mentions", "previous_mentions INTEGER")
     ensure_column("trend_snapshots", "window_start", "window_start TEXT")
     ensure_column("trend_snapshots", "window_end", "window_end TEXT")
+    ensure_column("posts", "ts_epoch", "ts_epoch INTEGER")
+    ensure_column("posts", "hour_bucket", "hour_bucket INTEGER")
+    ensure_column("sentiment_series", "ts_epoch", "ts_epoch INTEGER")
+    ensure_column("sentiment_series", "hour_bucket", "hour_bucket INTEGER")
+    ensure_column("trend_snapshots", "ts_epoch", "ts_epoch INTEGER")
+    ensure_column("trend_snapshots", "window_start_epoch", "window_start_epoch INTEGER")
+    ensure_column("trend_snapshots", "window_end_epoch", "window_end_epoch INTEGER")
+    ensure_column("emerging_topic_snapshots", "ts_epoch", "ts_epoch INTEGER")
+    ensure_column("emerging_topic_snapshots", "window_start_epoch", "window_start_epoch INTEGER")
+    ensure_column("emerging_topic_snapshots", "window_end_epoch", "window_end_epoch INTEGER")
+
+    def backfill_epoch(table: str, source: str, target: str) -> None:
+        cursor.execute(
+            f"""
+            UPDATE {table}
+            SET {target} = CAST(strftime('%s', {source}) AS INTEGER)
+            WHERE {target} IS NULL AND {source} IS NOT NULL;
+            """
+        )
 
+    for table in ("posts", "sentiment_series"):
+        backfill_epoch(table, "timestamp", "ts_epoch")
+        cursor.execute(
+            f"""
+            UPDATE {table}
+            SET hour_bucket = ts_epoch - ts_epoch % 3600
+            WHERE hour_bucket IS NULL AND ts_epoch IS NOT NULL;
+            """
+        )
+    for table in ("trend_snapshots", "emerging_topic_snapshots"):
+        backfill_epoch(table, "timestamp", "ts_epoch")
+        backfill_epoch(table, "window_start", "window_start_epoch")
+        backfill_epoch(table, "window_end", "window_end_epoch")
+
+    cursor.execute("DROP INDEX IF EXISTS idx_posts_subreddit_id_time;")
+    cursor.execute("DROP INDEX IF EXISTS idx_posts_timestamp;")
     cursor.execute(
-        "CREATE INDEX IF NOT EXISTS idx_posts_subreddit_id_time ON posts(subreddit_id, timestamp);"
+        """
+        CREATE INDEX IF NOT EXISTS idx_posts_subreddit_time_id
+        ON posts(subreddit_id, timestamp, id);
+        """
+    )
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_posts_timestamp_id ON posts(timestamp, id);"
+    )
+    cursor.execute(
+        """
+        CREATE INDEX IF NOT EXISTS idx_posts_keywords_pending
+        ON posts(timestamp) WHERE keyword_version IS NULL;
+        """
+    )
+    cursor.execute(
+        """
+        CREATE INDEX IF NOT EXISTS idx_posts_terms_pending
+        ON posts(timestamp) WHERE terms_indexed IS NULL;
+        """
     )
     cursor.execute(
         "CREATE INDEX IF NOT EXISTS idx_comments_post_id ON comments(post_id);"
     )
+    cursor.execute(
+        """
+        CREATE INDEX IF NOT EXISTS idx_comments_terms_pending
+        ON comments(timestamp) WHERE terms_indexed IS NULL;
+        """
+    )
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_posts_epoch ON posts(ts_epoch);"
+    )
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_posts_hour_subreddit ON posts(hour_bucket, subreddit_id);"
+    )
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_posts_subreddit_epoch ON posts(subreddit_id, ts_epoch);"
+    )
     cursor.execute(
         "CREATE INDEX IF NOT EXISTS idx_sentiment_context_time ON sentiment_series(context, timestamp);"
     )
+    cursor.execute(
+        """
+        CREATE INDEX IF NOT EXISTS idx_sentiment_hour_subreddit
+        ON sentiment_series(hour_bucket, subreddit_id, sentiment);
+        """
+    )
+    cursor.execute(
+        """
+        CREATE INDEX IF NOT EXISTS idx_sentiment_subreddit_epoch
+        ON sentiment_series(subreddit_id, ts_epoch, sentiment);
+        """
+    )
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_sentiment_epoch ON sentiment_series(ts_epoch, sentiment);"
+    )
     cursor.execute(
         "CREATE INDEX IF NOT EXISTS idx_trends_keyword_time ON trend_snapshots(keyword_id, timestamp);"
     )
     cursor.execute(
         "CREATE INDEX IF NOT EXISTS idx_trends_window ON trend_snapshots(window_start, window_end);"
     )
+    cursor.execute(
+        """
+        CREATE INDEX IF NOT EXISTS idx_trends_keyword_window_end
+        ON trend_snapshots(keyword_id, window_end_epoch);
+        """
+    )
+    cursor.execute(
+        """
+        CREATE INDEX IF NOT EXISTS idx_trends_window_end
+        ON trend_snapshots(window_end_epoch, window_start_epoch, keyword_id);
+        """
+    )
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_trends_epoch ON trend_snapshots(ts_epoch);"
+    )
     cursor.execute(
         """
         CREATE UNIQUE INDEX IF NOT EXISTS ux_trends_keyword_window
@@ -220,6 +758,18 @@ def init_db() -> None:
     cursor.execute(
         "CREATE INDEX IF NOT EXISTS idx_emerging_topic_snapshots_time ON emerging_topic_snapshots(timestamp);"
     )
+    cursor.execute(
+        """
+        CREATE INDEX IF NOT EXISTS idx_emerging_topic_snapshots_epoch
+        ON emerging_topic_snapshots(ts_epoch, topic_id, timestamp);
+        """
+    )
+    cursor.execute(
+        """
+        CREATE INDEX IF NOT EXISTS idx_emerging_topic_snapshots_topic_time
+        ON emerging_topic_snapshots(topic_id, timestamp);
+        """
+    )
 
     cursor.execute(
         """
@@ -274,7 +824,8 @@ def init_db() -> None:
         WHERE raw_mentions IS NULL OR window_start IS NULL
         """
     )
+    cursor.execute(f"PRAGMA user_version = {SCHEMA_VERSION};")
 
     connection.commit()
     connection.close()
-    logger.info("Database initialized")
+    logger.info("Database initialized | schema_version=%s", SCHEMA_VERSION)
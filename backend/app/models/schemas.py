@@ -15,15 +15,134 @@ class PostIn(BaseModel):
     comment_count: int = 0
 
 
+class CommentIn(BaseModel):
+    id: str
+    post_id: str
+    timestamp: str
+    subreddit: str
+    body: Optional[str] = None
+    score: int = 0
+
+
+class FetchCursor(BaseModel):
+    subreddit: str
+    last_fullname: Optional[str] = None
+    last_created_utc: Optional[float] = None
+    fetch_limit: int = 50
+
+
 class HealthResponse(BaseModel):
     status: str = Field(json_schema_extra={"example": "ok"})
 
 
+class ScheduledJobState(BaseModel):
+    name: str
+    intervalSeconds: float
+    aligned: bool
+    running: bool
+    lastRun: Optional[str] = None
+    nextRun: Optional[str] = None
+    lastDurationSeconds: float
+    avgDurationSeconds: float
+    runs: int
+    skipped: int
+    failures: int
+    lastError: Optional[str] = None
+
+
 class PollingState(BaseModel):
     enabled: bool
     intervalSeconds: int
     lastRun: Optional[str] = None
     nextRun: Optional[str] = None
+    leader: Optional[str] = None
+    isLeader: bool = False
+    leaseExpiresAt: Optional[str] = None
+    jobs: list[ScheduledJobState] = []
+
+
+class DatabasePoolStats(BaseModel):
+    path: str
+    wal: bool
+    readersOpen: int
+    writerOpen: bool
+    writerBusy: bool
+    connectionsOpened: int
+    connectionsClosed: int
+    readerCheckouts: int
+    writerCheckouts: int
+    commits: int
+    rollbacks: int
+    writerWaitSeconds: float
+
+
+class SentimentCacheStats(BaseModel):
+    size: int
+    maxEntries: int
+    pending: int
+    memoryHits: int
+    storeHits: int
+    misses: int
+
+
+class ResponseCacheStats(BaseModel):
+    generation: int
+    size: int
+    maxEntries: int
+    inflight: int
+    hits: int
+    misses: int
+    coalesced: int
+    evictions: int
+
+
+class PipelineStageStats(BaseModel):
+    name: str
+    workers: int
+    queueSize: int
+    batches: int
+    items: int
+    itemsPerSecond: float
+    busySeconds: float
+    avgLatencySeconds: float
+    maxLatencySeconds: float
+    maxQueueDepth: int
+    blockedSeconds: float
+
+
+class ExecutorStats(BaseModel):
+    name: str
+    kind: str
+    workers: int
+    pending: int
+    calls: int
+    failures: int
+    busySeconds: float
+    avgWaitSeconds: float
+    maxWaitSeconds: float
+
+
+class EventLoopStats(BaseModel):
+    samples: int
+    lastLagSeconds: float
+    maxLagSeconds: float
+    avgLagSeconds: float
+    slowTicks: int
+
+
+class RuntimeStats(BaseModel):
+    eventLoop: EventLoopStats
+    executors: list[ExecutorStats]
+
+
+class RedditClientStats(BaseModel):
+    active: bool
+    requests: int
+    errors: int
+    tokenRequests: int
+    requestSeconds: float
+    cycles: int
+    lastCycleRequests: int
 
 
 class SentimentRecord(BaseModel):
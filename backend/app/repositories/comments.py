@@ -0,0 +1,103 @@
+from __future__ import annotations
+
+from datetime import datetime, timedelta, timezone
+from typing import Iterable
+
+import logging
+
+from app.db.database import read_connection, write_connection
+from app.models.schemas import CommentIn
+from app.repositories.subreddits import resolve_subreddit_ids
+
+logger = logging.getLogger("reddit_trends.comments")
+
+
+def fetch_comment_crawl_candidates(
+    min_comments: int, max_age_hours: int, limit: int
+) -> list:
+    since = datetime.now(tz=timezone.utc) - timedelta(hours=max_age_hours)
+    with read_connection() as connection:
+        cursor = connection.cursor()
+        cursor.execute(
+            """
+            SELECT p.id, p.comment_count, p.comments_crawled_count, r.name AS subreddit
+            FROM posts p
+            LEFT JOIN subreddits r ON r.id = p.subreddit_id
+            WHERE p.timestamp >= ?
+              AND p.comment_count >= ?
+              AND (
+                  p.comments_crawled_count IS NULL
+                  OR p.comment_count >= p.comments_crawled_count * 2
+              )
+            ORDER BY p.comments_crawled_count IS NULL DESC, p.comment_count DESC
+            LIMIT ?
+            """,
+            (since.isoformat(), min_comments, limit),
+        )
+        rows = cursor.fetchall()
+    return rows
+
+
+def fetch_existing_comment_ids(comment_ids: Iterable[str]) -> set[str]:
+    ids = list(dict.fromkeys(comment_ids))
+    existing: set[str] = set()
+    with read_connection() as connection:
+        cursor = connection.cursor()
+        for start in range(0, len(ids), 500):
+            batch = ids[start : start + 500]
+            placeholders = ",".join(["?"] * len(batch))
+            cursor.execute(
+                f"SELECT id FROM comments WHERE id IN ({placeholders})",
+                tuple(batch),
+            )
+            existing.update(row["id"] for row in cursor.fetchall())
+    return existing
+
+
+def store_comments(
+    comments: Iterable[CommentIn],
+    sentiment: dict[str, float] | None = None,
+    crawled_posts: Iterable[tuple[str, int]] = (),
+) -> int:
+    comments = [comment for comment in comments if comment.id]
+    sentiment = sentiment or {}
+    crawled_at = datetime.now(tz=timezone.utc).isoformat()
+    with write_connection() as connection:
+        cursor = connection.cursor()
+        subreddit_ids = resolve_subreddit_ids(comment.subreddit for comment in comments)
+        cursor.executemany(
+            """
+            INSERT INTO comments (
+                id,
+                timestamp,
+                subreddit_id,
+                post_id,
+                body,
+                score,
+                sentiment_compound
+            ) VALUES (?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(id) DO UPDATE SET score = excluded.score
+            """,
+            [
+                (
+                    comment.id,
+                    comment.timestamp,
+                    subreddit_ids.get(comment.subreddit) if comment.subreddit else None,
+                    comment.post_id,
+                    comment.body,
+                    comment.score,
+                    sentiment.get(comment.id),
+                )
+                for comment in comments
+            ],
+        )
+        cursor.executemany(
+            """
+            UPDATE posts
+            SET comments_crawled_count = ?, comments_crawled_at = ?
+            WHERE id = ?
+            """,
+            [(count, crawled_at, post_id) for post_id, count in crawled_posts],
+        )
+    logger.info("Stored comments | count=%s", len(comments))
+    return len(comments)
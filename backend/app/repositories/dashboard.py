@@ -1,135 +1,96 @@
 from __future__ import annotations
 
-from datetime import datetime, timedelta, timezone
-
-from app.db.database import get_connection
+from app.db.database import read_connection
 from app.core.config import settings
-
-
-def _since(hours: int) -> str:
-    return (datetime.now(tz=timezone.utc) - timedelta(hours=hours)).isoformat()
-
-
-def _kpis_between(start: str, end: str) -> dict:
-    connection = get_connection()
-    cursor = connection.cursor()
-
-    cursor.execute(
-        """
-        SELECT COUNT(*) AS count
-        FROM posts
-        WHERE timestamp >= ? AND timestamp < ?
-        """,
-        (start, end),
-    )
-    mentions = int(cursor.fetchone()["count"])
-
-    cursor.execute(
-        """
-        SELECT COUNT(DISTINCT subreddit_id) AS count
-        FROM posts
-        WHERE timestamp >= ? AND timestamp < ?
-        """,
-        (start, end),
-    )
-    active_subreddits = int(cursor.fetchone()["count"])
-
-    cursor.execute(
-        """
-        SELECT AVG(sentiment) AS avg_sentiment
-        FROM sentiment_series
-        WHERE timestamp >= ? AND timestamp < ?
-        """,
-        (start, end),
-    )
-    avg_sentiment = cursor.fetchone()["avg_sentiment"]
-    avg_sentiment = float(avg_sentiment) if avg_sentiment is not None else 0.0
-
-    cursor.execute(
-        """
-        SELECT COUNT(DISTINCT keyword_id) AS spikes
-        FROM trend_snapshots
-                WHERE timestamp >= ? AND timestamp < ?
-                    AND spike >= 1.0
-                    AND raw_mentions >= 10
-        """,
-        (start, end),
-    )
-    spikes = int(cursor.fetchone()["spikes"])
-
-    connection.close()
+from app.core.timestamps import (
+    HOUR_SECONDS,
+    epoch_hours_ago,
+    format_hour_bucket,
+    hour_bucket,
+    now_epoch,
+)
+from app.repositories.rollups import decode_bitmap, fetch_hourly_rollups, parse_ids
+
+
+def _kpis_from_rollups(rows: list) -> dict:
+    mentions = sum(int(row["post_count"]) for row in rows)
+    sentiment_count = sum(int(row["sentiment_count"]) for row in rows)
+    sentiment_sum = sum(float(row["sentiment_sum"]) for row in rows)
+    bitmap = 0
+    spikes: set[int] = set()
+    for row in rows:
+        bitmap |= decode_bitmap(row["subreddit_bitmap"])
+        spikes |= parse_ids(row["spike_keywords"])
+    avg_sentiment = sentiment_sum / sentiment_count if sentiment_count else 0.0
     return {
         "mentions": mentions,
-        "active_subreddits": active_subreddits,
+        "active_subreddits": bitmap.bit_count(),
         "avg_sentiment": round(avg_sentiment, 4),
-        "spikes": spikes,
+        "spikes": len(spikes),
     }
 
 
 def fetch_kpis(hours: int = 24) -> dict:
-    end = datetime.now(tz=timezone.utc).isoformat()
-    start = (datetime.now(tz=timezone.utc) - timedelta(hours=hours)).isoformat()
-    return _kpis_between(start, end)
+    start = hour_bucket(now_epoch()) - (hours - 1) * HOUR_SECONDS
+    return _kpis_from_rollups(fetch_hourly_rollups(start))
 
 
 def fetch_kpis_window(hours: int = 24) -> tuple[dict, dict]:
-    end = datetime.now(tz=timezone.utc)
-    start = end - timedelta(hours=hours)
-    prev_start = start - timedelta(hours=hours)
-    current = _kpis_between(start.isoformat(), end.isoformat())
-    previous = _kpis_between(prev_start.isoformat(), start.isoformat())
+    start = hour_bucket(now_epoch()) - (hours - 1) * HOUR_SECONDS
+    prev_start = start - hours * HOUR_SECONDS
+    rows = fetch_hourly_rollups(prev_start)
+    current = _kpis_from_rollups([row for row in rows if row["hour_bucket"] >= start])
+    previous = _kpis_from_rollups([row for row in rows if row["hour_bucket"] < start])
     return current, previous
 
 
 def fetch_active_subreddits(limit: int | None = 8) -> list[str]:
-    connection = get_connection()
-    cursor = connection.cursor()
-    if limit is None:
-        cursor.execute(
-            """
-            SELECT name
-            FROM subreddits
-            ORDER BY name ASC
-            """,
-        )
-    else:
-        cursor.execute(
-            """
-            SELECT name
-            FROM subreddits
-            ORDER BY name ASC
-            LIMIT ?
-            """,
-            (limit,),
-        )
-    rows = cursor.fetchall()
-    connection.close()
+    with read_connection() as connection:
+        cursor = connection.cursor()
+        if limit is None:
+            cursor.execute(
+                """
+                SELECT name
+                FROM subreddits
+                ORDER BY name ASC
+                """,
+            )
+        else:
+            cursor.execute(
+                """
+                SELECT name
+                FROM subreddits
+                ORDER BY name ASC
+                LIMIT ?
+                """,
+                (limit,),
+            )
+        rows = cursor.fetchall()
     return [f"r/{row['name']}" for row in rows]
 
 
 def fetch_active_events(limit: int | None = 6) -> list[str]:
-    connection = get_connection()
-    cursor = connection.cursor()
-    if limit is None:
-        cursor.execute(
-            """
-            SELECT name
-            FROM events
-            ORDER BY name ASC
-            """,
-        )
-    else:
-        cursor.execute(
-            """
-            SELECT name
-            FROM events
-            ORDER BY name ASC
-            LIMIT ?
-            """,
-            (limit,),
-        )
-    rows = cursor.fetchall()
-    connection.close()
+    with read_connection() as connection:
+        cursor = connection.cursor()
+        if limit is None:
+            cursor.execute(
+                """
+                SELECT name
+                FROM events
+                ORDER BY name ASC
+                """,
+            )
+        else:
+            cursor.execute(
+                """
+                SELECT name
+                FROM events
+                ORDER BY name ASC
+                LIMIT ?
+                """,
+                (limit,),
+            )
+        rows = cursor.fetchall()
     if rows:
         return [row["name"] for row in rows]
 
@@ -138,89 +99,61 @@ def fetch_active_events(limit: int | None = 6) -> list[str]:
 
 
 def fetch_volume_series(hours: int = 24) -> list[dict]:
-    connection = get_connection()
-    cursor = connection.cursor()
-    since = _since(hours)
-    cursor.execute(
-        """
-        SELECT substr(timestamp, 1, 13) AS hour_bucket, COUNT(*) AS count
-        FROM posts
-        WHERE timestamp >= ?
-        GROUP BY hour_bucket
-        ORDER BY hour_bucket ASC
-        """,
-        (since,),
-    )
-    rows = cursor.fetchall()
-    connection.close()
-    return [{"time": row["hour_bucket"], "value": int(row["count"])} for row in rows]
+    rows = fetch_hourly_rollups(hour_bucket(epoch_hours_ago(hours)))
+    return [
+        {"time": format_hour_bucket(row["hour_bucket"]), "value": int(row["post_count"])}
+        for row in rows
+        if row["post_count"]
+    ]
 
 
 def fetch_sentiment_timeline(hours: int = 24) -> list[dict]:
-    connection = get_connection()
-    cursor = connection.cursor()
-    since = _since(hours)
-    cursor.execute(
-        """
-        SELECT substr(timestamp, 1, 13) AS hour_bucket, AVG(sentiment) AS avg_sentiment
-        FROM sentiment_series
-        WHERE timestamp >= ?
-        GROUP BY hour_bucket
-        ORDER BY hour_bucket ASC
-        """,
-        (since,),
-    )
-    rows = cursor.fetchall()
-    connection.close()
+    rows = fetch_hourly_rollups(hour_bucket(epoch_hours_ago(hours)))
     return [
         {
-            "time": row["hour_bucket"],
-            "value": round(float(row["avg_sentiment"] or 0.0), 4),
+            "time": format_hour_bucket(row["hour_bucket"]),
+            "value": round(float(row["sentiment_sum"]) / int(row["sentiment_count"]), 4),
         }
         for row in rows
+        if row["sentiment_count"]
     ]
 
 
 def fetch_trending_topics(hours: int = 24, limit: int = 5) -> list[dict]:
-    connection = get_connection()
-    cursor = connection.cursor()
-    since = _since(hours)
-    cursor.execute(
-        """
-                WITH latest AS (
-                        SELECT keyword_id, MAX(window_end) AS latest_end
-                        FROM trend_snapshots
-                        WHERE COALESCE(window_end, timestamp) >= ?
-                            AND window_start IS NOT NULL
-                            AND window_end IS NOT NULL
-                            AND substr(window_start, 15, 2) = '00'
-                            AND substr(window_start, 18, 2) = '00'
-                            AND substr(window_end, 15, 2) = '00'
-                            AND substr(window_end, 18, 2) = '00'
-                        GROUP BY keyword_id
-                )
-                SELECT k.phrase AS keyword,
-                             ts.velocity,
-                             ts.spike,
-                             ts.raw_mentions,
-                             ts.weighted_mentions,
-                             ts.previous_mentions
-                FROM trend_snapshots ts
-                JOIN latest l ON l.keyword_id = ts.keyword_id AND l.latest_end = ts.window_end
-                JOIN keywords k ON k.id = ts.keyword_id
-                WHERE ts.raw_mentions IS NOT NULL
-                    AND (
-                        ts.raw_mentions >= 5
-                        OR ts.weighted_mentions >= 5
-                        OR ts.velocity >= 0.5
+    with read_connection() as connection:
+        cursor = connection.cursor()
+        since = epoch_hours_ago(hours)
+        cursor.execute(
+            """
+                    WITH latest AS (
+                            SELECT keyword_id, MAX(window_end_epoch) AS latest_end
+                            FROM trend_snapshots
+                            WHERE window_end_epoch >= ?
+                                AND window_start_epoch % 3600 = 0
+                                AND window_end_epoch % 3600 = 0
+                            GROUP BY keyword_id
                     )
-                ORDER BY ts.spike DESC
-        LIMIT ?
-        """,
-        (since, limit),
-    )
-    rows = cursor.fetchall()
-    connection.close()
+                    SELECT k.phrase AS keyword,
+                                 ts.velocity,
+                                 ts.spike,
+                                 ts.raw_mentions,
+                                 ts.weighted_mentions,
+                                 ts.previous_mentions
+                    FROM trend_snapshots ts
+                    JOIN latest l ON l.keyword_id = ts.keyword_id AND l.latest_end = ts.window_end_epoch
+                    JOIN keywords k ON k.id = ts.keyword_id
+                    WHERE ts.raw_mentions IS NOT NULL
+                        AND (
+                            ts.raw_mentions >= 5
+                            OR ts.weighted_mentions >= 5
+                            OR ts.velocity >= 0.5
+                        )
+                    ORDER BY ts.spike DESC
+            LIMIT ?
+            """,
+            (since, limit),
+        )
+        rows = cursor.fetchall()
     return [
         {
             "keyword": row["keyword"],
@@ -238,23 +171,22 @@ def fetch_trending_topic_contexts(keywords: list[str]) -> dict[str, str]:
     if not keywords:
         return {}
     placeholders = ",".join(["?"] * len(keywords))
-    connection = get_connection()
-    cursor = connection.cursor()
-    cursor.execute(
-        f"""
-        SELECT k.phrase AS keyword, r.name AS subreddit, COUNT(*) AS mentions
-        FROM post_keywords pk
-        JOIN keywords k ON k.id = pk.keyword_id
-        JOIN posts p ON p.id = pk.post_id
-        JOIN subreddits r ON r.id = p.subreddit_id
-        WHERE k.phrase IN ({placeholders})
-        GROUP BY k.phrase, r.name
-        ORDER BY k.phrase, mentions DESC
-        """,
-        tuple(keywords),
-    )
-    rows = cursor.fetchall()
-    connection.close()
+    with read_connection() as connection:
+        cursor = connection.cursor()
+        cursor.execute(
+            f"""
+            SELECT k.phrase AS keyword, r.name AS subreddit, COUNT(*) AS mentions
+            FROM post_keywords pk
+            JOIN keywords k ON k.id = pk.keyword_id
+            JOIN posts p ON p.id = pk.post_id
+            JOIN subreddits r ON r.id = p.subreddit_id
+            WHERE k.phrase IN ({placeholders})
+            GROUP BY k.phrase, r.name
+            ORDER BY k.phrase, mentions DESC
+            """,
+            tuple(keywords),
+        )
+        rows = cursor.fetchall()
 
     contexts: dict[str, list[str]] = {}
     for row in rows:
@@ -0,0 +1,70 @@
+from __future__ import annotations
+
+from datetime import datetime, timezone
+from typing import Iterable
+
+from app.db.database import read_connection, write_connection
+from app.models.schemas import FetchCursor
+from app.repositories.subreddits import resolve_subreddit_ids
+
+
+def fetch_cursors(subreddits: Iterable[str]) -> dict[str, FetchCursor]:
+    names = list(dict.fromkeys(subreddits))
+    if not names:
+        return {}
+    placeholders = ",".join(["?"] * len(names))
+    with read_connection() as connection:
+        cursor = connection.cursor()
+        cursor.execute(
+            f"""
+            SELECT s.name, c.last_fullname, c.last_created_utc, c.fetch_limit
+            FROM subreddit_fetch_cursors c
+            JOIN subreddits s ON s.id = c.subreddit_id
+            WHERE s.name IN ({placeholders})
+            """,
+            tuple(names),
+        )
+        rows = cursor.fetchall()
+    return {
+        row["name"]: FetchCursor(
+            subreddit=row["name"],
+            last_fullname=row["last_fullname"],
+            last_created_utc=row["last_created_utc"],
+            fetch_limit=int(row["fetch_limit"]),
+        )
+        for row in rows
+    }
+
+
+def store_cursors(cursors: Iterable[FetchCursor]) -> int:
+    cursors = list(cursors)
+    if not cursors:
+        return 0
+    subreddit_map = resolve_subreddit_ids(item.subreddit for item in cursors)
+    updated_at = datetime.now(tz=timezone.utc).isoformat()
+    payload = [
+        (
+            subreddit_map[item.subreddit],
+            item.last_fullname,
+            item.last_created_utc,
+            item.fetch_limit,
+            updated_at,
+        )
+        for item in cursors
+    ]
+    with write_connection() as connection:
+        connection.executemany(
+            """
+            INSERT INTO subreddit_fetch_cursors (
+                subreddit_id, last_fullname, last_created_utc, fetch_limit, updated_at
+            )
+            VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT(subreddit_id) DO UPDATE SET
+                last_fullname = excluded.last_fullname,
+                last_created_utc = excluded.last_created_utc,
+                fetch_limit = excluded.fetch_limit,
+                updated_at = excluded.updated_at
+            """,
+            payload,
+        )
+    return len(payload)
@@ -0,0 +1,83 @@
+from __future__ import annotations
+
+import logging
+import threading
+from typing import Iterable
+
+from app.db.database import get_pool, read_connection, register_cache_reset, write_connection
+
+logger = logging.getLogger("reddit_trends.interning")
+
+_BATCH_SIZE = 500
+
+
+class IdInterner:
+    def __init__(self, table: str, column: str) -> None:
+        self.table = table
+        self.column = column
+        self._ids: dict[str, int] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        register_cache_reset(self.clear)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._ids.clear()
+
+    def warm(self) -> int:
+        with read_connection() as connection:
+            rows = connection.execute(
+                f"SELECT id, {self.column} AS value FROM {self.table};"
+            ).fetchall()
+        with self._lock:
+            self._ids.update({row["value"]: int(row["id"]) for row in rows})
+            size = len(self._ids)
+        logger.info("Warmed id cache | table=%s size=%s", self.table, size)
+        return size
+
+    def resolve(self, values: Iterable[str]) -> dict[str, int]:
+        wanted = {value for value in values if value}
+        resolved: dict[str, int] = {}
+        missing: list[str] = []
+        get_pool()  # resets this cache if the database location changed
+        with self._lock:
+            for value in wanted:
+                cached = self._ids.get(value)
+                if cached is None:
+                    missing.append(value)
+                else:
+                    resolved[value] = cached
+            self.hits += len(resolved)
+            self.misses += len(missing)
+        if not missing:
+            return resolved
+
+        fetched: dict[str, int] = {}
+        with write_connection() as connection:
+            cursor = connection.cursor()
+            cursor.executemany(
+                f"INSERT OR IGNORE INTO {self.table} ({self.column}) VALUES (?);",
+                [(value,) for value in missing],
+            )
+            for start in range(0, len(missing), _BATCH_SIZE):
+                batch = missing[start : start + _BATCH_SIZE]
+                placeholders = ",".join(["?"] * len(batch))
+                cursor.execute(
+                    f"""
+                    SELECT id, {self.column} AS value
+                    FROM {self.table}
+                    WHERE {self.column} IN ({placeholders})
+                    """,
+                    tuple(batch),
+                )
+                fetched.update({row["value"]: int(row["id"]) for row in cursor.fetchall()})
+
+        with self._lock:
+            self._ids.update(fetched)
+        resolved.update(fetched)
+        return resolved
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {"size": len(self._ids), "hits": self.hits, "misses": self.misses}
@@ -1,14 +1,32 @@
 from __future__ import annotations
 
-from app.db.database import get_connection
+from typing import Iterable
+
+from app.db.database import read_connection
+from app.repositories.interning import IdInterner
+
+keyword_ids = IdInterner("keywords", "phrase")
+
+
+def resolve_keyword_ids(phrases: Iterable[str]) -> dict[str, int]:
+    return keyword_ids.resolve(phrases)
 
 
 def get_or_create_keyword_id(keyword: str) -> int:
-    connection = get_connection()
-    cursor = connection.cursor()
-    cursor.execute("INSERT OR IGNORE INTO keywords (phrase) VALUES (?);", (keyword,))
-    cursor.execute("SELECT id FROM keywords WHERE phrase = ?;", (keyword,))
-    row = cursor.fetchone()
-    connection.commit()
-    connection.close()
-    return int(row["id"]) if row else 0
+    return resolve_keyword_ids([keyword]).get(keyword, 0)
+
+
+def fetch_keyword_version() -> int:
+    with read_connection() as connection:
+        row = connection.execute(
+            "SELECT COALESCE(MAX(id), 0) AS version FROM keywords;"
+        ).fetchone()
+    return int(row["version"])
+
+
+def fetch_keywords(after_id: int = 0) -> list[tuple[int, str]]:
+    with read_connection() as connection:
+        rows = connection.execute(
+            "SELECT id, phrase FROM keywords WHERE id > ?;", (after_id,)
+        ).fetchall()
+    return [(int(row["id"]), row["phrase"]) for row in rows]
@@ -0,0 +1,96 @@
+from __future__ import annotations
+
+import time
+from typing import Optional
+
+from app.db.database import control_connection
+
+
+def _lease_row(row) -> dict | None:
+    return dict(row) if row is not None else None
+
+
+def acquire_lease(
+    name: str,
+    owner: str,
+    ttl_seconds: float,
+    interval_seconds: Optional[int] = None,
+    last_run: Optional[str] = None,
+    next_run: Optional[str] = None,
+    jobs: Optional[str] = None,
+) -> dict | None:
+    now = time.time()
+    with control_connection() as connection:
+        cursor = connection.execute(
+            """
+            INSERT INTO scheduler_leases (
+                name, owner, acquired_at, expires_at, interval_seconds, last_run, next_run, jobs
+            )
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(name) DO UPDATE SET
+                owner = excluded.owner,
+                acquired_at = CASE
+                    WHEN scheduler_leases.owner IS excluded.owner
+                    THEN scheduler_leases.acquired_at
+                    ELSE excluded.acquired_at
+                END,
+                expires_at = excluded.expires_at,
+                interval_seconds = COALESCE(
+                    excluded.interval_seconds, scheduler_leases.interval_seconds
+                ),
+                last_run = COALESCE(excluded.last_run, scheduler_leases.last_run),
+                next_run = excluded.next_run,
+                jobs = COALESCE(excluded.jobs, scheduler_leases.jobs)
+            WHERE scheduler_leases.owner IS excluded.owner
+               OR scheduler_leases.expires_at <= ?
+            """,
+            (
+                name,
+                owner,
+                now,
+                now + ttl_seconds,
+                interval_seconds,
+                last_run,
+                next_run,
+                jobs,
+                now,
+            ),
+        )
+        if cursor.rowcount != 1:
+            return None
+        row = connection.execute(
+            "SELECT * FROM scheduler_leases WHERE name = ?", (name,)
+        ).fetchone()
+    return _lease_row(row)
+
+
+def release_lease(name: str, owner: str) -> bool:
+    with control_connection() as connection:
+        cursor = connection.execute(
+            """
+            UPDATE scheduler_leases
+            SET expires_at = 0, next_run = NULL
+            WHERE name = ? AND owner = ?
+            """,
+            (name, owner),
+        )
+        return cursor.rowcount == 1
+
+
+def fetch_lease(name: str) -> dict | None:
+    with control_connection() as connection:
+        row = connection.execute(
+            "SELECT * FROM scheduler_leases WHERE name = ?", (name,)
+        ).fetchone()
+    return _lease_row(row)
+
+
+def store_lease_enabled(name: str, enabled: bool) -> None:
+    with control_connection() as connection:
+        connection.execute(
+            """
+            INSERT INTO scheduler_leases (name, enabled) VALUES (?, ?)
+            ON CONFLICT(name) DO UPDATE SET enabled = excluded.enabled
+            """,
+            (name, int(enabled)),
+        )
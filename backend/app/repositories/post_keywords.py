@@ -2,20 +2,81 @@ from __future__ import annotations
 
 from typing import Iterable
 
-from app.db.database import get_connection
-
-
-def store_post_keywords(rows: Iterable[tuple[str, int, int]]) -> int:
-    connection = get_connection()
-    cursor = connection.cursor()
-    cursor.executemany(
-        """
-        INSERT OR REPLACE INTO post_keywords (post_id, keyword_id, count)
-        VALUES (?, ?, ?)
-        """,
-        list(rows),
-    )
-    connection.commit()
-    inserted = cursor.rowcount
-    connection.close()
+from app.db.database import read_connection, write_connection
+
+
+def fetch_unscanned_posts(limit: int = 1000) -> list:
+    with read_connection() as connection:
+        return connection.execute(
+            """
+            SELECT id, title, body
+            FROM posts
+            WHERE keyword_version IS NULL
+            LIMIT ?
+            """,
+            (limit,),
+        ).fetchall()
+
+
+def fetch_keyword_rescan_floor(version: int, rescan_since: str) -> int | None:
+    with read_connection() as connection:
+        row = connection.execute(
+            """
+            SELECT MIN(keyword_version) AS floor
+            FROM posts
+            WHERE timestamp >= ? AND keyword_version < ?
+            """,
+            (rescan_since, version),
+        ).fetchone()
+    return None if row["floor"] is None else int(row["floor"])
+
+
+def fetch_posts_for_keyword_rescan(
+    version: int, rescan_since: str, needles: list[str], limit: int = 1000
+) -> list:
+    clause = ""
+    if needles:
+        content = "lower(COALESCE(title, '') || ' ' || COALESCE(body, ''))"
+        clause = "AND (" + " OR ".join(f"instr({content}, ?) > 0" for _ in needles) + ")"
+    with read_connection() as connection:
+        return connection.execute(
+            f"""
+            SELECT id, title, body
+            FROM posts
+            WHERE timestamp >= ? AND keyword_version < ? {clause}
+            LIMIT ?
+            """,
+            (rescan_since, version, *needles, limit),
+        ).fetchall()
+
+
+def mark_keyword_version(version: int, rescan_since: str) -> int:
+    with write_connection() as connection:
+        cursor = connection.execute(
+            "UPDATE posts SET keyword_version = ? WHERE timestamp >= ? AND keyword_version < ?;",
+            (version, rescan_since, version),
+        )
+    return cursor.rowcount
+
+
+def store_post_keywords(
+    rows: Iterable[tuple[str, int, int]],
+    scanned_post_ids: Iterable[str] = (),
+    version: int | None = None,
+) -> int:
+    with write_connection() as connection:
+        cursor = connection.cursor()
+        cursor.executemany(
+            """
+            INSERT OR REPLACE INTO post_keywords (post_id, keyword_id, count)
+            VALUES (?, ?, ?)
+            """,
+            list(rows),
+        )
+        inserted = cursor.rowcount
+        if version is not None:
+            cursor.executemany(
+                "UPDATE posts SET keyword_version = ? WHERE id = ?;",
+                [(version, post_id) for post_id in scanned_post_ids],
+            )
     return inserted
@@ -4,80 +4,156 @@ from typing import Iterable
 
 import logging
 
-from app.db.database import get_connection
+from app.core.timestamps import hour_bucket, to_epoch
+from app.db.database import read_connection, write_connection
 from app.models.schemas import PostIn
-from app.repositories.subreddits import get_or_create_subreddit_id
+from app.repositories.rollups import add_post_rollups
+from app.repositories.subreddits import resolve_subreddit_ids
 
 logger = logging.getLogger("reddit_trends.posts")
 
 
 def store_posts(posts: Iterable[PostIn]) -> int:
-    connection = get_connection()
-    cursor = connection.cursor()
-
-    enriched = []
-    for post in posts:
-        if not post.id:
-            continue
-        subreddit = post.subreddit or ""
-        subreddit_id = get_or_create_subreddit_id(subreddit) if subreddit else None
-        enriched.append(
-            (
-                post.id,
-                post.timestamp,
-                subreddit_id,
-                post.title,
-                post.body,
-                post.score,
-                post.comment_count,
-            )
-        )
+    posts = [post for post in posts if post.id]
+    with write_connection() as connection:
+        cursor = connection.cursor()
 
-    cursor.executemany(
-        """
-        INSERT OR IGNORE INTO posts (
-            id,
-            timestamp,
-            subreddit_id,
-            title,
-            body,
-            score,
-            comment_count
-        ) VALUES (?, ?, ?, ?, ?, ?, ?)
-        """,
-        enriched,
-    )
+        subreddit_ids = resolve_subreddit_ids(post.subreddit for post in posts)
+        enriched = []
+        for post in posts:
+            subreddit_id = subreddit_ids.get(post.subreddit) if post.subreddit else None
+            epoch = to_epoch(post.timestamp)
+            enriched.append(
+                (
+                    post.id,
+                    post.timestamp,
+                    subreddit_id,
+                    post.title,
+                    post.body,
+                    post.score,
+                    post.comment_count,
+                    epoch,
+                    hour_bucket(epoch),
+                )
+            )
 
-    connection.commit()
-    inserted = cursor.rowcount
-    connection.close()
+        inserted = 0
+        cells: dict[tuple[int, int | None], int] = {}
+        for row in enriched:
+            cursor.execute(
+                """
+                INSERT OR IGNORE INTO posts (
+                    id,
+                    timestamp,
+                    subreddit_id,
+                    title,
+                    body,
+                    score,
+                    comment_count,
+                    ts_epoch,
+                    hour_bucket
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                row,
+            )
+            if cursor.rowcount == 1:
+                inserted += 1
+                cells[(row[8], row[2])] = cells.get((row[8], row[2]), 0) + 1
+        add_post_rollups(cells)
     logger.info("Stored posts | received=%s inserted=%s", len(enriched), inserted)
     return inserted
 
 
+def fetch_post_sentiment(post_ids: Iterable[str]) -> dict[str, float | None]:
+    ids = list(dict.fromkeys(post_ids))
+    scores: dict[str, float | None] = {}
+    with read_connection() as connection:
+        cursor = connection.cursor()
+        for start in range(0, len(ids), 500):
+            batch = ids[start : start + 500]
+            placeholders = ",".join(["?"] * len(batch))
+            cursor.execute(
+                f"""
+                SELECT id, sentiment_compound
+                FROM posts
+                WHERE id IN ({placeholders})
+                """,
+                tuple(batch),
+            )
+            scores.update(
+                {row["id"]: row["sentiment_compound"] for row in cursor.fetchall()}
+            )
+    return scores
+
+
 def update_post_sentiment(
     scores: Iterable[tuple[str, float, float, float, float]]
 ) -> int:
-    connection = get_connection()
-    cursor = connection.cursor()
-
-    cursor.executemany(
-        """
-        UPDATE posts
-        SET sentiment_compound = ?,
-            sentiment_pos = ?,
-            sentiment_neg = ?,
-            sentiment_neu = ?
-        WHERE id = ?
-        """,
-        [
-            (compound, pos, neg, neu, post_id)
-            for post_id, compound, pos, neg, neu in scores
-        ],
-    )
+    with write_connection() as connection:
+        cursor = connection.cursor()
 
-    connection.commit()
-    updated = cursor.rowcount
-    connection.close()
+        cursor.executemany(
+            """
+            UPDATE posts
+            SET sentiment_compound = ?,
+                sentiment_pos = ?,
+                sentiment_neg = ?,
+                sentiment_neu = ?
+            WHERE id = ?
+            """,
+            [
+                (compound, pos, neg, neu, post_id)
+                for post_id, compound, pos, neg, neu in scores
+            ],
+        )
+
+        updated = cursor.rowcount
     logger.info("Updated post sentiment | records=%s", updated)
     return updated
+
+
+def fetch_recent_post_ids(since: str, limit: int) -> list[str]:
+    with read_connection() as connection:
+        cursor = connection.cursor()
+        cursor.execute(
+            """
+            SELECT id
+            FROM posts
+            WHERE timestamp >= ?
+            ORDER BY timestamp DESC
+            LIMIT ?
+            """,
+            (since, limit),
+        )
+        return [row["id"] for row in cursor.fetchall()]
+
+
+def update_post_engagement(engagement: dict[str, tuple[int, int]]) -> list[tuple]:
+    ids = list(engagement)
+    changed: list[tuple] = []
+    with write_connection() as connection:
+        cursor = connection.cursor()
+        for start in range(0, len(ids), 500):
+            batch = ids[start : start + 500]
+            placeholders = ",".join(["?"] * len(batch))
+            cursor.execute(
+                f"""
+                SELECT id, timestamp, title, body, score, comment_count, terms_indexed
+                FROM posts
+                WHERE id IN ({placeholders})
+                """,
+                tuple(batch),
+            )
+            for row in cursor.fetchall():
+                score, comment_count = engagement[row["id"]]
+                if (row["score"], row["comment_count"]) != (score, comment_count):
+                    changed.append((row, score, comment_count))
+
+        cursor.executemany(
+            "UPDATE posts SET score = ?, comment_count = ? WHERE id = ?",
+            [(score, comment_count, row["id"]) for row, score, comment_count in changed],
+        )
+    logger.info(
+        "Updated post engagement | checked=%s changed=%s", len(ids), len(changed)
+    )
+    return changed
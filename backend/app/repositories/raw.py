@@ -1,49 +1,83 @@
 from __future__ import annotations
 
-from typing import Optional
+from typing import Iterator, Optional
 
-from app.db.database import get_connection
-from app.models.schemas import PostResponse
+from app.db.database import read_connection
 
+_POST_COLUMNS = """
+    SELECT p.id, p.timestamp, s.name AS subreddit, p.title, p.body, p.score, p.comment_count
+    FROM posts p
+    JOIN subreddits s ON s.id = p.subreddit_id
+"""
 
-def fetch_posts(limit: int = 100, subreddit: Optional[str] = None) -> list[PostResponse]:
-    connection = get_connection()
-    cursor = connection.cursor()
+
+def _post_filters(
+    subreddit: Optional[str],
+    since: Optional[str],
+    until: Optional[str],
+) -> tuple[list[str], list]:
+    clauses: list[str] = []
+    params: list = []
     if subreddit:
+        clauses.append("s.name = ?")
+        params.append(subreddit)
+    if since:
+        clauses.append("p.timestamp >= ?")
+        params.append(since)
+    if until:
+        clauses.append("p.timestamp < ?")
+        params.append(until)
+    return clauses, params
+
+
+def fetch_posts(
+    limit: int = 100,
+    subreddit: Optional[str] = None,
+    before: Optional[tuple[str, str]] = None,
+) -> list[dict]:
+    clauses, params = _post_filters(subreddit, None, None)
+    if before:
+        clauses.append("(p.timestamp, p.id) < (?, ?)")
+        params.extend(before)
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+    with read_connection() as connection:
+        cursor = connection.cursor()
         cursor.execute(
-            """
-            SELECT p.id, p.timestamp, s.name AS subreddit, p.title, p.body, p.score, p.comment_count
-            FROM posts p
-            JOIN subreddits s ON s.id = p.subreddit_id
-            WHERE s.name = ?
-            ORDER BY p.timestamp DESC
-            LIMIT ?
-            """,
-            (subreddit, limit),
-        )
-    else:
-        cursor.execute(
-            """
-            SELECT p.id, p.timestamp, s.name AS subreddit, p.title, p.body, p.score, p.comment_count
-            FROM posts p
-            JOIN subreddits s ON s.id = p.subreddit_id
-            ORDER BY p.timestamp DESC
+            f"""
+            {_POST_COLUMNS}
+            {where}
+            ORDER BY p.timestamp DESC, p.id DESC
             LIMIT ?
             """,
-            (limit,),
+            (*params, limit),
         )
+        rows = cursor.fetchall()
+    return [dict(row) for row in rows]
 
-    rows = cursor.fetchall()
-    connection.close()
-    return [
-        PostResponse(
-            id=row["id"],
-            timestamp=row["timestamp"],
-            subreddit=row["subreddit"],
-            title=row["title"],
-            body=row["body"],
-            score=row["score"],
-            comment_count=row["comment_count"],
-        )
-        for row in rows
-    ]
+
+def iter_posts(
+    subreddit: Optional[str] = None,
+    since: Optional[str] = None,
+    until: Optional[str] = None,
+    batch_size: int = 1000,
+) -> Iterator[list[dict]]:
+    clauses, params = _post_filters(subreddit, since, until)
+    after: tuple[str, str] | None = None
+    while True:
+        page_clauses = [*clauses, "(p.timestamp, p.id) > (?, ?)"] if after else clauses
+        where = f"WHERE {' AND '.join(page_clauses)}" if page_clauses else ""
+        with read_connection() as connection:
+            rows = connection.execute(
+                f"""
+                {_POST_COLUMNS}
+                {where}
+                ORDER BY p.timestamp ASC, p.id ASC
+                LIMIT ?
+                """,
+                (*params, *(after or ()), batch_size),
+            ).fetchall()
+        if rows:
+            yield [dict(row) for row in rows]
+        if len(rows) < batch_size:
+            return
+        after = (rows[-1]["timestamp"], rows[-1]["id"])
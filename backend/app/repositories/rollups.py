@@ -0,0 +1,276 @@
+from __future__ import annotations
+
+from typing import Iterable
+
+import logging
+
+from app.db.database import read_connection, write_connection
+
+logger = logging.getLogger("reddit_trends.rollups")
+
+SPIKE_MIN = 1.0
+SPIKE_MIN_MENTIONS = 10
+
+
+def encode_bitmap(ids: Iterable[int]) -> bytes:
+    value = 0
+    for item in ids:
+        if item > 0:
+            value |= 1 << item
+    return value.to_bytes((value.bit_length() + 7) // 8, "little")
+
+
+def decode_bitmap(blob: bytes | None) -> int:
+    return int.from_bytes(blob, "little") if blob else 0
+
+
+def parse_ids(value: str | None) -> set[int]:
+    return {int(item) for item in value.split(",") if item} if value else set()
+
+
+def _refresh_global(cursor, hours: set[int]) -> None:
+    for hour in sorted(hours):
+        cursor.execute(
+            """
+            SELECT subreddit_id, post_count, sentiment_sum, sentiment_count
+            FROM hourly_subreddit_rollups
+            WHERE hour_bucket = ?
+            """,
+            (hour,),
+        )
+        rows = cursor.fetchall()
+        cursor.execute(
+            """
+            INSERT INTO hourly_rollups (
+                hour_bucket, post_count, sentiment_sum, sentiment_count, subreddit_bitmap
+            ) VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT(hour_bucket) DO UPDATE SET
+                post_count = excluded.post_count,
+                sentiment_sum = excluded.sentiment_sum,
+                sentiment_count = excluded.sentiment_count,
+                subreddit_bitmap = excluded.subreddit_bitmap
+            """,
+            (
+                hour,
+                sum(int(row["post_count"]) for row in rows),
+                sum(float(row["sentiment_sum"]) for row in rows),
+                sum(int(row["sentiment_count"]) for row in rows),
+                encode_bitmap(
+                    int(row["subreddit_id"]) for row in rows if row["post_count"]
+                ),
+            ),
+        )
+
+
+def refresh_post_rollups(cells: Iterable[tuple[int | None, int | None]]) -> int:
+    cells = {(hour, subreddit_id) for hour, subreddit_id in cells if hour is not None}
+    if not cells:
+        return 0
+    with write_connection() as connection:
+        cursor = connection.cursor()
+        for hour, subreddit_id in cells:
+            cursor.execute(
+                """
+                SELECT COUNT(*) AS count
+                FROM posts
+                WHERE hour_bucket = ? AND subreddit_id IS ?
+                """,
+                (hour, subreddit_id),
+            )
+            count = int(cursor.fetchone()["count"])
+            cursor.execute(
+                """
+                INSERT INTO hourly_subreddit_rollups (hour_bucket, subreddit_id, post_count)
+                VALUES (?, ?, ?)
+                ON CONFLICT(hour_bucket, subreddit_id)
+                DO UPDATE SET post_count = excluded.post_count
+                """,
+                (hour, subreddit_id or 0, count),
+            )
+        _refresh_global(cursor, {hour for hour, _ in cells})
+    return len(cells)
+
+
+def add_post_rollups(counts: dict[tuple[int, int | None], int]) -> int:
+    counts = {
+        (hour, subreddit_id): count
+        for (hour, subreddit_id), count in counts.items()
+        if hour is not None and count
+    }
+    if not counts:
+        return 0
+    hours: dict[int, list] = {}
+    for (hour, subreddit_id), count in counts.items():
+        totals = hours.setdefault(hour, [0, set()])
+        totals[0] += count
+        if subreddit_id and subreddit_id > 0:
+            totals[1].add(subreddit_id)
+    with write_connection() as connection:
+        cursor = connection.cursor()
+        cursor.executemany(
+            """
+            INSERT INTO hourly_subreddit_rollups (hour_bucket, subreddit_id, post_count)
+            VALUES (?, ?, ?)
+            ON CONFLICT(hour_bucket, subreddit_id)
+            DO UPDATE SET post_count = post_count + excluded.post_count
+            """,
+            [
+                (hour, subreddit_id or 0, count)
+                for (hour, subreddit_id), count in counts.items()
+            ],
+        )
+        for hour, (count, subreddit_ids) in sorted(hours.items()):
+            row = cursor.execute(
+                "SELECT subreddit_bitmap FROM hourly_rollups WHERE hour_bucket = ?", (hour,)
+            ).fetchone()
+            bitmap = decode_bitmap(row["subreddit_bitmap"] if row else None)
+            for subreddit_id in subreddit_ids:
+                bitmap |= 1 << subreddit_id
+            cursor.execute(
+                """
+                INSERT INTO hourly_rollups (hour_bucket, post_count, subreddit_bitmap)
+                VALUES (?, ?, ?)
+                ON CONFLICT(hour_bucket) DO UPDATE SET
+                    post_count = post_count + excluded.post_count,
+                    subreddit_bitmap = excluded.subreddit_bitmap
+                """,
+                (hour, count, bitmap.to_bytes((bitmap.bit_length() + 7) // 8, "little")),
+            )
+    return len(counts)
+
+
+def refresh_sentiment_rollups(cells: Iterable[tuple[int | None, int | None]]) -> int:
+    cells = {(hour, subreddit_id) for hour, subreddit_id in cells if hour is not None}
+    if not cells:
+        return 0
+    with write_connection() as connection:
+        cursor = connection.cursor()
+        for hour, subreddit_id in cells:
+            cursor.execute(
+                """
+                SELECT COALESCE(SUM(sentiment), 0) AS total, COUNT(sentiment) AS count
+                FROM sentiment_series
+                WHERE hour_bucket = ? AND subreddit_id IS ?
+                """,
+                (hour, subreddit_id),
+            )
+            row = cursor.fetchone()
+            cursor.execute(
+                """
+                INSERT INTO hourly_subreddit_rollups (
+                    hour_bucket, subreddit_id, sentiment_sum, sentiment_count
+                ) VALUES (?, ?, ?, ?)
+                ON CONFLICT(hour_bucket, subreddit_id) DO UPDATE SET
+                    sentiment_sum = excluded.sentiment_sum,
+                    sentiment_count = excluded.sentiment_count
+                """,
+                (hour, subreddit_id or 0, float(row["total"]), int(row["count"])),
+            )
+        _refresh_global(cursor, {hour for hour, _ in cells})
+    return len(cells)
+
+
+def refresh_spike_rollups(hours: Iterable[int | None]) -> int:
+    hours = {hour for hour in hours if hour is not None}
+    if not hours:
+        return 0
+    with write_connection() as connection:
+        cursor = connection.cursor()
+        for hour in hours:
+            cursor.execute(
+                """
+                SELECT DISTINCT keyword_id
+                FROM trend_snapshots
+                WHERE ts_epoch >= ? AND ts_epoch < ?
+                  AND spike >= ?
+                  AND raw_mentions >= ?
+                ORDER BY keyword_id
+                """,
+                (hour, hour + 3600, SPIKE_MIN, SPIKE_MIN_MENTIONS),
+            )
+            keyword_ids = [int(row["keyword_id"]) for row in cursor.fetchall()]
+            cursor.execute(
+                """
+                INSERT INTO hourly_rollups (hour_bucket, spike_count, spike_keywords)
+                VALUES (?, ?, ?)
+                ON CONFLICT(hour_bucket) DO UPDATE SET
+                    spike_count = excluded.spike_count,
+                    spike_keywords = excluded.spike_keywords
+                """,
+                (hour, len(keyword_ids), ",".join(map(str, keyword_ids))),
+            )
+    return len(hours)
+
+
+def rebuild_rollups() -> int:
+    with write_connection() as connection:
+        cursor = connection.cursor()
+        cursor.execute("DELETE FROM hourly_subreddit_rollups;")
+        cursor.execute("DELETE FROM hourly_rollups;")
+        cursor.execute(
+            """
+            SELECT DISTINCT hour_bucket, subreddit_id FROM posts
+            WHERE hour_bucket IS NOT NULL
+            """
+        )
+        post_cells = [(row["hour_bucket"], row["subreddit_id"]) for row in cursor.fetchall()]
+        cursor.execute(
+            """
+            SELECT DISTINCT hour_bucket, subreddit_id FROM sentiment_series
+            WHERE hour_bucket IS NOT NULL
+            """
+        )
+        sentiment_cells = [
+            (row["hour_bucket"], row["subreddit_id"]) for row in cursor.fetchall()
+        ]
+        cursor.execute(
+            """
+            SELECT DISTINCT ts_epoch - ts_epoch % 3600 AS hour_bucket
+            FROM trend_snapshots
+            WHERE ts_epoch IS NOT NULL
+            """
+        )
+        spike_hours = [row["hour_bucket"] for row in cursor.fetchall()]
+
+        refresh_post_rollups(post_cells)
+        refresh_sentiment_rollups(sentiment_cells)
+        refresh_spike_rollups(spike_hours)
+    logger.info(
+        "Rebuilt hourly rollups | post_cells=%s sentiment_cells=%s spike_hours=%s",
+        len(post_cells),
+        len(sentiment_cells),
+        len(spike_hours),
+    )
+    return len(post_cells) + len(sentiment_cells)
+
+
+def rebuild_rollups_if_empty() -> int:
+    with read_connection() as connection:
+        cursor = connection.cursor()
+        cursor.execute("SELECT EXISTS(SELECT 1 FROM hourly_rollups) AS present;")
+        if cursor.fetchone()["present"]:
+            return 0
+        cursor.execute("SELECT EXISTS(SELECT 1 FROM posts) AS present;")
+        if not cursor.fetchone()["present"]:
+            return 0
+    return rebuild_rollups()
+
+
+def fetch_hourly_rollups(start_bucket: int) -> list:
+    with read_connection() as connection:
+        cursor = connection.cursor()
+        cursor.execute(
+            """
+            SELECT hour_bucket,
+                   post_count,
+                   sentiment_sum,
+                   sentiment_count,
+                   subreddit_bitmap,
+                   spike_keywords
+            FROM hourly_rollups
+            WHERE hour_bucket >= ?
+            ORDER BY hour_bucket ASC
+            """,
+            (start_bucket,),
+        )
+        return cursor.fetchall()
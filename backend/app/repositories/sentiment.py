@@ -4,55 +4,63 @@ from typing import Iterable
 
 import logging
 
-from app.db.database import get_connection
+from app.core.timestamps import hour_bucket, to_epoch
+from app.db.database import write_connection
 from app.models.schemas import SentimentRecord
+from app.repositories.rollups import refresh_sentiment_rollups
 
 logger = logging.getLogger("reddit_trends.sentiment_store")
 
 
 def store_sentiment(records: Iterable[SentimentRecord]) -> int:
-    connection = get_connection()
-    cursor = connection.cursor()
-
-    payload = [
-        (
-            record.id,
-            record.timestamp,
-            record.context,
-            record.label,
-            record.sentiment,
-            record.subreddit_id,
-            record.event_id,
-        )
-        for record in records
-    ]
-
-    cursor.executemany(
-        """
-        INSERT OR REPLACE INTO sentiment_series (
-            id,
-            timestamp,
-            context,
-            sentiment,
-            subreddit_id,
-            event_id
-        ) VALUES (?, ?, ?, ?, ?, ?)
-        """,
-        [
+    with write_connection() as connection:
+        cursor = connection.cursor()
+
+        payload = [
             (
                 record.id,
                 record.timestamp,
                 record.context,
+                record.label,
                 record.sentiment,
                 record.subreddit_id,
                 record.event_id,
             )
             for record in records
-        ],
-    )
+        ]
+
+        cursor.executemany(
+            """
+            INSERT OR REPLACE INTO sentiment_series (
+                id,
+                timestamp,
+                context,
+                sentiment,
+                subreddit_id,
+                event_id,
+                ts_epoch,
+                hour_bucket
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            """,
+            [
+                (
+                    record.id,
+                    record.timestamp,
+                    record.context,
+                    record.sentiment,
+                    record.subreddit_id,
+                    record.event_id,
+                    to_epoch(record.timestamp),
+                    hour_bucket(to_epoch(record.timestamp)),
+                )
+                for record in records
+            ],
+        )
 
-    connection.commit()
-    inserted = cursor.rowcount
-    connection.close()
+        inserted = cursor.rowcount
+        refresh_sentiment_rollups(
+            (hour_bucket(to_epoch(record.timestamp)), record.subreddit_id)
+            for record in records
+        )
     logger.info("Stored sentiment | records=%s", len(payload))
     return inserted
@@ -0,0 +1,51 @@
+from __future__ import annotations
+
+from typing import Iterable
+
+from app.db.database import read_connection, write_connection
+
+
+def fetch_cached_scores(text_hashes: Iterable[str]) -> dict[str, dict[str, float]]:
+    hashes = list(dict.fromkeys(text_hashes))
+    cached: dict[str, dict[str, float]] = {}
+    if not hashes:
+        return cached
+    with read_connection() as connection:
+        cursor = connection.cursor()
+        for start in range(0, len(hashes), 500):
+            batch = hashes[start : start + 500]
+            placeholders = ",".join(["?"] * len(batch))
+            cursor.execute(
+                f"""
+                SELECT text_hash, compound, pos, neg, neu
+                FROM sentiment_cache
+                WHERE text_hash IN ({placeholders})
+                """,
+                tuple(batch),
+            )
+            for row in cursor.fetchall():
+                cached[row["text_hash"]] = {
+                    "compound": float(row["compound"]),
+                    "pos": float(row["pos"]),
+                    "neg": float(row["neg"]),
+                    "neu": float(row["neu"]),
+                }
+    return cached
+
+
+def store_cached_scores(items: Iterable[tuple[str, dict[str, float]]]) -> int:
+    payload = [
+        (text_hash, scores["compound"], scores["pos"], scores["neg"], scores["neu"])
+        for text_hash, scores in items
+    ]
+    if not payload:
+        return 0
+    with write_connection(data_change=False) as connection:
+        connection.executemany(
+            """
+            INSERT OR IGNORE INTO sentiment_cache (text_hash, compound, pos, neg, neu)
+            VALUES (?, ?, ?, ?, ?)
+            """,
+            payload,
+        )
+    return len(payload)
@@ -3,60 +3,54 @@ from __future__ import annotations
 from datetime import datetime, timedelta, timezone
 import math
 
-from app.db.database import get_connection
-from app.services.sentiment import score_text
+from app.core.timestamps import epoch_hours_ago, format_hour_bucket
+from app.db.database import read_connection
+from app.services.sentiment import score_texts
 
 
-def _since(hours: int) -> str:
-    return (datetime.now(tz=timezone.utc) - timedelta(hours=hours)).isoformat()
+def fetch_subreddit_kpis(subreddit: str, hours: int = 24) -> list[dict]:
+    with read_connection() as connection:
+        cursor = connection.cursor()
+        since = epoch_hours_ago(hours)
 
+        cursor.execute(
+            """
+            SELECT r.id
+            FROM subreddits r
+            WHERE r.name = ?
+            """,
+            (subreddit,),
+        )
+        row = cursor.fetchone()
+        subreddit_id = row["id"] if row else None
 
-def fetch_subreddit_kpis(subreddit: str, hours: int = 24) -> list[dict]:
-    connection = get_connection()
-    cursor = connection.cursor()
-    since = _since(hours)
-
-    cursor.execute(
-        """
-        SELECT r.id
-        FROM subreddits r
-        WHERE r.name = ?
-        """,
-        (subreddit,),
-    )
-    row = cursor.fetchone()
-    subreddit_id = row["id"] if row else None
-
-    if subreddit_id is None:
-        connection.close()
-        return [
-            {"label": "Posts", "value": "0", "delta": "Stable"},
-            {"label": "Comments", "value": "0", "delta": "Stable"},
-            {"label": "Sentiment", "value": "+0.00", "delta": "Stable"},
-        ]
-
-    cursor.execute(
-        """
-        SELECT COUNT(*) AS count
-        FROM posts
-        WHERE subreddit_id = ? AND timestamp >= ?
-        """,
-        (subreddit_id, since),
-    )
-    posts = int(cursor.fetchone()["count"])
-
-    cursor.execute(
-        """
-        SELECT AVG(sentiment) AS avg_sentiment
-        FROM sentiment_series
-        WHERE subreddit_id = ? AND timestamp >= ?
-        """,
-        (subreddit_id, since),
-    )
-    avg_sentiment = cursor.fetchone()["avg_sentiment"]
-    avg_sentiment = float(avg_sentiment) if avg_sentiment is not None else 0.0
-
-    connection.close()
+        if subreddit_id is None:
+            return [
+                {"label": "Posts", "value": "0", "delta": "Stable"},
+                {"label": "Comments", "value": "0", "delta": "Stable"},
+                {"label": "Sentiment", "value": "+0.00", "delta": "Stable"},
+            ]
+
+        cursor.execute(
+            """
+            SELECT COUNT(*) AS count
+            FROM posts
+            WHERE subreddit_id = ? AND ts_epoch >= ?
+            """,
+            (subreddit_id, since),
+        )
+        posts = int(cursor.fetchone()["count"])
+
+        cursor.execute(
+            """
+            SELECT AVG(sentiment) AS avg_sentiment
+            FROM sentiment_series
+            WHERE subreddit_id = ? AND ts_epoch >= ?
+            """,
+            (subreddit_id, since),
+        )
+        avg_sentiment = cursor.fetchone()["avg_sentiment"]
+        avg_sentiment = float(avg_sentiment) if avg_sentiment is not None else 0.0
 
     return [
         {"label": "Posts", "value": f"{posts}", "delta": "Stable"},
@@ -66,21 +60,20 @@ def fetch_subreddit_kpis(subreddit: str, hours: int = 24) -> list[dict]:
 
 
 def fetch_subreddit_sentiment(subreddit: str, hours: int = 24) -> list[dict]:
-    connection = get_connection()
-    cursor = connection.cursor()
-    since = _since(hours)
-    cursor.execute(
-        """
-        SELECT s.timestamp, s.sentiment
-        FROM sentiment_series s
-        JOIN subreddits r ON r.id = s.subreddit_id
-        WHERE r.name = ? AND s.timestamp >= ?
-        ORDER BY s.timestamp ASC
-        """,
-        (subreddit, since),
-    )
-    rows = cursor.fetchall()
-    connection.close()
+    with read_connection() as connection:
+        cursor = connection.cursor()
+        since = epoch_hours_ago(hours)
+        cursor.execute(
+            """
+            SELECT s.timestamp, s.sentiment
+            FROM sentiment_series s
+            JOIN subreddits r ON r.id = s.subreddit_id
+            WHERE r.name = ? AND s.ts_epoch >= ?
+            ORDER BY s.timestamp ASC
+            """,
+            (subreddit, since),
+        )
+        rows = cursor.fetchall()
     return [
         {"time": row["timestamp"][11:16], "value": float(row["sentiment"])}
         for row in rows
@@ -88,25 +81,24 @@ def fetch_subreddit_sentiment(subreddit: str, hours: int = 24) -> list[dict]:
 
 
 def fetch_subreddit_topics(subreddit: str, hours: int = 24) -> list[dict]:
-    connection = get_connection()
-    cursor = connection.cursor()
-    since = _since(hours)
-    cursor.execute(
-        """
-        SELECT k.phrase AS keyword, SUM(pk.count) AS mentions
-        FROM post_keywords pk
-        JOIN keywords k ON k.id = pk.keyword_id
-        JOIN posts p ON p.id = pk.post_id
-        JOIN subreddits r ON r.id = p.subreddit_id
-        WHERE r.name = ? AND p.timestamp >= ?
-        GROUP BY k.phrase
-        ORDER BY mentions DESC
-        LIMIT 5
-        """,
-        (subreddit, since),
-    )
-    rows = cursor.fetchall()
-    connection.close()
+    with read_connection() as connection:
+        cursor = connection.cursor()
+        since = epoch_hours_ago(hours)
+        cursor.execute(
+            """
+            SELECT k.phrase AS keyword, SUM(pk.count) AS mentions
+            FROM post_keywords pk
+            JOIN keywords k ON k.id = pk.keyword_id
+            JOIN posts p ON p.id = pk.post_id
+            JOIN subreddits r ON r.id = p.subreddit_id
+            WHERE r.name = ? AND p.ts_epoch >= ?
+            GROUP BY k.phrase
+            ORDER BY mentions DESC
+            LIMIT 5
+            """,
+            (subreddit, since),
+        )
+        rows = cursor.fetchall()
     return [
         {
             "keyword": row["keyword"],
@@ -120,53 +112,66 @@ def fetch_subreddit_topics(subreddit: str, hours: int = 24) -> list[dict]:
 
 
 def fetch_event_volume(event_keyword: str, hours: int = 24) -> list[dict]:
-    connection = get_connection()
-    cursor = connection.cursor()
-    since = _since(hours)
-    event_name = event_keyword.lower()
-    cursor.execute(
-        """
-        SELECT substr(p.timestamp, 1, 13) AS hour_bucket, COUNT(DISTINCT p.id) AS count
-        FROM events e
-        JOIN event_keywords ek ON ek.event_id = e.id
-        JOIN post_keywords pk ON pk.keyword_id = ek.keyword_id
-        JOIN posts p ON p.id = pk.post_id
-        WHERE e.name = ? AND p.timestamp >= ?
-        GROUP BY hour_bucket
-        ORDER BY hour_bucket ASC
-        """,
-        (event_name, since),
-    )
-    rows = cursor.fetchall()
-    connection.close()
-    return [{"time": row["hour_bucket"], "value": int(row["count"])} for row in rows]
+    with read_connection() as connection:
+        cursor = connection.cursor()
+        since = epoch_hours_ago(hours)
+        event_name = event_keyword.lower()
+        cursor.execute(
+            """
+            SELECT p.hour_bucket, COUNT(DISTINCT p.id) AS count
+            FROM events e
+            JOIN event_keywords ek ON ek.event_id = e.id
+            JOIN post_keywords pk ON pk.keyword_id = ek.keyword_id
+            JOIN posts p ON p.id = pk.post_id
+            WHERE e.name = ? AND p.ts_epoch >= ?
+            GROUP BY p.hour_bucket
+            ORDER BY p.hour_bucket ASC
+            """,
+            (event_name, since),
+        )
+        rows = cursor.fetchall()
+    return [
+        {"time": format_hour_bucket(row["hour_bucket"]), "value": int(row["count"])}
+        for row in rows
+    ]
 
 
 def fetch_event_sentiment(event_keyword: str, hours: int = 24) -> list[dict]:
-    connection = get_connection()
-    cursor = connection.cursor()
-    since = _since(hours)
-    event_name = event_keyword.lower()
-    cursor.execute(
-        """
-        SELECT DISTINCT p.id, p.timestamp, p.title, p.body, p.sentiment_compound
-        FROM events e
-        JOIN event_keywords ek ON ek.event_id = e.id
-        JOIN post_keywords pk ON pk.keyword_id = ek.keyword_id
-        JOIN posts p ON p.id = pk.post_id
-        WHERE e.name = ? AND p.timestamp >= ?
-        ORDER BY p.timestamp ASC
-        """,
-        (event_name, since),
-    )
-    rows = cursor.fetchall()
-    connection.close()
+    with read_connection() as connection:
+        cursor = connection.cursor()
+        since = epoch_hours_ago(hours)
+        event_name = event_keyword.lower()
+        cursor.execute(
+            """
+            SELECT DISTINCT p.id, p.timestamp, p.title, p.body, p.sentiment_compound
+            FROM events e
+            JOIN event_keywords ek ON ek.event_id = e.id
+            JOIN post_keywords pk ON pk.keyword_id = ek.keyword_id
+            JOIN posts p ON p.id = pk.post_id
+            WHERE e.name = ? AND p.ts_epoch >= ?
+            ORDER BY p.timestamp ASC
+            """,
+            (event_name, since),
+        )
+        rows = cursor.fetchall()
+
+    unscored = [row for row in rows if row["sentiment_compound"] is None]
+    computed = {
+        row["id"]: scores["compound"]
+        for row, scores in zip(
+            unscored,
+            score_texts(
+                [f"{row['title'] or ''} {row['body'] or ''}" for row in unscored],
+                persist=False,
+            ),
+        )
+    }
 
     buckets: dict[str, list[float]] = {}
     for row in rows:
         bucket = row["timestamp"][11:16]
         if row["sentiment_compound"] is None:
-            score = score_text(f"{row['title'] or ''} {row['body'] or ''}")
+            score = computed[row["id"]]
         else:
             score = float(row["sentiment_compound"])
         buckets.setdefault(bucket, []).append(score)
@@ -178,31 +183,30 @@ def fetch_event_sentiment(event_keyword: str, hours: int = 24) -> list[dict]:
 
 
 def fetch_event_topics(event_keyword: str, hours: int = 24) -> list[dict]:
-    connection = get_connection()
-    cursor = connection.cursor()
-    since = _since(hours)
-    event_name = event_keyword.lower()
-    cursor.execute(
-        """
-        SELECT k2.phrase AS keyword, SUM(pk2.count) AS mentions
-        FROM (
-            SELECT DISTINCT p.id
-            FROM events e
-            JOIN event_keywords ek ON ek.event_id = e.id
-            JOIN post_keywords pk ON pk.keyword_id = ek.keyword_id
-            JOIN posts p ON p.id = pk.post_id
-            WHERE e.name = ? AND p.timestamp >= ?
-        ) ep
-        JOIN post_keywords pk2 ON pk2.post_id = ep.id
-        JOIN keywords k2 ON k2.id = pk2.keyword_id
-        GROUP BY k2.phrase
-        ORDER BY mentions DESC
-        LIMIT 5
-        """,
-        (event_name, since),
-    )
-    rows = cursor.fetchall()
-    connection.close()
+    with read_connection() as connection:
+        cursor = connection.cursor()
+        since = epoch_hours_ago(hours)
+        event_name = event_keyword.lower()
+        cursor.execute(
+            """
+            SELECT k2.phrase AS keyword, SUM(pk2.count) AS mentions
+            FROM (
+                SELECT DISTINCT p.id
+                FROM events e
+                JOIN event_keywords ek ON ek.event_id = e.id
+                JOIN post_keywords pk ON pk.keyword_id = ek.keyword_id
+                JOIN posts p ON p.id = pk.post_id
+                WHERE e.name = ? AND p.ts_epoch >= ?
+            ) ep
+            JOIN post_keywords pk2 ON pk2.post_id = ep.id
+            JOIN keywords k2 ON k2.id = pk2.keyword_id
+            GROUP BY k2.phrase
+            ORDER BY mentions DESC
+            LIMIT 5
+            """,
+            (event_name, since),
+        )
+        rows = cursor.fetchall()
     return [
         {
             "keyword": row["keyword"],
@@ -216,25 +220,24 @@ def fetch_event_topics(event_keyword: str, hours: int = 24) -> list[dict]:
 
 
 def fetch_event_top_posts(event_keyword: str, hours: int = 24, limit: int = 5) -> list[dict]:
-    connection = get_connection()
-    cursor = connection.cursor()
-    since = _since(hours)
-    event_name = event_keyword.lower()
-    cursor.execute(
-        """
-        SELECT p.id, p.timestamp, p.title, p.score, p.comment_count, r.name AS subreddit
-        FROM events e
-        JOIN event_keywords ek ON ek.event_id = e.id
-        JOIN post_keywords pk ON pk.keyword_id = ek.keyword_id
-        JOIN posts p ON p.id = pk.post_id
-        JOIN subreddits r ON r.id = p.subreddit_id
-        WHERE e.name = ? AND p.timestamp >= ?
-        GROUP BY p.id
-        """,
-        (event_name, since),
-    )
-    rows = cursor.fetchall()
-    connection.close()
+    with read_connection() as connection:
+        cursor = connection.cursor()
+        since = epoch_hours_ago(hours)
+        event_name = event_keyword.lower()
+        cursor.execute(
+            """
+            SELECT p.id, p.timestamp, p.title, p.score, p.comment_count, r.name AS subreddit
+            FROM events e
+            JOIN event_keywords ek ON ek.event_id = e.id
+            JOIN post_keywords pk ON pk.keyword_id = ek.keyword_id
+            JOIN posts p ON p.id = pk.post_id
+            JOIN subreddits r ON r.id = p.subreddit_id
+            WHERE e.name = ? AND p.ts_epoch >= ?
+            GROUP BY p.id
+            """,
+            (event_name, since),
+        )
+        rows = cursor.fetchall()
 
     scored = []
     for row in rows:
@@ -258,26 +261,25 @@ def fetch_event_top_posts(event_keyword: str, hours: int = 24, limit: int = 5) -
 
 
 def fetch_event_leading_subreddits(event_keyword: str, hours: int = 24, limit: int = 5) -> list[dict]:
-    connection = get_connection()
-    cursor = connection.cursor()
-    since = _since(hours)
-    event_name = event_keyword.lower()
-    cursor.execute(
-        """
-        SELECT r.name AS subreddit,
-               p.score,
-               p.comment_count
-        FROM events e
-        JOIN event_keywords ek ON ek.event_id = e.id
-        JOIN post_keywords pk ON pk.keyword_id = ek.keyword_id
-        JOIN posts p ON p.id = pk.post_id
-        JOIN subreddits r ON r.id = p.subreddit_id
-        WHERE e.name = ? AND p.timestamp >= ?
-        """,
-        (event_name, since),
-    )
-    rows = cursor.fetchall()
-    connection.close()
+    with read_connection() as connection:
+        cursor = connection.cursor()
+        since = epoch_hours_ago(hours)
+        event_name = event_keyword.lower()
+        cursor.execute(
+            """
+            SELECT r.name AS subreddit,
+                   p.score,
+                   p.comment_count
+            FROM events e
+            JOIN event_keywords ek ON ek.event_id = e.id
+            JOIN post_keywords pk ON pk.keyword_id = ek.keyword_id
+            JOIN posts p ON p.id = pk.post_id
+            JOIN subreddits r ON r.id = p.subreddit_id
+            WHERE e.name = ? AND p.ts_epoch >= ?
+            """,
+            (event_name, since),
+        )
+        rows = cursor.fetchall()
 
     totals: dict[str, dict] = {}
     for row in rows:
@@ -309,54 +311,52 @@ def fetch_event_lifecycle(event_keyword: str) -> dict:
     start = end - timedelta(hours=1)
     prev_start = start - timedelta(hours=1)
 
-    def _weighted_mentions(start_ts: str, end_ts: str) -> float:
-        connection = get_connection()
+    def _weighted_mentions(start_ts: int, end_ts: int) -> float:
+        with read_connection() as connection:
+            cursor = connection.cursor()
+            event_name = event_keyword.lower()
+            cursor.execute(
+                """
+                SELECT p.score, p.comment_count
+                FROM events e
+                JOIN event_keywords ek ON ek.event_id = e.id
+                JOIN post_keywords pk ON pk.keyword_id = ek.keyword_id
+                JOIN posts p ON p.id = pk.post_id
+                WHERE e.name = ? AND p.ts_epoch >= ? AND p.ts_epoch < ?
+                """,
+                (event_name, start_ts, end_ts),
+            )
+            rows = cursor.fetchall()
+        total = 0.0
+        for row in rows:
+            score = int(row["score"] or 0)
+            comments = int(row["comment_count"] or 0)
+            total += math.log(1 + score + comments)
+        return total
+
+    current_weighted = _weighted_mentions(int(start.timestamp()), int(end.timestamp()))
+    prev_weighted = _weighted_mentions(int(prev_start.timestamp()), int(start.timestamp()))
+    weighted_velocity = (current_weighted - prev_weighted) / max(prev_weighted, 1.0)
+
+    with read_connection() as connection:
         cursor = connection.cursor()
         event_name = event_keyword.lower()
         cursor.execute(
             """
-            SELECT p.score, p.comment_count
+            SELECT p.hour_bucket,
+                   p.score,
+                   p.comment_count
             FROM events e
             JOIN event_keywords ek ON ek.event_id = e.id
             JOIN post_keywords pk ON pk.keyword_id = ek.keyword_id
             JOIN posts p ON p.id = pk.post_id
-            WHERE e.name = ? AND p.timestamp >= ? AND p.timestamp < ?
+            WHERE e.name = ?
             """,
-            (event_name, start_ts, end_ts),
+            (event_name,),
         )
         rows = cursor.fetchall()
-        connection.close()
-        total = 0.0
-        for row in rows:
-            score = int(row["score"] or 0)
-            comments = int(row["comment_count"] or 0)
-            total += math.log(1 + score + comments)
-        return total
-
-    current_weighted = _weighted_mentions(start.isoformat(), end.isoformat())
-    prev_weighted = _weighted_mentions(prev_start.isoformat(), start.isoformat())
-    weighted_velocity = (current_weighted - prev_weighted) / max(prev_weighted, 1.0)
 
-    connection = get_connection()
-    cursor = connection.cursor()
-    event_name = event_keyword.lower()
-    cursor.execute(
-        """
-        SELECT substr(p.timestamp, 1, 13) AS hour_bucket,
-               p.score,
-               p.comment_count
-        FROM events e
-        JOIN event_keywords ek ON ek.event_id = e.id
-        JOIN post_keywords pk ON pk.keyword_id = ek.keyword_id
-        JOIN posts p ON p.id = pk.post_id
-        WHERE e.name = ?
-        """,
-        (event_name,),
-    )
-    rows = cursor.fetchall()
-    connection.close()
-
-    hourly: dict[str, float] = {}
+    hourly: dict[int, float] = {}
     for row in rows:
         bucket = row["hour_bucket"]
         score = int(row["score"] or 0)
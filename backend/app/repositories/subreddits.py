@@ -1,14 +1,15 @@
 from __future__ import annotations
 
-from app.db.database import get_connection
+from typing import Iterable
+
+from app.repositories.interning import IdInterner
+
+subreddit_ids = IdInterner("subreddits", "name")
+
+
+def resolve_subreddit_ids(names: Iterable[str]) -> dict[str, int]:
+    return subreddit_ids.resolve(names)
 
 
 def get_or_create_subreddit_id(name: str) -> int:
-    connection = get_connection()
-    cursor = connection.cursor()
-    cursor.execute("INSERT OR IGNORE INTO subreddits (name) VALUES (?);", (name,))
-    cursor.execute("SELECT id FROM subreddits WHERE name = ?;", (name,))
-    row = cursor.fetchone()
-    connection.commit()
-    connection.close()
-    return int(row["id"]) if row else 0
+    return resolve_subreddit_ids([name]).get(name, 0)
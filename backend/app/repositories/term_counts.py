@@ -0,0 +1,143 @@
+from __future__ import annotations
+
+from typing import Iterable
+
+import logging
+
+from app.db.database import read_connection, write_connection
+
+logger = logging.getLogger("reddit_trends.term_counts")
+
+_MARK_INDEXED = {
+    "posts": "UPDATE posts SET terms_indexed = 1 WHERE id = ?;",
+    "comments": "UPDATE comments SET terms_indexed = 1 WHERE id = ?;",
+}
+
+
+def fetch_unindexed_posts(limit: int = 1000) -> list:
+    with read_connection() as connection:
+        cursor = connection.cursor()
+        cursor.execute(
+            """
+            SELECT id, timestamp, title, body, score, comment_count
+            FROM posts
+            WHERE terms_indexed IS NULL
+            ORDER BY timestamp ASC
+            LIMIT ?
+            """,
+            (limit,),
+        )
+        rows = cursor.fetchall()
+    return rows
+
+
+def fetch_unindexed_comments(limit: int = 1000) -> list:
+    with read_connection() as connection:
+        cursor = connection.cursor()
+        cursor.execute(
+            """
+            SELECT id, timestamp, body, score
+            FROM comments
+            WHERE terms_indexed IS NULL
+            ORDER BY timestamp ASC
+            LIMIT ?
+            """,
+            (limit,),
+        )
+        rows = cursor.fetchall()
+    return rows
+
+
+def store_term_hour_counts(
+    rows: Iterable[tuple[int, str, int, float, int, str]],
+    post_ids: Iterable[str],
+    source: str = "posts",
+) -> int:
+    payload = list(rows)
+    with write_connection() as connection:
+        cursor = connection.cursor()
+        cursor.executemany(
+            """
+            INSERT INTO term_hour_counts (
+                hour_bucket,
+                term,
+                raw_count,
+                weighted_count,
+                unique_posts,
+                first_seen
+            ) VALUES (?, ?, ?, ?, ?, ?)
+            ON CONFLICT(hour_bucket, term)
+            DO UPDATE SET
+                raw_count = raw_count + excluded.raw_count,
+                weighted_count = weighted_count + excluded.weighted_count,
+                unique_posts = unique_posts + excluded.unique_posts,
+                first_seen = MIN(first_seen, excluded.first_seen)
+            """,
+            payload,
+        )
+        cursor.executemany(
+            _MARK_INDEXED[source],
+            [(post_id,) for post_id in post_ids],
+        )
+    logger.info("Stored term hour counts | rows=%s", len(payload))
+    return len(payload)
+
+
+def fetch_window_term_stats(
+    start: int,
+    end: int,
+    prev_start: int,
+    prev_end: int,
+    min_mentions: int,
+) -> list:
+    with read_connection() as connection:
+        cursor = connection.cursor()
+        cursor.execute(
+            """
+            WITH current AS (
+                SELECT term,
+                       SUM(raw_count) AS raw_mentions,
+                       SUM(weighted_count) AS weighted_mentions,
+                       SUM(unique_posts) AS unique_posts,
+                       MIN(first_seen) AS first_seen
+                FROM term_hour_counts
+                WHERE hour_bucket >= ? AND hour_bucket < ?
+                GROUP BY term
+                HAVING SUM(raw_count) >= ?
+            ),
+            previous AS (
+                SELECT term, SUM(raw_count) AS raw_mentions
+                FROM term_hour_counts
+                WHERE hour_bucket >= ? AND hour_bucket < ?
+                GROUP BY term
+            )
+            SELECT c.term,
+                   c.raw_mentions,
+                   c.weighted_mentions,
+                   c.unique_posts,
+                   c.first_seen,
+                   COALESCE(p.raw_mentions, 0) AS previous_mentions
+            FROM current c
+            LEFT JOIN previous p ON p.term = c.term
+            """,
+            (start, end, min_mentions, prev_start, prev_end),
+        )
+        rows = cursor.fetchall()
+    return rows
+
+
+def adjust_term_weights(deltas: Iterable[tuple[int, str, float]]) -> int:
+    payload = [(delta, bucket, term) for bucket, term, delta in deltas if delta]
+    if not payload:
+        return 0
+    with write_connection() as connection:
+        connection.executemany(
+            """
+            UPDATE term_hour_counts
+            SET weighted_count = weighted_count + ?
+            WHERE hour_bucket = ? AND term = ?
+            """,
+            payload,
+        )
+    logger.info("Adjusted term weights | rows=%s", len(payload))
+    return len(payload)
@@ -4,73 +4,27 @@ from typing import Iterable, Optional
 
 import logging
 
-from app.db.database import get_connection
+from app.core.timestamps import hour_bucket, to_epoch
+from app.db.database import read_connection, write_connection
 from app.models.schemas import TrendSnapshotRecord
+from app.repositories.rollups import refresh_spike_rollups
 
 logger = logging.getLogger("reddit_trends.trends_store")
 
 
 def store_trends(records: Iterable[TrendSnapshotRecord]) -> int:
-    connection = get_connection()
-    cursor = connection.cursor()
+    with write_connection() as connection:
+        cursor = connection.cursor()
 
-    payload = [
-        (
-            record.id,
-            record.timestamp,
-            record.keyword,
-            record.velocity,
-            record.spike,
-            record.context,
-            record.keyword_id,
-            record.subreddit_id,
-            record.event_id,
-            record.raw_mentions,
-            record.weighted_mentions,
-            record.previous_mentions,
-            record.window_start,
-            record.window_end,
-        )
-        for record in records
-    ]
-
-    cursor.executemany(
-        """
-        INSERT INTO trend_snapshots (
-            id,
-            timestamp,
-            keyword_id,
-            velocity,
-            spike,
-            context,
-            subreddit_id,
-            event_id,
-            raw_mentions,
-            weighted_mentions,
-            previous_mentions,
-            window_start,
-            window_end
-        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        ON CONFLICT(keyword_id, window_start, window_end)
-        DO UPDATE SET
-            timestamp = excluded.timestamp,
-            velocity = excluded.velocity,
-            spike = excluded.spike,
-            context = excluded.context,
-            subreddit_id = excluded.subreddit_id,
-            event_id = excluded.event_id,
-            raw_mentions = excluded.raw_mentions,
-            weighted_mentions = excluded.weighted_mentions,
-            previous_mentions = excluded.previous_mentions
-        """,
-        [
+        payload = [
             (
                 record.id,
                 record.timestamp,
-                record.keyword_id,
+                record.keyword,
                 record.velocity,
                 record.spike,
                 record.context,
+                record.keyword_id,
                 record.subreddit_id,
                 record.event_id,
                 record.raw_mentions,
@@ -80,34 +34,87 @@ def store_trends(records: Iterable[TrendSnapshotRecord]) -> int:
                 record.window_end,
             )
             for record in records
-        ],
-    )
+        ]
 
-    connection.commit()
-    inserted = cursor.rowcount
-    connection.close()
+        cursor.executemany(
+            """
+            INSERT INTO trend_snapshots (
+                id,
+                timestamp,
+                keyword_id,
+                velocity,
+                spike,
+                context,
+                subreddit_id,
+                event_id,
+                raw_mentions,
+                weighted_mentions,
+                previous_mentions,
+                window_start,
+                window_end,
+                ts_epoch,
+                window_start_epoch,
+                window_end_epoch
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(keyword_id, window_start, window_end)
+            DO UPDATE SET
+                timestamp = excluded.timestamp,
+                ts_epoch = excluded.ts_epoch,
+                velocity = excluded.velocity,
+                spike = excluded.spike,
+                context = excluded.context,
+                subreddit_id = excluded.subreddit_id,
+                event_id = excluded.event_id,
+                raw_mentions = excluded.raw_mentions,
+                weighted_mentions = excluded.weighted_mentions,
+                previous_mentions = excluded.previous_mentions
+            """,
+            [
+                (
+                    record.id,
+                    record.timestamp,
+                    record.keyword_id,
+                    record.velocity,
+                    record.spike,
+                    record.context,
+                    record.subreddit_id,
+                    record.event_id,
+                    record.raw_mentions,
+                    record.weighted_mentions,
+                    record.previous_mentions,
+                    record.window_start,
+                    record.window_end,
+                    to_epoch(record.timestamp),
+                    to_epoch(record.window_start),
+                    to_epoch(record.window_end),
+                )
+                for record in records
+            ],
+        )
+
+        inserted = cursor.rowcount
+        refresh_spike_rollups(hour_bucket(to_epoch(record.timestamp)) for record in records)
     logger.info("Stored trends | records=%s", len(payload))
     return inserted
 
 
 def get_latest_keyword_snapshot(keyword: str) -> Optional[TrendSnapshotRecord]:
-    connection = get_connection()
-    cursor = connection.cursor()
-    cursor.execute(
-        """
-         SELECT ts.id, ts.timestamp, k.phrase AS keyword, ts.velocity, ts.spike, ts.context,
-             ts.keyword_id, ts.subreddit_id, ts.event_id, ts.raw_mentions,
-             ts.weighted_mentions, ts.previous_mentions, ts.window_start, ts.window_end
-        FROM trend_snapshots ts
-        JOIN keywords k ON k.id = ts.keyword_id
-        WHERE k.phrase = ?
-        ORDER BY ts.timestamp DESC
-        LIMIT 1
-        """,
-        (keyword,),
-    )
-    row = cursor.fetchone()
-    connection.close()
+    with read_connection() as connection:
+        cursor = connection.cursor()
+        cursor.execute(
+            """
+             SELECT ts.id, ts.timestamp, k.phrase AS keyword, ts.velocity, ts.spike, ts.context,
+                 ts.keyword_id, ts.subreddit_id, ts.event_id, ts.raw_mentions,
+                 ts.weighted_mentions, ts.previous_mentions, ts.window_start, ts.window_end
+            FROM trend_snapshots ts
+            JOIN keywords k ON k.id = ts.keyword_id
+            WHERE k.phrase = ?
+            ORDER BY ts.timestamp DESC
+            LIMIT 1
+            """,
+            (keyword,),
+        )
+        row = cursor.fetchone()
     if not row:
         return None
     return TrendSnapshotRecord(
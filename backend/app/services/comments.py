@@ -0,0 +1,173 @@
+from __future__ import annotations
+
+from collections import deque
+from datetime import datetime, timedelta, timezone
+from typing import Any, Iterable
+
+import asyncio
+import logging
+import time
+
+from app.clients.reddit import RedditClient, fetch_concurrency
+from app.core.config import settings
+from app.core.executors import run_db
+from app.models.schemas import CommentIn, PostIn
+from app.repositories.comments import (
+    fetch_comment_crawl_candidates,
+    fetch_existing_comment_ids,
+    store_comments,
+)
+from app.services.sentiment import score_texts
+from app.services.trends import index_comment_terms
+
+logger = logging.getLogger("reddit_trends.comments")
+
+
+def _budget_left(client: RedditClient, deadline: float) -> bool:
+    if time.monotonic() >= deadline:
+        return False
+    remaining = client.rate_limit_remaining()
+    return remaining is None or remaining >= settings.comment_min_ratelimit_remaining
+
+
+async def _fetch_post_comments(
+    client: RedditClient,
+    queue: deque[dict[str, Any]],
+    deadline: float,
+    results: list[tuple[dict[str, Any], list[dict[str, Any]]]],
+) -> None:
+    while queue and _budget_left(client, deadline):
+        row = queue.popleft()
+        try:
+            items = await client.fetch_top_comments(
+                row["id"], limit=settings.comment_limit_per_post
+            )
+        except Exception:
+            logger.exception("Comment fetch failed | post=%s", row["id"])
+            continue
+        results.append((row, items))
+
+
+def _merge_candidates(
+    stored: list,
+    fresh_posts: Iterable[PostIn],
+    engagement: dict[str, tuple[int, int]],
+) -> list[dict[str, Any]]:
+    since = (
+        datetime.now(tz=timezone.utc) - timedelta(hours=settings.comment_max_age_hours)
+    ).isoformat()
+    candidates = {row["id"]: dict(row) for row in stored}
+    for post in fresh_posts:
+        if post.id not in candidates and post.timestamp >= since:
+            candidates[post.id] = {
+                "id": post.id,
+                "comment_count": post.comment_count,
+                "comments_crawled_count": None,
+                "subreddit": post.subreddit,
+            }
+    for post_id, candidate in candidates.items():
+        if post_id in engagement:
+            candidate["comment_count"] = engagement[post_id][1]
+    eligible = [
+        candidate
+        for candidate in candidates.values()
+        if int(candidate["comment_count"] or 0) >= settings.comment_min_comments
+        and (
+            candidate["comments_crawled_count"] is None
+            or int(candidate["comment_count"] or 0) >= candidate["comments_crawled_count"] * 2
+        )
+    ]
+    eligible.sort(
+        key=lambda candidate: (
+            candidate["comments_crawled_count"] is not None,
+            -int(candidate["comment_count"] or 0),
+        )
+    )
+    return eligible[: settings.comment_posts_per_cycle]
+
+
+async def crawl_comments(
+    client: RedditClient,
+    fresh_posts: Iterable[PostIn] = (),
+    engagement: dict[str, tuple[int, int]] | None = None,
+) -> tuple[list[CommentIn], list[tuple[str, int]]]:
+    if not settings.comment_crawl_enabled or settings.comment_posts_per_cycle <= 0:
+        return [], []
+
+    stored = await run_db(
+        fetch_comment_crawl_candidates,
+        settings.comment_min_comments,
+        settings.comment_max_age_hours,
+        settings.comment_posts_per_cycle,
+    )
+    candidates = _merge_candidates(stored, fresh_posts, engagement or {})
+    if not candidates:
+        return [], []
+
+    remaining = client.rate_limit_remaining()
+    if remaining is not None and remaining < settings.comment_min_ratelimit_remaining:
+        logger.info("Skipping comment crawl | ratelimit_remaining=%s", remaining)
+        return [], []
+    if remaining is not None:
+        candidates = candidates[: max(int(remaining) - settings.comment_min_ratelimit_remaining, 1)]
+
+    queue = deque(candidates)
+    results: list[tuple[dict[str, Any], list[dict[str, Any]]]] = []
+    deadline = time.monotonic() + settings.comment_budget_seconds
+    workers = fetch_concurrency(remaining, settings.comment_min_ratelimit_remaining)
+    await asyncio.gather(
+        *(
+            _fetch_post_comments(client, queue, deadline, results)
+            for _ in range(min(workers, len(candidates)))
+        )
+    )
+    if queue:
+        logger.warning(
+            "Comment crawl budget exhausted | finished=%s skipped=%s",
+            len(results),
+            len(queue),
+        )
+
+    comments: list[CommentIn] = []
+    crawled: list[tuple[str, int]] = []
+    for row, items in results:
+        crawled.append((row["id"], int(row["comment_count"] or 0)))
+        for item in items:
+            comments.append(
+                CommentIn(
+                    id=item.get("id", ""),
+                    post_id=row["id"],
+                    timestamp=datetime.fromtimestamp(
+                        item.get("created_utc", 0), tz=timezone.utc
+                    ).isoformat(),
+                    subreddit=row["subreddit"] or "",
+                    body=item.get("body", ""),
+                    score=item.get("score", 0),
+                )
+            )
+    logger.info("Comment crawl complete | posts=%s comments=%s", len(crawled), len(comments))
+    return comments, crawled
+
+
+def score_new_comments(comments: list[CommentIn]) -> dict[str, float]:
+    existing = fetch_existing_comment_ids(comment.id for comment in comments)
+    fresh = [comment for comment in comments if comment.id and comment.id not in existing]
+    return {
+        comment.id: scores["compound"]
+        for comment, scores in zip(fresh, score_texts([comment.body or "" for comment in fresh]))
+    }
+
+
+def store_crawled_comments(
+    comments: list[CommentIn],
+    scores: dict[str, float],
+    crawled: list[tuple[str, int]],
+) -> dict[str, list[float]]:
+    store_comments(comments, scores, crawled)
+    index_comment_terms()
+    by_subreddit: dict[str, list[float]] = {}
+    for comment in comments:
+        score = scores.get(comment.id)
+        if score is not None:
+            by_subreddit.setdefault(comment.subreddit, []).append(score)
+    return by_subreddit
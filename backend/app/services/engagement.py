@@ -0,0 +1,44 @@
+from __future__ import annotations
+
+from datetime import datetime, timedelta, timezone
+from typing import Iterable
+
+import logging
+
+from app.clients.reddit import RedditClient
+from app.core.config import settings
+from app.core.executors import run_db
+from app.db.database import write_connection
+from app.repositories.posts import fetch_recent_post_ids, update_post_engagement
+from app.services.trends import reweight_post_terms
+
+logger = logging.getLogger("reddit_trends.engagement")
+
+
+async def fetch_recent_engagement(
+    client: RedditClient, skip_ids: Iterable[str] = ()
+) -> dict[str, tuple[int, int]]:
+    if settings.engagement_refresh_hours <= 0 or settings.engagement_refresh_max_posts <= 0:
+        return {}
+    since = datetime.now(tz=timezone.utc) - timedelta(hours=settings.engagement_refresh_hours)
+    skip = set(skip_ids)
+    recent = await run_db(
+        fetch_recent_post_ids, since.isoformat(), settings.engagement_refresh_max_posts
+    )
+    post_ids = [post_id for post_id in recent if post_id not in skip]
+    if not post_ids:
+        return {}
+    try:
+        return await client.fetch_engagement(post_ids)
+    except Exception:
+        logger.exception("Engagement refresh failed | posts=%s", len(post_ids))
+        return {}
+
+
+def apply_engagement(engagement: dict[str, tuple[int, int]]) -> int:
+    if not engagement:
+        return 0
+    with write_connection():
+        changed = update_post_engagement(engagement)
+        reweight_post_terms(changed)
+    return len(changed)
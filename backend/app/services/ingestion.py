@@ -1,18 +1,33 @@
 from __future__ import annotations
 
+from collections import defaultdict
 from datetime import datetime, timezone
+from typing import Any
 
+import asyncio
 import logging
+import time
 
-from app.clients.reddit import RedditClient
+from app.clients.reddit import RedditClient, fetch_concurrency, get_reddit_client
 from app.core.config import settings
-from app.models.schemas import PostIn
-from app.repositories.posts import store_posts, update_post_sentiment
+from app.core.executors import run_blocking, run_cpu, run_db
+from app.db.database import write_connection
+from app.models.schemas import CommentIn, FetchCursor, PostIn
+from app.repositories.fetch_cursors import fetch_cursors, store_cursors
+from app.repositories.posts import fetch_post_sentiment, store_posts, update_post_sentiment
 from app.repositories.sentiment import store_sentiment
-from app.repositories.trends import store_trends
-from app.repositories.emerging_topics import store_emerging_topic_snapshots
-from app.services.sentiment import aggregate_sentiment, score_posts
-from app.services.trends import detect_emerging_topics, detect_trends
+from app.services.engagement import apply_engagement, fetch_recent_engagement
+from app.services.comments import crawl_comments, score_new_comments, store_crawled_comments
+from app.services.keyword_matcher import index_post_keywords
+from app.services.pipeline import Pipeline, Stage
+from app.services.sentiment import build_sentiment_records, flush_sentiment_cache, score_posts
+from app.services.trends import (
+    build_post_term_buckets,
+    index_post_terms,
+    merge_term_buckets,
+    store_post_term_buckets,
+    store_window_detections,
+)
 
 
 def parse_scope(value: str) -> list[str]:
@@ -22,57 +37,282 @@ def parse_scope(value: str) -> list[str]:
 logger = logging.getLogger("reddit_trends.ingestion")
 
 
-async def poll_reddit() -> list[PostIn]:
-    client = RedditClient()
-    posts: list[PostIn] = []
+_MIN_FETCH_LIMIT = 10
+_MAX_FETCH_LIMIT = 100
+
+
+def _next_fetch_limit(fetched: int) -> int:
+    return max(_MIN_FETCH_LIMIT, min(_MAX_FETCH_LIMIT, fetched + fetched // 2 + 5))
+
+
+def advance_cursor(
+    subreddit: str, items: list[dict[str, Any]], previous: FetchCursor | None
+) -> FetchCursor:
+    if not items:
+        return FetchCursor(
+            subreddit=subreddit,
+            last_fullname=previous.last_fullname if previous else None,
+            last_created_utc=previous.last_created_utc if previous else None,
+            fetch_limit=_next_fetch_limit(0),
+        )
+    newest = max(items, key=lambda item: item.get("created_utc", 0))
+    return FetchCursor(
+        subreddit=subreddit,
+        last_fullname=newest.get("name") or f"t3_{newest.get('id', '')}",
+        last_created_utc=newest.get("created_utc", 0),
+        fetch_limit=_next_fetch_limit(len(items)),
+    )
+
+
+async def _fetch_subreddit(
+    client: RedditClient,
+    subreddit: str,
+    semaphore: asyncio.Semaphore,
+    cursor: FetchCursor | None = None,
+) -> list[dict[str, Any]] | None:
+    limit = cursor.fetch_limit if cursor else settings.reddit_fetch_limit
+    async with semaphore:
+        try:
+            return await asyncio.wait_for(
+                client.fetch_new_posts(subreddit, limit=limit, cursor=cursor),
+                timeout=settings.reddit_fetch_timeout_seconds,
+            )
+        except asyncio.TimeoutError:
+            logger.warning(
+                "Subreddit fetch timed out | subreddit=%s | timeout=%ss",
+                subreddit,
+                settings.reddit_fetch_timeout_seconds,
+            )
+        except Exception:
+            logger.exception("Subreddit fetch failed | subreddit=%s", subreddit)
+    return None
+
+
+class _Batch:
+    def __init__(self, subreddit: str, items: list[dict[str, Any]]) -> None:
+        self.subreddit = subreddit
+        self.items = items
+        self.posts: list[PostIn] = []
+        self.scores: dict[str, float] = {}
+        self.post_scores: list[tuple[str, float, float, float, float]] = []
+        self.new_ids: list[str] = []
+        self.buckets: dict[tuple[int, str], list] = {}
+
+    def __len__(self) -> int:
+        return len(self.posts) if self.posts else len(self.items)
+
+
+class _CycleTotals:
+    def __init__(self) -> None:
+        self.posts: list[PostIn] = []
+        self.post_scores: list[tuple[str, float, float, float, float]] = []
+        self.new_ids: list[str] = []
+        self.buckets: dict[tuple[int, str], list] = {}
+        self.post_ids: list[str] = []
+        self.seen: set[str] = set()
+        self.engagement: dict[str, tuple[int, int]] = {}
+        self.subreddit_scores: dict[str, list[float]] = defaultdict(list)
+
+
+_last_pipeline_stats: list[dict[str, str | int | float]] = []
+
+
+def get_pipeline_stats() -> list[dict[str, str | int | float]]:
+    return list(_last_pipeline_stats)
+
+
+def _normalize(subreddit: str, items: list[dict[str, Any]]) -> list[PostIn]:
+    return [
+        PostIn(
+            id=item.get("id", ""),
+            timestamp=datetime.fromtimestamp(
+                item.get("created_utc", 0), tz=timezone.utc
+            ).isoformat(),
+            subreddit=subreddit,
+            title=item.get("title"),
+            body=item.get("selftext", ""),
+            score=item.get("score", 0),
+            comment_count=item.get("num_comments", 0),
+        )
+        for item in items
+    ]
+
+
+def _build_pipeline(totals: _CycleTotals) -> Pipeline:
+    async def normalize(batch: _Batch) -> _Batch | None:
+        batch.posts = _normalize(batch.subreddit, batch.items)
+        batch.items = []
+        return batch if batch.posts else None
+
+    async def lookup(batch: _Batch) -> _Batch | None:
+        posts = []
+        for post in batch.posts:
+            if post.id and post.id not in totals.seen:
+                totals.seen.add(post.id)
+                posts.append(post)
+        batch.posts = posts
+        stored = await run_db(fetch_post_sentiment, [post.id for post in posts])
+        batch.scores = {
+            post_id: score for post_id, score in stored.items() if score is not None
+        }
+        batch.new_ids = [post.id for post in posts if post.id not in stored]
+        return batch if posts else None
+
+    async def score(batch: _Batch) -> _Batch:
+        unscored = [post for post in batch.posts if post.id not in batch.scores]
+        if unscored:
+            batch.post_scores = await run_blocking(score_posts, unscored)
+        batch.scores.update(
+            {post_id: compound for post_id, compound, _, _, _ in batch.post_scores}
+        )
+        return batch
+
+    async def extract_terms(batch: _Batch) -> _Batch:
+        new_ids = set(batch.new_ids)
+        fresh = [post for post in batch.posts if post.id in new_ids]
+        if fresh:
+            batch.buckets = await run_cpu(build_post_term_buckets, fresh)
+        return batch
+
+    async def aggregate(batch: _Batch) -> None:
+        new_ids = set(batch.new_ids)
+        totals.posts.extend(post for post in batch.posts if post.id in new_ids)
+        totals.post_scores.extend(batch.post_scores)
+        totals.new_ids.extend(batch.new_ids)
+        merge_term_buckets(totals.buckets, batch.buckets)
+        for post in batch.posts:
+            totals.post_ids.append(post.id)
+            totals.engagement[post.id] = (post.score, post.comment_count)
+            compound = batch.scores.get(post.id)
+            if compound is not None:
+                totals.subreddit_scores[post.subreddit].append(float(compound))
+        batch.posts = []
+        batch.buckets = {}
+
+    queue_size = settings.ingestion_queue_size
+    return Pipeline(
+        [
+            Stage("normalize", normalize, queue_size=queue_size),
+            Stage("lookup", lookup, queue_size=queue_size),
+            Stage("score", score, queue_size=queue_size),
+            Stage("extract_terms", extract_terms, queue_size=queue_size),
+            Stage("aggregate", aggregate, queue_size=queue_size),
+        ]
+    )
+
+
+def _commit_cycle(
+    totals: _CycleTotals,
+    next_cursors: list[FetchCursor],
+    engagement: dict[str, tuple[int, int]],
+    comments: list[CommentIn],
+    comment_scores: dict[str, float],
+    crawled_posts: list[tuple[str, int]],
+) -> tuple[int, int]:
+    inserted = 0
+    with write_connection():
+        if totals.posts:
+            inserted = store_posts(totals.posts)
+        if totals.post_scores:
+            update_post_sentiment(totals.post_scores)
+        store_post_term_buckets(totals.buckets, totals.new_ids)
+        index_post_terms()
+        if next_cursors:
+            store_cursors(next_cursors)
+        refreshed = apply_engagement(engagement)
+
+        if totals.post_ids or crawled_posts:
+            comment_sentiment = (
+                store_crawled_comments(comments, comment_scores, crawled_posts)
+                if crawled_posts
+                else {}
+            )
+            sentiment_records = build_sentiment_records(
+                totals.subreddit_scores, comment_sentiment
+            )
+            if sentiment_records:
+                store_sentiment(sentiment_records)
+            store_window_detections(datetime.now(tz=timezone.utc))
+            index_post_keywords()
+        flush_sentiment_cache()
+    return inserted, refreshed
+
+
+async def poll_reddit(client: RedditClient | None = None) -> list[str]:
+    global _last_pipeline_stats
+    client = client or get_reddit_client()
     subreddit_scope = parse_scope(settings.subreddits)
     logger.info("Starting ingestion cycle | subreddits=%s", ", ".join(subreddit_scope))
     per_subreddit_counts: dict[str, int] = {}
+    failed_subreddits: list[str] = []
 
-    for subreddit in subreddit_scope:
-        items = await client.fetch_new_posts(subreddit)
-        per_subreddit_counts[subreddit] = len(items)
-        for item in items:
-            posts.append(
-                PostIn(
-                    id=item.get("id", ""),
-                    timestamp=datetime.fromtimestamp(
-                        item.get("created_utc", 0), tz=timezone.utc
-                    ).isoformat(),
-                    subreddit=subreddit,
-                    title=item.get("title"),
-                    body=item.get("selftext", ""),
-                    score=item.get("score", 0),
-                    comment_count=item.get("num_comments", 0),
-                )
-            )
+    cursors = await run_db(fetch_cursors, subreddit_scope)
+    next_cursors: list[FetchCursor] = []
+    totals = _CycleTotals()
+    pipeline = _build_pipeline(totals)
 
-    inserted = 0
-    if posts:
-        inserted = store_posts(posts)
+    async def fetch(emit) -> None:
+        semaphore = asyncio.Semaphore(fetch_concurrency(client.rate_limit_remaining()))
+
+        async def fetch_one(subreddit: str) -> None:
+            started = time.perf_counter()
+            items = await _fetch_subreddit(client, subreddit, semaphore, cursors.get(subreddit))
+            if items is None:
+                failed_subreddits.append(subreddit)
+                return
+            per_subreddit_counts[subreddit] = len(items)
+            next_cursors.append(advance_cursor(subreddit, items, cursors.get(subreddit)))
+            if items:
+                await emit(_Batch(subreddit, items), started)
+
+        async with asyncio.TaskGroup() as group:
+            for subreddit in subreddit_scope:
+                group.create_task(fetch_one(subreddit))
 
-        post_scores = score_posts(posts)
-        if post_scores:
-            update_post_sentiment(post_scores)
+    try:
+        await pipeline.run(fetch)
+    finally:
+        _last_pipeline_stats = pipeline.stats()
 
-        sentiment_records = aggregate_sentiment(posts)
-        if sentiment_records:
-            store_sentiment(sentiment_records)
+    engagement = await fetch_recent_engagement(client, totals.post_ids)
+    engagement.update(totals.engagement)
 
-        trend_records = detect_trends(posts)
-        if trend_records:
-            store_trends(trend_records)
+    comments, crawled_posts = await crawl_comments(client, totals.posts, engagement)
+    comment_scores = (
+        await run_blocking(score_new_comments, comments) if comments else {}
+    )
 
-        emerging_records = detect_emerging_topics()
-        if emerging_records:
-            store_emerging_topic_snapshots(emerging_records)
+    commit_started = time.perf_counter()
+    inserted, refreshed = await run_db(
+        _commit_cycle, totals, next_cursors, engagement, comments, comment_scores, crawled_posts
+    )
+    commit_seconds = time.perf_counter() - commit_started
 
     if per_subreddit_counts:
         summary = ", ".join(
             f"{name}={count}" for name, count in per_subreddit_counts.items()
         )
         logger.info("Subreddit fetch summary | %s", summary)
+    if failed_subreddits:
+        logger.warning("Subreddit fetch failures | %s", ", ".join(failed_subreddits))
+    logger.info(
+        "Ingestion pipeline | %s | commit=%.3fs",
+        ", ".join(
+            f"{stage['name']}={stage['items']}@{stage['items_per_second']}/s"
+            f" lat={stage['avg_latency_seconds']}s depth={stage['max_queue_depth']}"
+            for stage in _last_pipeline_stats
+        ),
+        commit_seconds,
+    )
 
-    logger.info("Ingestion cycle complete | fetched=%s inserted=%s", len(posts), inserted)
+    logger.info(
+        "Ingestion cycle complete | fetched=%s inserted=%s refreshed=%s comments=%s "
+        "reddit_requests=%s",
+        len(totals.post_ids),
+        inserted,
+        refreshed,
+        len(comments),
+        client.end_cycle(),
+    )
 
-    return posts
+    return totals.post_ids
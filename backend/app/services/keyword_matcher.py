@@ -0,0 +1,166 @@
+from __future__ import annotations
+
+import logging
+import re
+import threading
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from typing import Iterable
+
+from app.db.database import register_cache_reset
+from app.repositories.keywords import fetch_keyword_version, fetch_keywords
+from app.repositories.post_keywords import (
+    fetch_keyword_rescan_floor,
+    fetch_posts_for_keyword_rescan,
+    fetch_unscanned_posts,
+    mark_keyword_version,
+    store_post_keywords,
+)
+
+logger = logging.getLogger("reddit_trends.keyword_matcher")
+
+_TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+_RESCAN_HOURS = 2
+
+
+def _match_tokens(text: str) -> list[str]:
+    return _TOKEN_PATTERN.findall((text or "").lower())
+
+
+class _TrieNode:
+    __slots__ = ("children", "keyword_id")
+
+    def __init__(self) -> None:
+        self.children: dict[str, _TrieNode] = {}
+        self.keyword_id: int | None = None
+
+
+class KeywordMatcher:
+    def __init__(self, keywords: Iterable[tuple[int, str]] = (), version: int = 0) -> None:
+        self.version = version
+        self.size = 0
+        self._root = _TrieNode()
+        self.add(keywords)
+
+    def add(self, keywords: Iterable[tuple[int, str]]) -> int:
+        added = 0
+        for keyword_id, phrase in keywords:
+            tokens = _match_tokens(phrase)
+            if not tokens:
+                continue
+            node = self._root
+            for token in tokens:
+                node = node.children.setdefault(token, _TrieNode())
+            if node.keyword_id is None:
+                added += 1
+                node.keyword_id = keyword_id
+        self.size += added
+        return added
+
+    def match(self, text: str) -> Counter[int]:
+        tokens = _match_tokens(text)
+        root_children = self._root.children
+        counts: Counter[int] = Counter()
+        for start in range(len(tokens)):
+            node = root_children.get(tokens[start])
+            position = start + 1
+            while node is not None:
+                if node.keyword_id is not None:
+                    counts[node.keyword_id] += 1
+                if position >= len(tokens):
+                    break
+                node = node.children.get(tokens[position])
+                position += 1
+        return counts
+
+
+_matcher: KeywordMatcher | None = None
+_matcher_lock = threading.Lock()
+_MAX_RESCAN_NEEDLES = 64
+
+
+def _reset_matcher() -> None:
+    global _matcher
+    with _matcher_lock:
+        _matcher = None
+
+
+register_cache_reset(_reset_matcher)
+
+
+def get_keyword_matcher() -> KeywordMatcher:
+    global _matcher
+    version = fetch_keyword_version()
+    with _matcher_lock:
+        if _matcher is None or _matcher.version > version:
+            _matcher = KeywordMatcher(fetch_keywords(), version)
+            logger.info(
+                "Keyword matcher compiled | keywords=%s version=%s",
+                _matcher.size,
+                version,
+            )
+        elif _matcher.version < version:
+            added = _matcher.add(fetch_keywords(after_id=_matcher.version))
+            _matcher.version = version
+            logger.info(
+                "Keyword matcher extended | added=%s keywords=%s version=%s",
+                added,
+                _matcher.size,
+                version,
+            )
+        return _matcher
+
+
+def _store_matches(matcher: KeywordMatcher, rows: list, version: int) -> None:
+    matches: list[tuple[str, int, int]] = []
+    for row in rows:
+        content = f"{row['title'] or ''} {row['body'] or ''}"
+        matches.extend(
+            (row["id"], keyword_id, count)
+            for keyword_id, count in matcher.match(content).items()
+        )
+    store_post_keywords(matches, [row["id"] for row in rows], version)
+
+
+def _rescan_recent_posts(version: int, batch_size: int) -> int:
+    rescan_since = (
+        datetime.now(tz=timezone.utc) - timedelta(hours=_RESCAN_HOURS)
+    ).isoformat()
+    floor = fetch_keyword_rescan_floor(version, rescan_since)
+    if floor is None:
+        return 0
+    added = fetch_keywords(after_id=floor)
+    delta = KeywordMatcher(added, version)
+    needles = sorted({tokens[0] for _, phrase in added if (tokens := _match_tokens(phrase))})
+    if len(needles) > _MAX_RESCAN_NEEDLES:
+        needles = []
+    scanned = 0
+    if delta.size:
+        while True:
+            rows = fetch_posts_for_keyword_rescan(version, rescan_since, needles, batch_size)
+            if not rows:
+                break
+            _store_matches(delta, rows, version)
+            scanned += len(rows)
+            if len(rows) < batch_size:
+                break
+    mark_keyword_version(version, rescan_since)
+    return scanned
+
+
+def index_post_keywords(batch_size: int = 1000) -> int:
+    matcher = get_keyword_matcher()
+    scanned = 0
+    while True:
+        rows = fetch_unscanned_posts(batch_size)
+        if not rows:
+            break
+        _store_matches(matcher, rows, matcher.version)
+        scanned += len(rows)
+        if len(rows) < batch_size:
+            break
+    scanned += _rescan_recent_posts(matcher.version, batch_size)
+
+    if scanned:
+        logger.info("Matched post keywords | posts=%s", scanned)
+    return scanned
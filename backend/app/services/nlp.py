@@ -11,15 +11,20 @@ from nltk.tokenize import wordpunct_tokenize
 logger = logging.getLogger("reddit_trends.nlp")
 
 _REQUIRED_RESOURCES = ("stopwords",)
+_resources_ready = False
 
 
 def ensure_nltk_resources() -> None:
+    global _resources_ready
+    if _resources_ready:
+        return
     for resource in _REQUIRED_RESOURCES:
         try:
             nltk.data.find(f"corpora/{resource}")
         except LookupError:
             logger.info("Downloading NLTK resource: %s", resource)
             nltk.download(resource, quiet=True)
+    _resources_ready = True
 
 
 @lru_cache(maxsize=1)
@@ -0,0 +1,128 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Sequence
+
+_STOP = object()
+
+Handler = Callable[[Any], Awaitable[Any]]
+Emit = Callable[..., Awaitable[None]]
+
+
+def _size(item: Any) -> int:
+    return len(item) if isinstance(item, (list, tuple, dict)) else 1
+
+
+class StageStats:
+    def __init__(self, name: str, workers: int, queue_size: int) -> None:
+        self.name = name
+        self.workers = workers
+        self.queue_size = queue_size
+        self.batches = 0
+        self.items = 0
+        self.busy_seconds = 0.0
+        self.total_latency = 0.0
+        self.max_latency = 0.0
+        self.max_depth = 0
+        self.blocked_seconds = 0.0
+
+    def record(self, item: Any, started: float, enqueued: float) -> None:
+        finished = time.perf_counter()
+        self.batches += 1
+        self.items += _size(item)
+        self.busy_seconds += finished - started
+        latency = finished - enqueued
+        self.total_latency += latency
+        self.max_latency = max(self.max_latency, latency)
+
+    def snapshot(self, elapsed: float) -> dict[str, str | int | float]:
+        return {
+            "name": self.name,
+            "workers": self.workers,
+            "queue_size": self.queue_size,
+            "batches": self.batches,
+            "items": self.items,
+            "items_per_second": round(self.items / elapsed, 2) if elapsed > 0 else 0.0,
+            "busy_seconds": round(self.busy_seconds, 4),
+            "avg_latency_seconds": round(self.total_latency / self.batches, 4) if self.batches else 0.0,
+            "max_latency_seconds": round(self.max_latency, 4),
+            "max_queue_depth": self.max_depth,
+            "blocked_seconds": round(self.blocked_seconds, 4),
+        }
+
+
+class Stage:
+    def __init__(self, name: str, handler: Handler, workers: int = 1, queue_size: int = 0) -> None:
+        self.name = name
+        self.handler = handler
+        self.workers = max(1, workers)
+        self.queue_size = max(0, queue_size)
+        self.stats = StageStats(name, self.workers, self.queue_size)
+
+
+class Pipeline:
+    def __init__(self, stages: Sequence[Stage]) -> None:
+        self.stages = list(stages)
+        self.source = StageStats("fetch", 0, 0)
+        self.elapsed = 0.0
+        self._queues: list[asyncio.Queue] = []
+
+    async def _put(self, index: int, stats: StageStats, item: Any) -> None:
+        queue = self._queues[index]
+        waited = time.perf_counter()
+        await queue.put((time.perf_counter(), item))
+        stats.blocked_seconds += time.perf_counter() - waited
+        self.stages[index].stats.max_depth = max(self.stages[index].stats.max_depth, queue.qsize())
+
+    async def _work(self, index: int) -> None:
+        stage = self.stages[index]
+        queue = self._queues[index]
+        downstream = index + 1 < len(self.stages)
+        while True:
+            enqueued, item = await queue.get()
+            if item is _STOP:
+                return
+            started = time.perf_counter()
+            result = await stage.handler(item)
+            stage.stats.record(item, started, enqueued)
+            if downstream and result is not None:
+                await self._put(index + 1, stage.stats, result)
+
+    async def _drain(self, index: int, workers: list[asyncio.Task]) -> None:
+        await asyncio.gather(*workers)
+        if index + 1 < len(self.stages):
+            for _ in range(self.stages[index + 1].workers):
+                await self._queues[index + 1].put((0.0, _STOP))
+
+    async def run(self, source: Callable[[Emit], Awaitable[None]]) -> None:
+        self._queues = [asyncio.Queue(maxsize=stage.queue_size) for stage in self.stages]
+        started = time.perf_counter()
+
+        async def emit(item: Any, fetched_at: float | None = None) -> None:
+            now = time.perf_counter()
+            self.source.record(item, fetched_at or now, fetched_at or now)
+            await self._put(0, self.source, item)
+
+        async def produce() -> None:
+            await source(emit)
+            for _ in range(self.stages[0].workers):
+                await self._queues[0].put((0.0, _STOP))
+
+        try:
+            async with asyncio.TaskGroup() as group:
+                group.create_task(produce())
+                for index, stage in enumerate(self.stages):
+                    workers = [
+                        group.create_task(self._work(index)) for _ in range(stage.workers)
+                    ]
+                    group.create_task(self._drain(index, workers))
+        except ExceptionGroup as error:
+            raise error.exceptions[0] from None
+        finally:
+            self.elapsed = time.perf_counter() - started
+
+    def stats(self) -> list[dict[str, str | int | float]]:
+        return [self.source.snapshot(self.elapsed)] + [
+            stage.stats.snapshot(self.elapsed) for stage in self.stages
+        ]
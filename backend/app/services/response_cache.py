@@ -0,0 +1,158 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Iterable, TypeVar
+from urllib.parse import urlencode
+
+from app.core.config import settings
+from app.core.executors import run_db
+from app.db.database import (
+    get_data_generation,
+    peek_data_state,
+    refresh_data_marker,
+    register_cache_reset,
+)
+
+T = TypeVar("T")
+
+CacheKey = tuple[str, Hashable, int]
+
+
+class _Flight:
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.value: Any = None
+        self.error: BaseException | None = None
+
+
+class ResponseCache:
+    def __init__(self, max_entries: int, ttl_seconds: float) -> None:
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: OrderedDict[CacheKey, tuple[float, Any]] = OrderedDict()
+        self._inflight: dict[CacheKey, _Flight] = {}
+        self._generation = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+
+    def _expired(self, stored_at: float) -> bool:
+        return self.ttl_seconds > 0 and time.monotonic() - stored_at >= self.ttl_seconds
+
+    def _advance(self, generation: int) -> None:
+        if generation <= self._generation:
+            return
+        self._generation = generation
+        stale = [key for key in self._entries if key[2] < generation]
+        for key in stale:
+            del self._entries[key]
+        self.evictions += len(stale)
+
+    def _remember(self, key: CacheKey, value: Any) -> None:
+        if key[2] < self._generation or self.max_entries <= 0:
+            return
+        self._entries[key] = (time.monotonic(), value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def get_or_compute(
+        self,
+        endpoint: str,
+        params: Hashable,
+        compute: Callable[[], T],
+        generation: int | None = None,
+    ) -> T:
+        if generation is None:
+            generation = get_data_generation()
+        key = (endpoint, params, generation)
+        with self._lock:
+            self._advance(generation)
+            entry = self._entries.get(key)
+            if entry is not None and not self._expired(entry[0]):
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            flight = self._inflight.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._inflight[key] = _Flight()
+                self.misses += 1
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value
+
+        try:
+            flight.value = compute()
+        except BaseException as exc:
+            flight.error = exc
+            raise
+        finally:
+            with self._lock:
+                if flight.error is None:
+                    self._remember(key, flight.value)
+                self._inflight.pop(key, None)
+            flight.done.set()
+        return flight.value
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {
+                "generation": self._generation,
+                "size": len(self._entries),
+                "max_entries": self.max_entries,
+                "inflight": len(self._inflight),
+                "hits": self.hits,
+                "misses": self.misses,
+                "coalesced": self.coalesced,
+                "evictions": self.evictions,
+            }
+
+
+response_cache = ResponseCache(settings.response_cache_size, settings.response_cache_ttl_seconds)
+register_cache_reset(response_cache.clear)
+
+
+def cached_response(
+    endpoint: str, params: Hashable, compute: Callable[[], T], generation: int | None = None
+) -> T:
+    return response_cache.get_or_compute(endpoint, params, compute, generation)
+
+
+def response_etag(path: str, params: Iterable[tuple[str, str]]) -> str:
+    query = urlencode(sorted(params))
+    marker, generation = peek_data_state()
+    state = f"m{marker}" if marker is not None else f"g{generation}"
+    digest = hashlib.blake2b(f"{state}:{path}?{query}".encode(), digest_size=16).hexdigest()
+    return f'"{digest}"'
+
+
+async def watch_data_marker(interval: float | None = None) -> None:
+    interval = settings.data_generation_poll_seconds if interval is None else interval
+    while True:
+        await run_db(refresh_data_marker)
+        await asyncio.sleep(max(interval, 0.1))
+
+
+def start_marker_watch() -> asyncio.Task:
+    return asyncio.create_task(watch_data_marker())
+
+
+def get_response_cache_stats() -> dict[str, int]:
+    return response_cache.stats()
@@ -1,30 +1,89 @@
 from __future__ import annotations
 
 import asyncio
+import json
 import logging
-from datetime import datetime, timedelta, timezone
+import math
+import os
+import random
+import socket
+import sqlite3
+import time
+from datetime import datetime, timezone
 from typing import Awaitable, Callable
+from uuid import uuid4
+
+from app.core.config import settings
+from app.repositories.leases import acquire_lease, fetch_lease, release_lease, store_lease_enabled
 
 logger = logging.getLogger("reddit_trends.scheduler")
 
+LEASE_NAME = "ingestion"
+POLL_JOB = "poll_reddit"
+LEASE_BUSY_RETRY_SECONDS = 1.0
+
 _last_run: datetime | None = None
 _next_run: datetime | None = None
 _interval_seconds: int | None = None
 _enabled: bool = True
 _wake_event: asyncio.Event | None = None
+_publish_event: asyncio.Event | None = None
+_instance_id = f"{socket.gethostname()}:{os.getpid()}:{uuid4().hex[:8]}"
+_is_leader = False
+
+
+def _iso(value: datetime | None) -> str | None:
+    return value.isoformat() if value else None
+
 
+def get_instance_id() -> str:
+    return _instance_id
 
-def get_polling_state() -> dict[str, str | int | None]:
-    return {
+
+def is_leader() -> bool:
+    return _is_leader
+
+
+def get_polling_state() -> dict:
+    state: dict = {
         "interval_seconds": _interval_seconds,
-        "last_run": _last_run.isoformat() if _last_run else None,
-        "next_run": _next_run.isoformat() if _next_run else None,
+        "last_run": _iso(_last_run),
+        "next_run": _iso(_next_run),
+        "enabled": _enabled,
+        "leader": _instance_id if _is_leader else None,
+        "is_leader": _is_leader,
+        "lease_expires_at": None,
+        "jobs": get_job_stats(),
     }
+    try:
+        lease = fetch_lease(LEASE_NAME)
+    except sqlite3.Error:
+        logger.exception("Failed to read scheduler lease")
+        return state
+    if lease is None:
+        return state
+    held = lease["owner"] is not None and lease["expires_at"] > time.time()
+    if lease["enabled"] is not None:
+        state["enabled"] = bool(lease["enabled"])
+    if not _is_leader:
+        state["interval_seconds"] = lease["interval_seconds"]
+        state["last_run"] = lease["last_run"]
+        state["next_run"] = lease["next_run"] if held else None
+        state["jobs"] = json.loads(lease["jobs"]) if held and lease["jobs"] else []
+    state["leader"] = lease["owner"] if held else None
+    state["lease_expires_at"] = (
+        datetime.fromtimestamp(lease["expires_at"], tz=timezone.utc).isoformat() if held else None
+    )
+    return state
 
 
 def set_ingestion_enabled(enabled: bool) -> None:
     global _enabled
     _enabled = enabled
+    try:
+        store_lease_enabled(LEASE_NAME, enabled)
+    except sqlite3.Error:
+        logger.exception("Failed to persist ingestion toggle")
     if enabled and _wake_event is not None:
         _wake_event.set()
 
@@ -33,20 +92,238 @@ def is_ingestion_enabled() -> bool:
     return _enabled
 
 
-async def run_interval(task: Callable[[], Awaitable[None]], interval: int) -> None:
-    global _wake_event
+def _apply_lease_enabled(value: int | None) -> None:
+    global _enabled
+    if value is None or bool(value) == _enabled:
+        return
+    _enabled = bool(value)
+    logger.info("Ingestion toggled by another worker | enabled=%s", _enabled)
+    if _enabled and _wake_event is not None:
+        _wake_event.set()
+
+
+class ScheduledJob:
+    def __init__(
+        self,
+        name: str,
+        func: Callable[[], Awaitable[None]],
+        interval: float,
+        align: bool = False,
+        offset: float = 0.0,
+        jitter: float = 0.0,
+        gated: bool = True,
+    ) -> None:
+        self.name = name
+        self.func = func
+        self.interval = interval
+        self.align = align
+        self.offset = offset
+        self.jitter = jitter
+        self.gated = gated
+        self.task: asyncio.Task | None = None
+        self.last_run: datetime | None = None
+        self.next_run: datetime | None = None
+        self.last_duration = 0.0
+        self.total_duration = 0.0
+        self.runs = 0
+        self.skipped = 0
+        self.failures = 0
+        self.last_error: str | None = None
+
+    @property
+    def running(self) -> bool:
+        return self.task is not None and not self.task.done()
+
+    def first_tick(self, now: float) -> float:
+        if not self.align or self.interval <= 0:
+            return now
+        boundary = now - (now - self.offset) % self.interval
+        return boundary if boundary >= now else boundary + self.interval
+
+    def snapshot(self) -> dict[str, str | int | float | bool | None]:
+        return {
+            "name": self.name,
+            "interval_seconds": self.interval,
+            "aligned": self.align,
+            "running": self.running,
+            "last_run": _iso(self.last_run),
+            "next_run": _iso(self.next_run),
+            "last_duration_seconds": round(self.last_duration, 4),
+            "avg_duration_seconds": round(self.total_duration / self.runs, 4) if self.runs else 0.0,
+            "runs": self.runs,
+            "skipped": self.skipped,
+            "failures": self.failures,
+            "last_error": self.last_error,
+        }
+
+
+_jobs: dict[str, ScheduledJob] = {}
+
+
+def get_job_stats() -> list[dict[str, str | int | float | bool | None]]:
+    return [job.snapshot() for job in _jobs.values()]
+
+
+async def _execute(job: ScheduledJob) -> None:
+    global _last_run, _next_run, _interval_seconds
+    job.last_run = datetime.now(tz=timezone.utc)
+    if job.name == POLL_JOB:
+        _interval_seconds = int(job.interval)
+        _last_run = job.last_run
+        _next_run = job.next_run
+    if _publish_event is not None:
+        _publish_event.set()
+    logger.info("Scheduler tick | job=%s", job.name, extra={"interval": job.interval})
+    started = time.perf_counter()
+    try:
+        await job.func()
+    except Exception as exc:
+        job.failures += 1
+        job.last_error = f"{type(exc).__name__}: {exc}"
+        logger.exception("Scheduled job failed | job=%s", job.name)
+    finally:
+        job.last_duration = time.perf_counter() - started
+        job.total_duration += job.last_duration
+        job.runs += 1
+
+
+async def _run_job(job: ScheduledJob) -> None:
+    global _wake_event, _next_run
     if _wake_event is None:
         _wake_event = asyncio.Event()
-    while True:
-        global _last_run, _next_run, _interval_seconds
-        if not _enabled:
-            _next_run = None
-            await _wake_event.wait()
-            _wake_event.clear()
-            continue
-        _interval_seconds = interval
-        _last_run = datetime.now(tz=timezone.utc)
-        _next_run = _last_run + timedelta(seconds=interval)
-        logger.info("Scheduler tick", extra={"interval": interval})
-        await task()
-        await asyncio.sleep(interval)
+    next_at = job.first_tick(time.time())
+    try:
+        while True:
+            if job.gated and not _enabled:
+                job.next_run = None
+                if job.name == POLL_JOB:
+                    _next_run = None
+                await _wake_event.wait()
+                _wake_event.clear()
+                next_at = job.first_tick(time.time())
+                continue
+            job.next_run = datetime.fromtimestamp(next_at, tz=timezone.utc)
+            delay = next_at - time.time() + (random.uniform(0, job.jitter) if job.jitter else 0)
+            if delay > 0:
+                await asyncio.sleep(delay)
+            if job.gated and not _enabled:
+                continue
+
+            next_at += job.interval
+            missed = max(0, math.ceil((time.time() - next_at) / job.interval)) if job.interval > 0 else 0
+            next_at += missed * job.interval
+            job.next_run = datetime.fromtimestamp(next_at, tz=timezone.utc)
+            if job.running:
+                job.skipped += 1 + missed
+                logger.warning("Scheduled job still running; tick skipped | job=%s", job.name)
+                continue
+            job.skipped += missed
+            job.task = asyncio.create_task(_execute(job))
+            await asyncio.sleep(0)
+    finally:
+        if job.task is not None and not job.task.done():
+            job.task.cancel()
+
+
+async def run_jobs(jobs: list[ScheduledJob]) -> None:
+    for job in jobs:
+        _jobs[job.name] = job
+    try:
+        async with asyncio.TaskGroup() as group:
+            for job in jobs:
+                group.create_task(_run_job(job))
+    finally:
+        for job in jobs:
+            _jobs.pop(job.name, None)
+
+
+async def run_interval(
+    task: Callable[[], Awaitable[None]], interval: int, name: str = POLL_JOB
+) -> None:
+    await run_jobs([ScheduledJob(name, task, interval)])
+
+
+async def _stop_job(job: asyncio.Task | None) -> None:
+    if job is None or job.done():
+        return
+    job.cancel()
+    try:
+        await job
+    except asyncio.CancelledError:
+        pass
+    except Exception:
+        logger.exception("Leader job failed while stopping")
+
+
+def _is_busy(error: sqlite3.Error) -> bool:
+    code = getattr(error, "sqlite_errorcode", None)
+    if code is not None:
+        return code & 0xFF in (sqlite3.SQLITE_BUSY, sqlite3.SQLITE_LOCKED)
+    return "locked" in str(error) or "busy" in str(error)
+
+
+async def run_as_leader(job: Callable[[], Awaitable[None]]) -> None:
+    global _is_leader, _publish_event
+    _publish_event = asyncio.Event()
+    lease_seconds = settings.leader_lease_seconds
+    heartbeat = min(settings.leader_heartbeat_seconds, lease_seconds / 2)
+    job_task: asyncio.Task | None = None
+    expires_at = 0.0
+    try:
+        while True:
+            wait = heartbeat
+            try:
+                lease = await asyncio.to_thread(
+                    acquire_lease,
+                    LEASE_NAME,
+                    _instance_id,
+                    lease_seconds,
+                    _interval_seconds,
+                    _iso(_last_run),
+                    _iso(_next_run),
+                    json.dumps(get_job_stats()),
+                )
+            except sqlite3.Error as error:
+                held = _is_leader and time.time() < expires_at
+                if _is_busy(error):
+                    wait = min(heartbeat, LEASE_BUSY_RETRY_SECONDS)
+                    logger.warning(
+                        "Scheduler lease renewal busy | held=%s expires_in=%.1fs",
+                        held,
+                        max(expires_at - time.time(), 0.0),
+                    )
+                else:
+                    logger.exception("Scheduler lease heartbeat failed")
+            else:
+                held = lease is not None
+                if held:
+                    expires_at = float(lease["expires_at"])
+                    _apply_lease_enabled(lease["enabled"])
+
+            if held and not _is_leader:
+                _is_leader = True
+                logger.info("Acquired scheduler lease | instance=%s", _instance_id)
+            elif not held and _is_leader:
+                _is_leader = False
+                logger.warning("Lost scheduler lease | instance=%s", _instance_id)
+                await _stop_job(job_task)
+                job_task = None
+
+            if _is_leader and (job_task is None or job_task.done()):
+                if job_task is not None and not job_task.cancelled() and job_task.exception():
+                    logger.error("Leader job crashed; restarting", exc_info=job_task.exception())
+                job_task = asyncio.create_task(job())
+
+            try:
+                await asyncio.wait_for(_publish_event.wait(), timeout=wait)
+            except asyncio.TimeoutError:
+                pass
+            _publish_event.clear()
+    finally:
+        await _stop_job(job_task)
+        if _is_leader:
+            _is_leader = False
+            try:
+                release_lease(LEASE_NAME, _instance_id)
+            except sqlite3.Error:
+                logger.exception("Failed to release scheduler lease")
@@ -1,15 +1,24 @@
 from __future__ import annotations
 
+import hashlib
 import logging
-from collections import defaultdict
+import multiprocessing
+import os
+import sqlite3
+import threading
+from collections import OrderedDict, defaultdict
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timezone
+from typing import Iterator, Sequence
 from uuid import uuid4
 
 from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
 
-from app.db.database import get_connection
+from app.core.config import settings
+from app.db.database import read_connection, write_connection
 from app.models.schemas import PostIn, SentimentRecord
-from app.repositories.subreddits import get_or_create_subreddit_id
+from app.repositories.sentiment_cache import fetch_cached_scores, store_cached_scores
+from app.repositories.subreddits import resolve_subreddit_ids
 
 logger = logging.getLogger("reddit_trends.sentiment")
 
@@ -23,7 +32,7 @@ def _get_analyzer() -> SentimentIntensityAnalyzer:
     return _analyzer
 
 
-def score_text_detail(text: str) -> dict[str, float]:
+def _analyze(text: str) -> dict[str, float]:
     analyzer = _get_analyzer()
     scores = analyzer.polarity_scores(text or "")
     return {
@@ -34,22 +43,221 @@ def score_text_detail(text: str) -> dict[str, float]:
     }
 
 
+def _normalize_text(text: str) -> str:
+    return " ".join((text or "").split())
+
+
+def text_hash(text: str) -> str:
+    return hashlib.blake2b(
+        _normalize_text(text).encode("utf-8"), digest_size=16
+    ).hexdigest()
+
+
+class SentimentCache:
+    def __init__(self, max_entries: int) -> None:
+        self.max_entries = max_entries
+        self._entries: OrderedDict[str, dict[str, float]] = OrderedDict()
+        self._pending: dict[str, dict[str, float]] = {}
+        self._lock = threading.Lock()
+        self.memory_hits = 0
+        self.store_hits = 0
+        self.misses = 0
+
+    def _remember(self, key: str, scores: dict[str, float]) -> None:
+        self._entries[key] = scores
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def get_many(self, keys: Sequence[str]) -> dict[str, dict[str, float]]:
+        found: dict[str, dict[str, float]] = {}
+        with self._lock:
+            for key in dict.fromkeys(keys):
+                scores = self._entries.get(key)
+                if scores is not None:
+                    self._entries.move_to_end(key)
+                    found[key] = scores
+            self.memory_hits += len(found)
+        remaining = [key for key in dict.fromkeys(keys) if key not in found]
+        if not remaining:
+            return found
+        try:
+            stored = fetch_cached_scores(remaining)
+        except sqlite3.OperationalError:
+            logger.warning("Sentiment cache table unavailable; scoring without it")
+            stored = {}
+        with self._lock:
+            for key, scores in stored.items():
+                self._remember(key, scores)
+            self.store_hits += len(stored)
+            self.misses += len(remaining) - len(stored)
+        found.update(stored)
+        return found
+
+    def put_many(self, items: dict[str, dict[str, float]], persist: bool = True) -> None:
+        with self._lock:
+            for key, scores in items.items():
+                self._remember(key, scores)
+                if persist:
+                    self._pending[key] = scores
+
+    def flush(self) -> int:
+        with self._lock:
+            pending = list(self._pending.items())
+            self._pending.clear()
+        try:
+            return store_cached_scores(pending)
+        except sqlite3.OperationalError:
+            logger.warning("Sentiment cache table unavailable; dropped %s entries", len(pending))
+            return 0
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._pending.clear()
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "max_entries": self.max_entries,
+                "pending": len(self._pending),
+                "memory_hits": self.memory_hits,
+                "store_hits": self.store_hits,
+                "misses": self.misses,
+            }
+
+
+sentiment_cache = SentimentCache(settings.sentiment_cache_size)
+
+
+def get_sentiment_cache_stats() -> dict[str, int]:
+    return sentiment_cache.stats()
+
+
+def flush_sentiment_cache() -> int:
+    return sentiment_cache.flush()
+
+
+def score_text_detail(text: str) -> dict[str, float]:
+    return next(score_texts([text]))
+
+
 def score_text(text: str) -> float:
     return score_text_detail(text).get("compound", 0.0)
 
 
-def aggregate_sentiment(posts: list[PostIn]) -> list[SentimentRecord]:
-    subreddit_scores: dict[str, list[float]] = defaultdict(list)
-    for post in posts:
-        content = f"{post.title or ''} {post.body or ''}".strip()
-        subreddit_scores[post.subreddit].append(score_text(content))
+_scoring_pool: ProcessPoolExecutor | None = None
+_scoring_pool_workers = 0
+_scoring_pool_lock = threading.Lock()
+
+
+def _resolve_workers(workers: int | None) -> int:
+    value = settings.sentiment_workers if workers is None else workers
+    if value <= 0:
+        value = os.cpu_count() or 1
+    return value
+
+
+def _init_scoring_worker() -> None:
+    _get_analyzer()
+
+
+def _score_chunk(texts: list[str]) -> list[dict[str, float]]:
+    return [_analyze(text) for text in texts]
+
+
+def _get_scoring_pool(workers: int) -> ProcessPoolExecutor:
+    global _scoring_pool, _scoring_pool_workers
+    with _scoring_pool_lock:
+        if _scoring_pool is None or _scoring_pool_workers != workers:
+            if _scoring_pool is not None:
+                _scoring_pool.shutdown(wait=True)
+            _scoring_pool = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_scoring_worker,
+            )
+            _scoring_pool_workers = workers
+            logger.info("Sentiment scoring pool started | workers=%s", workers)
+        return _scoring_pool
+
+
+def shutdown_scoring_pool() -> None:
+    global _scoring_pool, _scoring_pool_workers
+    with _scoring_pool_lock:
+        if _scoring_pool is not None:
+            _scoring_pool.shutdown(wait=True)
+            _scoring_pool = None
+            _scoring_pool_workers = 0
+
+
+def _analyze_many(
+    texts: Sequence[str], workers: int, chunk_size: int, threshold: int
+) -> Iterator[dict[str, float]]:
+    if workers <= 1 or len(texts) < max(threshold, chunk_size + 1):
+        for text in texts:
+            yield _analyze(text)
+        return
+
+    pool = _get_scoring_pool(workers)
+    chunks = [list(texts[i : i + chunk_size]) for i in range(0, len(texts), chunk_size)]
+    for chunk_scores in pool.map(_score_chunk, chunks):
+        yield from chunk_scores
+
+
+def score_texts(
+    texts: Sequence[str],
+    workers: int | None = None,
+    chunk_size: int | None = None,
+    parallel_threshold: int | None = None,
+    persist: bool = True,
+) -> Iterator[dict[str, float]]:
+    workers = _resolve_workers(workers)
+    chunk_size = max(chunk_size or settings.sentiment_chunk_size, 1)
+    threshold = (
+        settings.sentiment_parallel_threshold
+        if parallel_threshold is None
+        else parallel_threshold
+    )
+    keys = [text_hash(text) for text in texts]
+    known = sentiment_cache.get_many(keys)
+
+    misses: dict[str, str] = {}
+    for key, text in zip(keys, texts):
+        if key not in known and key not in misses:
+            misses[key] = text
+    if misses:
+        analyzed = dict(
+            zip(
+                misses.keys(),
+                _analyze_many(list(misses.values()), workers, chunk_size, threshold),
+            )
+        )
+        sentiment_cache.put_many(analyzed, persist)
+        known.update(analyzed)
+
+    for key in keys:
+        yield known[key]
+
+
+def build_sentiment_records(
+    subreddit_scores: dict[str, list[float]],
+    comment_scores: dict[str, list[float]] | None = None,
+) -> list[SentimentRecord]:
+    merged: dict[str, list[float]] = defaultdict(list)
+    for subreddit, values in subreddit_scores.items():
+        merged[subreddit].extend(values)
+    for subreddit, values in (comment_scores or {}).items():
+        merged[subreddit].extend(float(value) for value in values)
 
     timestamp = datetime.now(tz=timezone.utc).isoformat()
     records: list[SentimentRecord] = []
+    subreddit_ids = resolve_subreddit_ids(merged.keys())
 
-    for subreddit, scores in subreddit_scores.items():
+    for subreddit, scores in merged.items():
         avg = sum(scores) / max(len(scores), 1)
-        subreddit_id = get_or_create_subreddit_id(subreddit) if subreddit else None
+        subreddit_id = subreddit_ids.get(subreddit) if subreddit else None
         records.append(
             SentimentRecord(
                 id=str(uuid4()),
@@ -66,12 +274,10 @@ def aggregate_sentiment(posts: list[PostIn]) -> list[SentimentRecord]:
 
 
 def score_posts(posts: list[PostIn]) -> list[tuple[str, float, float, float, float]]:
+    posts = [post for post in posts if post.id]
+    contents = [f"{post.title or ''} {post.body or ''}".strip() for post in posts]
     payload: list[tuple[str, float, float, float, float]] = []
-    for post in posts:
-        if not post.id:
-            continue
-        content = f"{post.title or ''} {post.body or ''}".strip()
-        scores = score_text_detail(content)
+    for post, scores in zip(posts, score_texts(contents)):
         payload.append(
             (
                 post.id,
@@ -84,49 +290,62 @@ def score_posts(posts: list[PostIn]) -> list[tuple[str, float, float, float, flo
     return payload
 
 
-def backfill_post_sentiment(batch_size: int = 500) -> int:
-    connection = get_connection()
-    cursor = connection.cursor()
-    cursor.execute(
-        """
-        SELECT id, title, body
-        FROM posts
-        WHERE sentiment_compound IS NULL
-        LIMIT ?
-        """,
-        (batch_size,),
-    )
-    rows = cursor.fetchall()
-    if not rows:
-        connection.close()
-        return 0
+def fetch_unscored_posts(batch_size: int | None = None) -> list[tuple[str, str]]:
+    batch_size = batch_size or settings.sentiment_backfill_batch_size
+    with read_connection() as connection:
+        cursor = connection.cursor()
+        cursor.execute(
+            """
+            SELECT id, title, body
+            FROM posts
+            WHERE sentiment_compound IS NULL
+            LIMIT ?
+            """,
+            (batch_size,),
+        )
+        rows = cursor.fetchall()
+    return [(row["id"], f"{row['title'] or ''} {row['body'] or ''}".strip()) for row in rows]
+
 
+def score_unscored_posts(
+    rows: list[tuple[str, str]],
+) -> list[tuple[float, float, float, float, str]]:
     updates: list[tuple[float, float, float, float, str]] = []
-    for row in rows:
-        content = f"{row['title'] or ''} {row['body'] or ''}".strip()
-        scores = score_text_detail(content)
+    for (post_id, _), scores in zip(rows, score_texts([content for _, content in rows])):
         updates.append(
             (
                 scores["compound"],
                 scores["pos"],
                 scores["neg"],
                 scores["neu"],
-                row["id"],
+                post_id,
             )
         )
+    return updates
 
-    cursor.executemany(
-        """
-        UPDATE posts
-        SET sentiment_compound = ?,
-            sentiment_pos = ?,
-            sentiment_neg = ?,
-            sentiment_neu = ?
-        WHERE id = ?
-        """,
-        updates,
-    )
-    connection.commit()
-    connection.close()
+
+def store_backfilled_sentiment(updates: list[tuple[float, float, float, float, str]]) -> int:
+    if not updates:
+        return 0
+    with write_connection() as connection:
+        connection.executemany(
+            """
+            UPDATE posts
+            SET sentiment_compound = ?,
+                sentiment_pos = ?,
+                sentiment_neg = ?,
+                sentiment_neu = ?
+            WHERE id = ?
+            """,
+            updates,
+        )
+    sentiment_cache.flush()
     logger.info("Backfilled post sentiment | updated=%s", len(updates))
     return len(updates)
+
+
+def backfill_post_sentiment(batch_size: int | None = None) -> int:
+    rows = fetch_unscored_posts(batch_size)
+    if not rows:
+        return 0
+    return store_backfilled_sentiment(score_unscored_posts(rows))
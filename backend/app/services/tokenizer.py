@@ -0,0 +1,35 @@
+from __future__ import annotations
+
+import re
+from functools import lru_cache
+
+from app.services.nlp import get_stopwords
+
+URL_PATTERN = re.compile(r"https?://\S+", re.IGNORECASE)
+DENYLIST = frozenset({"says", "said", "new", "original", "today", "breaking"})
+MIN_TERM_LENGTH = 4
+
+_TERM_PATTERN = re.compile(r"(?<!\w)[^\W\d_]{%d,}(?!\w)" % MIN_TERM_LENGTH)
+
+
+@lru_cache(maxsize=1)
+def _excluded_terms() -> frozenset[str]:
+    return frozenset(get_stopwords()) | DENYLIST
+
+
+def extract_terms(text: str) -> list[str]:
+    excluded = _excluded_terms()
+    terms: list[str] = []
+    append = terms.append
+    for token in _TERM_PATTERN.findall(URL_PATTERN.sub(" ", text or "")):
+        token = token.lower()
+        if token not in excluded and token.isalpha():
+            append(token)
+    return terms
+
+
+def extract_post_terms(text: str) -> list[str]:
+    terms = extract_terms(text)
+    if len(terms) > 1:
+        terms.extend([f"{terms[i]} {terms[i + 1]}" for i in range(len(terms) - 1)])
+    return terms
@@ -2,24 +2,34 @@ from __future__ import annotations
 
 import logging
 import math
-import re
-from collections import Counter, defaultdict
+from collections import Counter
 from datetime import datetime, timedelta, timezone
 from uuid import uuid4
 
-from app.db.database import get_connection
+from app.core.timestamps import hour_bucket, to_epoch
+from app.db.database import read_connection, write_connection
 from app.models.schemas import EmergingTopicRecord, PostIn, TrendSnapshotRecord
-from app.repositories.emerging_topics import fetch_existing_topics, get_or_create_topic_id
-from app.repositories.keywords import get_or_create_keyword_id
-from app.services.nlp import filter_stopwords, tokenize
+from app.repositories.emerging_topics import (
+    fetch_existing_topics,
+    get_or_create_topic_id,
+    store_emerging_topic_snapshots,
+)
+from app.repositories.keywords import resolve_keyword_ids
+from app.repositories.term_counts import (
+    adjust_term_weights,
+    fetch_unindexed_comments,
+    fetch_unindexed_posts,
+    fetch_window_term_stats,
+    store_term_hour_counts,
+)
+from app.repositories.trends import store_trends
+from app.services.tokenizer import extract_post_terms, extract_terms
 
 logger = logging.getLogger("reddit_trends.trends")
 
 
 WINDOW_HOURS = 1
-_URL_PATTERN = re.compile(r"https?://\S+", re.IGNORECASE)
-_DENYLIST = {"says", "said", "new", "original", "today", "breaking"}
-_MIN_TERM_LENGTH = 4
+_MIN_MENTIONS = 5
 
 
 def _align_hour(value: datetime) -> datetime:
@@ -37,37 +47,20 @@ def _window_bounds() -> tuple[datetime, datetime, datetime, datetime]:
     return _window_bounds_at(datetime.now(tz=timezone.utc))
 
 
-def _fetch_posts_in_window(start: str, end: str) -> list[dict]:
-    connection = get_connection()
-    cursor = connection.cursor()
-    cursor.execute(
-        """
-        SELECT id, timestamp, title, body, score, comment_count
-        FROM posts
-        WHERE timestamp >= ? AND timestamp < ?
-        """,
-        (start, end),
-    )
-    rows = cursor.fetchall()
-    connection.close()
-    return rows
-
-
 def fetch_posts_since(hours: int) -> list[PostIn]:
     start = datetime.now(tz=timezone.utc) - timedelta(hours=hours)
-    connection = get_connection()
-    cursor = connection.cursor()
-    cursor.execute(
-        """
-        SELECT p.id, p.timestamp, p.title, p.body, p.score, p.comment_count, r.name AS subreddit
-        FROM posts p
-        LEFT JOIN subreddits r ON r.id = p.subreddit_id
-        WHERE p.timestamp >= ?
-        """,
-        (start.isoformat(),),
-    )
-    rows = cursor.fetchall()
-    connection.close()
+    with read_connection() as connection:
+        cursor = connection.cursor()
+        cursor.execute(
+            """
+            SELECT p.id, p.timestamp, p.title, p.body, p.score, p.comment_count, r.name AS subreddit
+            FROM posts p
+            LEFT JOIN subreddits r ON r.id = p.subreddit_id
+            WHERE p.timestamp >= ?
+            """,
+            (start.isoformat(),),
+        )
+        rows = cursor.fetchall()
     return [
         PostIn(
             id=row["id"],
@@ -83,58 +76,159 @@ def fetch_posts_since(hours: int) -> list[PostIn]:
 
 
 def _extract_terms(text: str) -> list[str]:
-    cleaned_text = _URL_PATTERN.sub(" ", text or "")
-    tokens = filter_stopwords(tokenize(cleaned_text))
-    return [
-        token
-        for token in tokens
-        if token.isalpha()
-        and len(token) >= _MIN_TERM_LENGTH
-        and token not in _DENYLIST
-    ]
+    return extract_terms(text)
 
 
 def _extract_terms_for_post(text: str) -> list[str]:
-    cleaned_text = _URL_PATTERN.sub(" ", text or "")
-    tokens = filter_stopwords(tokenize(cleaned_text))
-    cleaned = [
-        token
-        for token in tokens
-        if token.isalpha()
-        and len(token) >= _MIN_TERM_LENGTH
-        and token not in _DENYLIST
+    return extract_post_terms(text)
+
+
+def _hour_bucket(timestamp: str) -> int:
+    return hour_bucket(to_epoch(timestamp))
+
+
+def _epoch(value: datetime) -> int:
+    return int(value.timestamp())
+
+
+def _post_weight(score: int, comment_count: int) -> float:
+    return math.log(1 + max(score + comment_count, 0))
+
+
+def _accumulate_terms(
+    buckets: dict[tuple[int, str], list],
+    timestamp: str,
+    content: str,
+    weight: float,
+    unique: int,
+) -> None:
+    terms = _extract_terms_for_post(content) if content else []
+    if not terms:
+        return
+    bucket = _hour_bucket(timestamp)
+    for term, count in Counter(terms).items():
+        stats = buckets.get((bucket, term))
+        if stats is None:
+            buckets[(bucket, term)] = [count, count * weight, unique, timestamp]
+            continue
+        stats[0] += count
+        stats[1] += count * weight
+        stats[2] += unique
+        if timestamp < stats[3]:
+            stats[3] = timestamp
+
+
+def _bucket_rows(buckets: dict[tuple[int, str], list]) -> list:
+    return [
+        (bucket, term, raw, weighted, unique, first_seen)
+        for (bucket, term), (raw, weighted, unique, first_seen) in buckets.items()
     ]
-    terms = list(cleaned)
-    if len(cleaned) > 1:
-        terms.extend(
-            f"{cleaned[i]} {cleaned[i + 1]}" for i in range(len(cleaned) - 1)
-        )
-    return terms
 
 
-def _window_term_stats(start: str, end: str) -> tuple[Counter[str], dict[str, float]]:
-    rows = _fetch_posts_in_window(start, end)
-    counts: Counter[str] = Counter()
-    weighted: dict[str, float] = defaultdict(float)
+def build_post_term_buckets(posts: list[PostIn]) -> dict[tuple[int, str], list]:
+    buckets: dict[tuple[int, str], list] = {}
+    for post in posts:
+        content = f"{post.title or ''} {post.body or ''}".strip()
+        weight = _post_weight(post.score, post.comment_count)
+        _accumulate_terms(buckets, post.timestamp, content, weight, 1)
+    return buckets
 
-    for row in rows:
-        post_id = row["id"]
-        content = f"{row['title'] or ''} {row['body'] or ''}".strip()
-        if not content:
+
+def merge_term_buckets(
+    target: dict[tuple[int, str], list], source: dict[tuple[int, str], list]
+) -> None:
+    for key, (raw, weighted, unique, first_seen) in source.items():
+        stats = target.get(key)
+        if stats is None:
+            target[key] = [raw, weighted, unique, first_seen]
+            continue
+        stats[0] += raw
+        stats[1] += weighted
+        stats[2] += unique
+        if first_seen < stats[3]:
+            stats[3] = first_seen
+
+
+def store_post_term_buckets(buckets: dict[tuple[int, str], list], post_ids: list[str]) -> int:
+    if not post_ids:
+        return 0
+    store_term_hour_counts(_bucket_rows(buckets), post_ids)
+    return len(post_ids)
+
+
+def index_post_terms(batch_size: int = 1000) -> int:
+    indexed = 0
+    while True:
+        rows = fetch_unindexed_posts(batch_size)
+        if not rows:
+            break
+
+        buckets: dict[tuple[int, str], list] = {}
+        for row in rows:
+            content = f"{row['title'] or ''} {row['body'] or ''}".strip()
+            weight = _post_weight(int(row["score"] or 0), int(row["comment_count"] or 0))
+            _accumulate_terms(buckets, row["timestamp"], content, weight, 1)
+
+        store_term_hour_counts(_bucket_rows(buckets), [row["id"] for row in rows])
+        indexed += len(rows)
+        if len(rows) < batch_size:
+            break
+
+    if indexed:
+        logger.info("Indexed post terms | posts=%s", indexed)
+    return indexed
+
+
+def reweight_post_terms(changed: list[tuple]) -> int:
+    deltas: dict[tuple[int, str], float] = {}
+    for row, score, comment_count in changed:
+        if not row["terms_indexed"]:
             continue
-        terms = _extract_terms_for_post(content)
-        if not terms:
+        old_weight = _post_weight(int(row["score"] or 0), int(row["comment_count"] or 0))
+        delta = _post_weight(score, comment_count) - old_weight
+        content = f"{row['title'] or ''} {row['body'] or ''}".strip()
+        if not delta or not content:
             continue
-        per_post_counts = Counter(terms)
-        counts.update(per_post_counts)
+        bucket = _hour_bucket(row["timestamp"])
+        for term, count in Counter(_extract_terms_for_post(content)).items():
+            deltas[(bucket, term)] = deltas.get((bucket, term), 0.0) + count * delta
+    return adjust_term_weights(
+        (bucket, term, delta) for (bucket, term), delta in deltas.items()
+    )
+
+
+def index_comment_terms(batch_size: int = 1000) -> int:
+    indexed = 0
+    while True:
+        rows = fetch_unindexed_comments(batch_size)
+        if not rows:
+            break
+
+        buckets: dict[tuple[int, str], list] = {}
+        for row in rows:
+            content = (row["body"] or "").strip()
+            weight = math.log(1 + max(int(row["score"] or 0), 0))
+            _accumulate_terms(buckets, row["timestamp"], content, weight, 0)
+
+        store_term_hour_counts(
+            _bucket_rows(buckets), [row["id"] for row in rows], source="comments"
+        )
+        indexed += len(rows)
+        if len(rows) < batch_size:
+            break
+
+    if indexed:
+        logger.info("Indexed comment terms | comments=%s", indexed)
+    return indexed
 
-        score = int(row["score"] or 0)
-        comments = int(row["comment_count"] or 0)
-        weight = math.log(1 + score + comments)
-        for term, count in per_post_counts.items():
-            weighted[term] += count * weight
 
-    return counts, weighted
+def _window_term_stats(
+    start: datetime, end: datetime, prev_start: datetime, prev_end: datetime
+) -> list:
+    index_post_terms()
+    return fetch_window_term_stats(
+        _epoch(start), _epoch(end), _epoch(prev_start), _epoch(prev_end), _MIN_MENTIONS
+    )
 
 
 def detect_trends(posts: list[PostIn]) -> list[TrendSnapshotRecord]:
@@ -144,23 +238,19 @@ def detect_trends(posts: list[PostIn]) -> list[TrendSnapshotRecord]:
 
 def detect_trends_for_window(end: datetime) -> list[TrendSnapshotRecord]:
     start, end, prev_start, prev_end = _window_bounds_at(end)
-    current_counts, current_weighted = _window_term_stats(
-        start.isoformat(), end.isoformat()
-    )
-    previous_counts, _ = _window_term_stats(
-        prev_start.isoformat(), prev_end.isoformat()
-    )
+    rows = _window_term_stats(start, end, prev_start, prev_end)
 
     timestamp = end.isoformat()
     records: list[TrendSnapshotRecord] = []
+    keyword_ids = resolve_keyword_ids(row["term"] for row in rows)
 
-    for term, current in current_counts.items():
-        if current < 5:
-            continue
-        previous = int(previous_counts.get(term, 0))
+    for row in rows:
+        term = row["term"]
+        current = int(row["raw_mentions"])
+        previous = int(row["previous_mentions"])
         velocity = (current - previous) / max(previous, 1)
         spike = current / max(previous, 1)
-        keyword_id = get_or_create_keyword_id(term)
+        keyword_id = keyword_ids.get(term, 0)
 
         records.append(
             TrendSnapshotRecord(
@@ -172,9 +262,9 @@ def detect_trends_for_window(end: datetime) -> list[TrendSnapshotRecord]:
                 context="global",
                 keyword_id=keyword_id,
                 event_id=None,
-                raw_mentions=int(current),
-                weighted_mentions=round(float(current_weighted.get(term, 0.0)), 4),
-                previous_mentions=int(previous),
+                raw_mentions=current,
+                weighted_mentions=round(float(row["weighted_mentions"] or 0.0), 4),
+                previous_mentions=previous,
                 window_start=start.isoformat(),
                 window_end=end.isoformat(),
             )
@@ -190,60 +280,23 @@ def detect_emerging_topics() -> list[EmergingTopicRecord]:
 
 def detect_emerging_topics_for_window(end: datetime) -> list[EmergingTopicRecord]:
     start, end, prev_start, prev_end = _window_bounds_at(end)
-    current_posts = _fetch_posts_in_window(start.isoformat(), end.isoformat())
-    prev_posts = _fetch_posts_in_window(prev_start.isoformat(), prev_end.isoformat())
-
-    current_counts: Counter[str] = Counter()
-    current_unique: dict[str, set[str]] = defaultdict(set)
-    current_first_seen: dict[str, str] = {}
-
-    for row in current_posts:
-        post_id = row["id"]
-        content = f"{row['title'] or ''} {row['body'] or ''}".strip()
-        terms = _extract_terms(content)
-        if not terms:
-            continue
-        current_counts.update(terms)
-        for term in set(terms):
-            current_unique[term].add(post_id)
-            if term not in current_first_seen or row["timestamp"] < current_first_seen[term]:
-                current_first_seen[term] = row["timestamp"]
-
-        if len(terms) > 1:
-            bigrams = [
-                f"{terms[i]} {terms[i + 1]}" for i in range(len(terms) - 1)
-            ]
-            current_counts.update(bigrams)
-            for term in set(bigrams):
-                current_unique[term].add(post_id)
-                if term not in current_first_seen or row["timestamp"] < current_first_seen[term]:
-                    current_first_seen[term] = row["timestamp"]
-
-    prev_counts: Counter[str] = Counter()
-    for row in prev_posts:
-        content = f"{row['title'] or ''} {row['body'] or ''}".strip()
-        terms = _extract_terms(content)
-        if not terms:
-            continue
-        prev_counts.update(terms)
-        if len(terms) > 1:
-            bigrams = [
-                f"{terms[i]} {terms[i + 1]}" for i in range(len(terms) - 1)
-            ]
-            prev_counts.update(bigrams)
-
-    if not current_counts:
+    rows = [
+        row
+        for row in _window_term_stats(start, end, prev_start, prev_end)
+        if int(row["unique_posts"]) >= 3
+    ]
+    if not rows:
         return []
 
-    existing_topics = fetch_existing_topics(list(current_counts.keys()))
+    existing_topics = fetch_existing_topics([row["term"] for row in rows])
     records: list[EmergingTopicRecord] = []
     now_iso = end.isoformat()
 
-    for topic, count in current_counts.items():
-        unique_posts = len(current_unique.get(topic, set()))
-        if count < 5 or unique_posts < 3:
-            continue
-        prev_count = int(prev_counts.get(topic, 0))
+    for row in rows:
+        topic = row["term"]
+        count = int(row["raw_mentions"])
+        unique_posts = int(row["unique_posts"])
+        prev_count = int(row["previous_mentions"])
         velocity = (count - prev_count) / max(prev_count, 1)
         if velocity < 1.0:
             continue
@@ -251,7 +304,7 @@ def detect_emerging_topics_for_window(end: datetime) -> list[EmergingTopicRecord
         if topic in existing_topics:
             topic_id, first_seen = existing_topics[topic]
         else:
-            first_seen = current_first_seen.get(topic, now_iso)
+            first_seen = row["first_seen"] or now_iso
             topic_id = get_or_create_topic_id(topic, first_seen)
 
         first_seen_dt = datetime.fromisoformat(first_seen)
@@ -275,3 +328,16 @@ def detect_emerging_topics_for_window(end: datetime) -> list[EmergingTopicRecord
 
     logger.info("Emerging topic detection complete", extra={"records": len(records)})
     return records
+
+
+def store_window_detections(end: datetime) -> int:
+    trend_records = detect_trends_for_window(end)
+    emerging_records = detect_emerging_topics_for_window(end)
+    if not trend_records and not emerging_records:
+        return 0
+    with write_connection():
+        if trend_records:
+            store_trends(trend_records)
+        if emerging_records:
+            store_emerging_topic_snapshots(emerging_records)
+    return len(trend_records) + len(emerging_records)
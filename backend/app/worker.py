@@ -0,0 +1,188 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import signal
+import time
+from contextlib import suppress
+from datetime import datetime, timedelta, timezone
+
+from app.clients.reddit import close_reddit_client, get_reddit_client
+from app.core.config import settings
+from app.core.executors import run_blocking, run_db, shutdown_executors, start_loop_monitor
+from app.core.logging_config import configure_logging
+from app.core.timestamps import HOUR_SECONDS
+from app.db.database import (
+    SCHEMA_VERSION,
+    close_pool,
+    get_schema_version,
+    hold_data_generation,
+    init_db,
+    publish_data_generation,
+    release_data_generation,
+)
+from app.repositories.keywords import keyword_ids
+from app.repositories.rollups import rebuild_rollups_if_empty
+from app.repositories.subreddits import subreddit_ids
+from app.services.ingestion import poll_reddit
+from app.services.keyword_matcher import index_post_keywords
+from app.services.nlp import ensure_nltk_resources
+from app.services.scheduler import (
+    POLL_JOB,
+    ScheduledJob,
+    run_as_leader,
+    run_jobs,
+    set_ingestion_enabled,
+)
+from app.services.sentiment import (
+    fetch_unscored_posts,
+    score_unscored_posts,
+    shutdown_scoring_pool,
+    store_backfilled_sentiment,
+)
+from app.services.trends import store_window_detections
+
+logger = logging.getLogger("reddit_trends.worker")
+
+SCHEMA_POLL_SECONDS = 1.0
+
+
+def _recompute_recent_windows() -> None:
+    end = datetime.now(tz=timezone.utc)
+    hold_data_generation()
+    try:
+        for offset in range(max(settings.backfill_trends_hours, 1)):
+            store_window_detections(end - timedelta(hours=offset))
+        index_post_keywords()
+    finally:
+        if release_data_generation():
+            publish_data_generation()
+
+
+def _roll_over_windows() -> None:
+    store_window_detections(datetime.now(tz=timezone.utc))
+
+
+async def backfill_sentiment() -> None:
+    batch_size = settings.sentiment_backfill_batch_size
+    while True:
+        rows = await run_db(fetch_unscored_posts, batch_size)
+        if not rows:
+            return
+        updates = await run_blocking(score_unscored_posts, rows)
+        await run_db(store_backfilled_sentiment, updates)
+        if len(rows) < batch_size:
+            return
+
+
+async def roll_over_windows() -> None:
+    await run_db(_roll_over_windows)
+
+
+async def startup_recompute() -> None:
+    await run_db(rebuild_rollups_if_empty)
+    await backfill_sentiment()
+    try:
+        await run_db(_recompute_recent_windows)
+    except Exception:
+        logging.getLogger("reddit_trends.startup").exception("Startup recompute failed")
+
+
+def _warm_id_caches() -> None:
+    keyword_ids.warm()
+    subreddit_ids.warm()
+
+
+def prepare_database() -> None:
+    init_db()
+    _warm_id_caches()
+
+
+async def wait_for_database() -> None:
+    deadline = time.monotonic() + settings.schema_wait_seconds
+    while (version := await run_db(get_schema_version)) < SCHEMA_VERSION:
+        if time.monotonic() >= deadline:
+            raise RuntimeError(
+                f"Database schema version {version} is older than {SCHEMA_VERSION}; "
+                "start the ingestion worker to migrate it"
+            )
+        logger.info("Waiting for the worker to migrate the database | version=%s", version)
+        await asyncio.sleep(SCHEMA_POLL_SECONDS)
+    await run_db(_warm_id_caches)
+
+
+def start_ingestion() -> asyncio.Task:
+    ensure_nltk_resources()
+    set_ingestion_enabled(settings.enable_ingestion)
+    reddit_client = get_reddit_client()
+
+    async def task() -> None:
+        await poll_reddit(reddit_client)
+
+    async def leader_jobs() -> None:
+        await startup_recompute()
+        await run_jobs(
+            [
+                ScheduledJob(
+                    POLL_JOB,
+                    task,
+                    settings.poll_interval_seconds,
+                    jitter=settings.poll_jitter_seconds,
+                ),
+                ScheduledJob(
+                    "trend_rollover",
+                    roll_over_windows,
+                    HOUR_SECONDS,
+                    align=True,
+                    offset=settings.trend_rollover_offset_seconds,
+                    gated=False,
+                ),
+                ScheduledJob(
+                    "sentiment_backfill",
+                    backfill_sentiment,
+                    settings.sentiment_backfill_interval_seconds,
+                    align=True,
+                    gated=False,
+                ),
+            ]
+        )
+
+    return asyncio.create_task(run_as_leader(leader_jobs))
+
+
+async def stop_ingestion(election: asyncio.Task) -> None:
+    election.cancel()
+    with suppress(asyncio.CancelledError):
+        await election
+    close_reddit_client()
+    shutdown_scoring_pool()
+
+
+async def run_worker() -> None:
+    await run_db(prepare_database)
+    monitor = start_loop_monitor()
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+
+    election = start_ingestion()
+    logger.info("Ingestion worker started")
+    try:
+        await stop.wait()
+    finally:
+        await stop_ingestion(election)
+        if monitor is not None:
+            monitor.cancel()
+        shutdown_executors()
+        close_pool()
+        logger.info("Ingestion worker stopped")
+
+
+def main() -> None:
+    configure_logging("worker.log")
+    asyncio.run(run_worker())
+
+
+if __name__ == "__main__":
+    main()
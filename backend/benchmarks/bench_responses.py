@@ -0,0 +1,91 @@
+from __future__ import annotations
+
+import json
+import random
+import time
+import tracemalloc
+from pathlib import Path
+import sys
+from typing import Callable
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from pydantic import TypeAdapter
+
+from app.api.responses import _compress, dumps, orjson
+from app.models.schemas import TrendSummary
+
+_KEYWORDS = ["inflation", "elections", "layoffs", "climate", "launch week", "ai releases"]
+
+
+def build_rows(size: int = 100_000, seed: int = 7) -> list[dict]:
+    rng = random.Random(seed)
+    rows = []
+    for index in range(size):
+        hour = index % 168
+        rows.append(
+            {
+                "timestamp": f"2024-05-{1 + hour // 24:02d}T{hour % 24:02d}:00:00+00:00",
+                "keyword": f"{rng.choice(_KEYWORDS)} {index % 997}",
+                "velocity": round(rng.uniform(-1, 8), 4),
+                "spike": round(rng.uniform(0, 9), 4),
+                "raw_mentions": rng.randint(5, 400),
+                "weighted_mentions": round(rng.uniform(5, 900), 4),
+                "previous_mentions": rng.randint(0, 200),
+                "window_start": f"2024-05-{1 + hour // 24:02d}T{hour % 24:02d}:00:00+00:00",
+                "window_end": f"2024-05-{1 + hour // 24:02d}T{hour % 24:02d}:00:00+00:00",
+            }
+        )
+    return rows
+
+
+_ADAPTER = TypeAdapter(list[TrendSummary])
+
+
+def legacy_render(rows: list[dict]) -> bytes:
+    models = [TrendSummary(**row) for row in rows]
+    validated = _ADAPTER.validate_python(models)
+    content = _ADAPTER.dump_python(validated, mode="json")
+    return json.dumps(
+        content, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")
+    ).encode("utf-8")
+
+
+def fast_render(rows: list[dict]) -> bytes:
+    return dumps(rows)
+
+
+def measure(render: Callable[[list[dict]], bytes], rows: list[dict]) -> tuple[float, float, int]:
+    best = float("inf")
+    for _ in range(3):
+        started = time.perf_counter()
+        body = render(rows)
+        best = min(best, time.perf_counter() - started)
+    tracemalloc.start()
+    render(rows)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return best, peak / 1024 / 1024, len(body)
+
+
+def main() -> None:
+    rows = build_rows()
+    assert json.loads(legacy_render(rows)) == json.loads(fast_render(rows))
+    legacy, legacy_peak, size = measure(legacy_render, rows)
+    fast, fast_peak, _ = measure(fast_render, rows)
+    print(f"rows={len(rows)} body={size / 1024 / 1024:.1f}MiB encoder={'orjson' if orjson else 'json'}")
+    print(f"legacy={legacy * 1000:.0f}ms peak={legacy_peak:.0f}MiB")
+    print(f"fast={fast * 1000:.0f}ms peak={fast_peak:.0f}MiB speedup={legacy / fast:.1f}x")
+    body = fast_render(rows)
+    started = time.perf_counter()
+    compressed = _compress(body, "gzip")
+    print(
+        f"gzip={(time.perf_counter() - started) * 1000:.0f}ms "
+        f"ratio={len(body) / len(compressed):.1f}x (paid once per data generation)"
+    )
+
+
+if __name__ == "__main__":
+    main()
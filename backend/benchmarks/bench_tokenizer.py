@@ -0,0 +1,61 @@
+from __future__ import annotations
+
+import random
+import re
+import timeit
+from pathlib import Path
+import sys
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from app.services.nlp import filter_stopwords, tokenize
+from app.services.tokenizer import extract_post_terms
+
+_URL_PATTERN = re.compile(r"https?://\S+", re.IGNORECASE)
+_DENYLIST = {"says", "said", "new", "original", "today", "breaking"}
+
+_WORDS = (
+    "the markets rallied after inflation data showed cooling prices while layoffs "
+    "continued across technology companies and climate negotiators said a new deal "
+    "was close; breaking: ai releases from several labs today, with 2024 benchmarks "
+    "and https://example.com/report?id=42 linked for details about elections"
+).split()
+
+
+def legacy_extract_post_terms(text: str) -> list[str]:
+    cleaned_text = _URL_PATTERN.sub(" ", text or "")
+    tokens = filter_stopwords(tokenize(cleaned_text))
+    cleaned = [
+        token
+        for token in tokens
+        if token.isalpha() and len(token) >= 4 and token not in _DENYLIST
+    ]
+    terms = list(cleaned)
+    if len(cleaned) > 1:
+        terms.extend(f"{cleaned[i]} {cleaned[i + 1]}" for i in range(len(cleaned) - 1))
+    return terms
+
+
+def build_corpus(size: int = 2000, seed: int = 7) -> list[str]:
+    rng = random.Random(seed)
+    return [
+        " ".join(rng.choice(_WORDS) for _ in range(rng.randint(8, 120)))
+        for _ in range(size)
+    ]
+
+
+def main() -> None:
+    corpus = build_corpus()
+    mismatches = sum(
+        1 for text in corpus if legacy_extract_post_terms(text) != extract_post_terms(text)
+    )
+    legacy = min(timeit.repeat(lambda: [legacy_extract_post_terms(t) for t in corpus], number=1, repeat=5))
+    fast = min(timeit.repeat(lambda: [extract_post_terms(t) for t in corpus], number=1, repeat=5))
+    print(f"posts={len(corpus)} mismatches={mismatches}")
+    print(f"legacy={legacy * 1000:.1f}ms fast={fast * 1000:.1f}ms speedup={legacy / fast:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
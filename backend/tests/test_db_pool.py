@@ -0,0 +1,104 @@
+from __future__ import annotations
+
+import threading
+
+import pytest
+
+from app.core.config import settings
+from app.db.database import (
+    get_connection,
+    get_data_generation,
+    get_pool_stats,
+    read_connection,
+    write_connection,
+)
+
+
+def test_reader_connection_reused_per_thread(temp_db):
+    with read_connection() as first:
+        pass
+    with read_connection() as second:
+        pass
+    assert first is second
+
+    other: dict[str, object] = {}
+
+    def worker() -> None:
+        with read_connection() as connection:
+            other["connection"] = connection
+
+    thread = threading.Thread(target=worker)
+    thread.start()
+    thread.join()
+    assert other["connection"] is not first
+
+
+def test_nested_writes_commit_once(temp_db):
+    commits_before = get_pool_stats()["commits"]
+    with write_connection() as outer:
+        outer.execute("INSERT INTO subreddits (name) VALUES ('outer');")
+        with write_connection() as inner:
+            assert inner is outer
+            inner.execute("INSERT INTO subreddits (name) VALUES ('inner');")
+        with read_connection() as reader:
+            assert reader is outer
+    assert get_pool_stats()["commits"] == commits_before + 1
+
+    with read_connection() as connection:
+        rows = connection.execute("SELECT name FROM subreddits ORDER BY name;").fetchall()
+    assert [row["name"] for row in rows] == ["inner", "outer"]
+
+
+def test_failed_write_rolls_back(temp_db):
+    with pytest.raises(RuntimeError):
+        with write_connection() as connection:
+            connection.execute("INSERT INTO subreddits (name) VALUES ('lost');")
+            raise RuntimeError("boom")
+
+    with read_connection() as connection:
+        row = connection.execute(
+            "SELECT COUNT(*) AS count FROM subreddits WHERE name = 'lost';"
+        ).fetchone()
+    assert row["count"] == 0
+    assert get_pool_stats()["rollbacks"] >= 1
+
+
+def test_database_stats_endpoint(client):
+    client.get("/raw/posts")
+    response = client.get("/meta/database")
+    assert response.status_code == 200
+    payload = response.json()
+    assert payload["readerCheckouts"] >= 1
+    assert payload["writerOpen"] in {True, False}
+
+
+def test_wal_mode_is_opt_in(temp_db, monkeypatch):
+    with read_connection() as connection:
+        mode = connection.execute("PRAGMA journal_mode;").fetchone()[0]
+    assert mode != "wal"
+
+    monkeypatch.setattr(settings, "sqlite_wal", True)
+    with read_connection() as connection:
+        mode = connection.execute("PRAGMA journal_mode;").fetchone()[0]
+        synchronous = connection.execute("PRAGMA synchronous;").fetchone()[0]
+    assert mode == "wal"
+    assert synchronous == 1
+    assert get_pool_stats()["wal"] is True
+
+
+def test_data_generation_follows_external_writers(temp_db, monkeypatch):
+    monkeypatch.setattr(settings, "data_generation_poll_seconds", 0.0)
+    generation = get_data_generation()
+    assert get_data_generation() == generation
+
+    with write_connection() as connection:
+        connection.execute("INSERT INTO subreddits (name) VALUES ('local');")
+    local = get_data_generation()
+    assert local == generation + 1
+
+    other = get_connection()
+    other.execute("UPDATE data_generation SET value = value + 1 WHERE id = 1;")
+    other.commit()
+    other.close()
+    assert get_data_generation() == local + 1
+    assert get_data_generation() == local + 1
@@ -1,6 +1,20 @@
 from __future__ import annotations
 
-from app.db.database import get_connection, init_db
+import asyncio
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app import worker
+from app.core.config import settings
+from app.db.database import (
+    SCHEMA_VERSION,
+    close_pool,
+    get_connection,
+    get_schema_version,
+    init_db,
+)
+from app.main import app
 
 
 def test_db_schema_tables_and_columns(temp_db):
@@ -36,3 +50,76 @@ def test_db_schema_tables_and_columns(temp_db):
     assert "event_id" in columns
 
     connection.close()
+
+
+def test_epoch_columns_are_backfilled(temp_db):
+    connection = get_connection()
+    connection.execute("INSERT INTO subreddits (name) VALUES ('news');")
+    connection.execute(
+        """
+        INSERT INTO posts (id, timestamp, subreddit_id, title, body, score, comment_count)
+        VALUES ('p1', '2024-05-01T10:15:30.123456+00:00', 1, 't', 'b', 1, 0);
+        """
+    )
+    connection.execute(
+        """
+        INSERT INTO trend_snapshots (
+            id, timestamp, keyword_id, velocity, spike, context, raw_mentions,
+            window_start, window_end
+        ) VALUES (
+            't1', '2024-05-01T11:00:00+00:00', 1, 0, 1, 'global', 5,
+            '2024-05-01T10:00:00+00:00', '2024-05-01T11:00:00+00:00'
+        );
+        """
+    )
+    connection.commit()
+    connection.close()
+
+    init_db()
+
+    connection = get_connection()
+    post = connection.execute("SELECT ts_epoch, hour_bucket FROM posts").fetchone()
+    trend = connection.execute(
+        "SELECT ts_epoch, window_start_epoch, window_end_epoch FROM trend_snapshots"
+    ).fetchone()
+    plan = " ".join(
+        row["detail"]
+        for row in connection.execute(
+            """
+            EXPLAIN QUERY PLAN
+            SELECT hour_bucket, COUNT(*) FROM posts
+            WHERE hour_bucket >= ? AND ts_epoch >= ?
+            GROUP BY hour_bucket
+            """,
+            (0, 0),
+        )
+    )
+    connection.close()
+
+    assert (post["ts_epoch"], post["hour_bucket"]) == (1714558530, 1714557600)
+    assert tuple(trend) == (1714561200, 1714557600, 1714561200)
+    assert "idx_posts" in plan
+
+
+def test_api_without_embedded_worker_does_not_migrate(temp_db, monkeypatch):
+    def forbidden_init_db():
+        raise AssertionError("the API must not migrate the database")
+
+    monkeypatch.setattr(settings, "embedded_worker", False)
+    monkeypatch.setattr(worker, "init_db", forbidden_init_db)
+
+    assert get_schema_version() == SCHEMA_VERSION
+    with TestClient(app) as client:
+        assert client.get("/health").status_code == 200
+
+
+def test_api_refuses_unmigrated_database(tmp_path, monkeypatch):
+    fresh = tmp_path / "fresh.db"
+    monkeypatch.setattr(settings, "database_url", f"sqlite:///{fresh.as_posix()}")
+    monkeypatch.setattr(settings, "schema_wait_seconds", 0.0)
+    try:
+        with pytest.raises(RuntimeError, match="schema version 0"):
+            asyncio.run(worker.wait_for_database())
+        assert get_schema_version() == 0
+    finally:
+        close_pool()
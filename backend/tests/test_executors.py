@@ -0,0 +1,123 @@
+from __future__ import annotations
+
+import asyncio
+import os
+import threading
+import time
+
+import pytest
+
+from app.core import executors
+from app.core.executors import TrackedExecutor, get_loop_lag_stats, monitor_loop_lag, run_db
+
+
+def _fresh_lag(monkeypatch) -> None:
+    monkeypatch.setattr(
+        executors,
+        "_loop_lag",
+        {
+            "samples": 0,
+            "last_seconds": 0.0,
+            "max_seconds": 0.0,
+            "total_seconds": 0.0,
+            "slow_ticks": 0,
+        },
+    )
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("anyio_backend", ["asyncio"])
+async def test_db_calls_share_one_thread():
+    threads: set[int] = set()
+    active = 0
+    overlap = False
+
+    def work(value: int) -> int:
+        nonlocal active, overlap
+        active += 1
+        overlap = overlap or active > 1
+        threads.add(threading.get_ident())
+        time.sleep(0.01)
+        active -= 1
+        return value * 2
+
+    results = await asyncio.gather(*(run_db(work, value) for value in range(5)))
+
+    assert results == [0, 2, 4, 6, 8]
+    assert len(threads) == 1 and threading.get_ident() not in threads
+    assert not overlap
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("anyio_backend", ["asyncio"])
+async def test_executor_tracks_failures_and_waits():
+    executor = TrackedExecutor("test", 1)
+
+    def fail() -> None:
+        raise RuntimeError("boom")
+
+    try:
+        with pytest.raises(RuntimeError):
+            await executor.run(fail)
+        await asyncio.gather(executor.run(time.sleep, 0.05), executor.run(time.sleep, 0.0))
+    finally:
+        executor.shutdown()
+
+    stats = executor.stats()
+    assert stats["calls"] == 3
+    assert stats["failures"] == 1
+    assert stats["pending"] == 0
+    assert stats["max_wait_seconds"] >= 0.04
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("anyio_backend", ["asyncio"])
+async def test_process_executor_runs_outside_this_process():
+    executor = TrackedExecutor("test", 2, processes=True)
+    try:
+        pids = await asyncio.gather(*(executor.run(os.getpid) for _ in range(4)))
+        with pytest.raises(ValueError):
+            await executor.run(int, "not a number")
+    finally:
+        executor.shutdown()
+
+    assert os.getpid() not in pids
+    stats = executor.stats()
+    assert stats["kind"] == "process"
+    assert stats["calls"] == 5
+    assert stats["failures"] == 1
+    assert stats["pending"] == 0
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("anyio_backend", ["asyncio"])
+async def test_loop_monitor_sees_blocking_calls_only(monkeypatch):
+    _fresh_lag(monkeypatch)
+    monitor = asyncio.create_task(monitor_loop_lag(0.02, 0.1))
+    try:
+        await asyncio.sleep(0.05)
+        await run_db(time.sleep, 0.3)
+        assert get_loop_lag_stats()["max_seconds"] < 0.1
+
+        time.sleep(0.3)
+        await asyncio.sleep(0.05)
+    finally:
+        monitor.cancel()
+
+    stats = get_loop_lag_stats()
+    assert stats["max_seconds"] >= 0.2
+    assert stats["slow_ticks"] == 1
+
+
+def test_runtime_endpoint(client):
+    response = client.get("/meta/runtime")
+    assert response.status_code == 200
+    payload = response.json()
+    assert [executor["name"] for executor in payload["executors"]] == ["db", "blocking", "cpu"]
+    assert [executor["kind"] for executor in payload["executors"]] == [
+        "thread",
+        "thread",
+        "process",
+    ]
+    assert payload["executors"][0]["workers"] == 1
+    assert "maxLagSeconds" in payload["eventLoop"]
@@ -0,0 +1,50 @@
+from __future__ import annotations
+
+import pytest
+
+from app.db.database import read_connection, write_connection
+from app.repositories.keywords import get_or_create_keyword_id, keyword_ids, resolve_keyword_ids
+from app.repositories.subreddits import resolve_subreddit_ids
+
+
+def test_bulk_resolution_matches_table(temp_db):
+    ids = resolve_keyword_ids(["alpha", "beta", "gamma", ""])
+    assert set(ids) == {"alpha", "beta", "gamma"}
+    assert len(set(ids.values())) == 3
+
+    with read_connection() as connection:
+        rows = connection.execute(
+            "SELECT id, phrase FROM keywords WHERE phrase IN ('alpha', 'beta', 'gamma');"
+        ).fetchall()
+    assert {row["phrase"]: row["id"] for row in rows} == ids
+    assert get_or_create_keyword_id("beta") == ids["beta"]
+
+
+def test_cache_serves_repeat_lookups(temp_db):
+    resolve_subreddit_ids(["technology", "science"])
+    hits_before = keyword_ids.stats()["hits"]
+    first = resolve_keyword_ids(["cached"])
+    second = resolve_keyword_ids(["cached"])
+    assert first == second
+    assert keyword_ids.stats()["hits"] == hits_before + 1
+
+
+def test_rollback_discards_cached_ids(temp_db):
+    with pytest.raises(RuntimeError):
+        with write_connection():
+            resolve_keyword_ids(["ephemeral"])
+            raise RuntimeError("abort cycle")
+
+    assert keyword_ids.stats()["size"] == 0
+    with read_connection() as connection:
+        row = connection.execute(
+            "SELECT COUNT(*) AS count FROM keywords WHERE phrase = 'ephemeral';"
+        ).fetchone()
+    assert row["count"] == 0
+
+
+def test_warm_loads_existing_rows(temp_db):
+    keyword_ids.clear()
+    size = keyword_ids.warm()
+    assert size >= 1
+    assert keyword_ids.stats()["size"] == size
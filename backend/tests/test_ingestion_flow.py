@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import time
 from datetime import datetime, timezone
 
 import pytest
@@ -7,6 +8,7 @@ import pytest
 from app.clients import reddit as reddit_module
 from app.core.config import settings
 from app.db.database import get_connection
+from app.services import ingestion as ingestion_service
 from app.services.ingestion import poll_reddit
 
 
@@ -19,11 +21,18 @@ def _count_rows(table: str) -> int:
     return int(row["count"])
 
 
+def _data_marker() -> int:
+    connection = get_connection()
+    row = connection.execute("SELECT value FROM data_generation WHERE id = 1;").fetchone()
+    connection.close()
+    return int(row["value"])
+
+
 @pytest.mark.anyio
 async def test_ingestion_persists_posts_sentiment_and_trends(monkeypatch, temp_db):
     settings.subreddits = "technology,science"
 
-    async def fake_fetch_new_posts(self, subreddit: str, limit: int = 50):
+    async def fake_fetch_new_posts(self, subreddit: str, limit: int = 50, cursor=None):
         now = datetime.now(tz=timezone.utc).timestamp()
         return [
             {
@@ -43,3 +52,375 @@ async def test_ingestion_persists_posts_sentiment_and_trends(monkeypatch, temp_d
     assert _count_rows("posts") == 2
     assert _count_rows("sentiment_series") >= 2
     assert _count_rows("trend_snapshots") >= 1
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("anyio_backend", ["asyncio"])
+async def test_ingestion_scores_each_post_once(monkeypatch, temp_db):
+    from app.services import sentiment as sentiment_service
+
+    settings.subreddits = "technology"
+    created = datetime.now(tz=timezone.utc).timestamp()
+
+    async def fake_fetch_new_posts(self, subreddit: str, limit: int = 50, cursor=None):
+        return [
+            {
+                "id": f"{subreddit}-{index}",
+                "created_utc": created,
+                "title": f"Great launch {index}",
+                "selftext": "wonderful results",
+                "score": 1,
+                "num_comments": 0,
+            }
+            for index in range(3)
+        ]
+
+    scored: list[str] = []
+    original = sentiment_service._analyze
+
+    def counting_score(text: str) -> dict[str, float]:
+        scored.append(text)
+        return original(text)
+
+    monkeypatch.setattr(reddit_module.RedditClient, "fetch_new_posts", fake_fetch_new_posts)
+    monkeypatch.setattr(sentiment_service, "_analyze", counting_score)
+
+    await poll_reddit()
+    assert len(scored) == 3
+
+    await poll_reddit()
+    assert len(scored) == 3
+    assert _count_rows("sentiment_series") == 2
+
+
+class FakeRedditClient:
+    def __init__(
+        self, delays: dict[str, float], failing: set[str], num_comments: int = 0
+    ) -> None:
+        self.delays = delays
+        self.failing = failing
+        self.num_comments = num_comments
+        self.active = 0
+        self.max_active = 0
+        self.comment_requests: list[str] = []
+        self.engagement: dict[str, tuple[int, int]] = {}
+        self.remaining: float | None = None
+
+    async def fetch_new_posts(self, subreddit: str, limit: int = 50, cursor=None):
+        import asyncio
+
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        try:
+            await asyncio.sleep(self.delays.get(subreddit, 0.01))
+            if subreddit in self.failing:
+                raise RuntimeError("boom")
+            return [
+                {
+                    "id": f"{subreddit}-1",
+                    "created_utc": datetime.now(tz=timezone.utc).timestamp(),
+                    "title": f"{subreddit} update",
+                    "selftext": "",
+                    "score": 1,
+                    "num_comments": self.num_comments,
+                }
+            ]
+        finally:
+            self.active -= 1
+
+    async def fetch_top_comments(self, post_id: str, limit: int = 25):
+        self.comment_requests.append(post_id)
+        return [
+            {
+                "id": f"{post_id}-c{index}",
+                "created_utc": datetime.now(tz=timezone.utc).timestamp(),
+                "body": "wonderful excellent reporting",
+                "score": 3,
+            }
+            for index in range(2)
+        ]
+
+    async def fetch_engagement(self, post_ids):
+        return {
+            post_id: self.engagement[post_id]
+            for post_id in post_ids
+            if post_id in self.engagement
+        }
+
+    def rate_limit_remaining(self):
+        return self.remaining
+
+    def end_cycle(self) -> int:
+        return 0
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("anyio_backend", ["asyncio"])
+async def test_ingestion_fetches_concurrently_and_tolerates_failures(monkeypatch, temp_db):
+    monkeypatch.setattr(settings, "subreddits", "a,b,c,slow,broken")
+    monkeypatch.setattr(settings, "reddit_fetch_concurrency", 2)
+    monkeypatch.setattr(settings, "reddit_fetch_timeout_seconds", 0.2)
+    client = FakeRedditClient(delays={"slow": 5.0}, failing={"broken"})
+
+    posts = await poll_reddit(client)
+
+    assert sorted(posts) == ["a-1", "b-1", "c-1"]
+    assert client.max_active == 2
+    assert _count_rows("posts") == 3
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("anyio_backend", ["asyncio"])
+async def test_ingestion_fetch_concurrency_follows_rate_limit(monkeypatch, temp_db):
+    monkeypatch.setattr(settings, "subreddits", "a,b,c,d")
+    monkeypatch.setattr(settings, "reddit_fetch_concurrency", 4)
+    client = FakeRedditClient(delays={}, failing=set())
+    client.remaining = 1.0
+
+    posts = await poll_reddit(client)
+
+    assert sorted(posts) == ["a-1", "b-1", "c-1", "d-1"]
+    assert client.max_active == 1
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("anyio_backend", ["asyncio"])
+async def test_ingestion_persists_fetch_cursors(monkeypatch, temp_db):
+    monkeypatch.setattr(settings, "subreddits", "a,b")
+    client = FakeRedditClient(delays={}, failing=set())
+    seen: list = []
+    original = client.fetch_new_posts
+
+    async def recording_fetch(subreddit: str, limit: int = 50, cursor=None):
+        seen.append((subreddit, limit, cursor))
+        return await original(subreddit, limit, cursor)
+
+    client.fetch_new_posts = recording_fetch
+
+    await poll_reddit(client)
+    assert all(cursor is None for _, _, cursor in seen)
+
+    seen.clear()
+    await poll_reddit(client)
+    cursors = {subreddit: (limit, cursor) for subreddit, limit, cursor in seen}
+    assert cursors["a"][1].last_fullname == "t3_a-1"
+    assert cursors["b"][1].last_fullname == "t3_b-1"
+    assert cursors["a"][0] == 10
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("anyio_backend", ["asyncio"])
+async def test_ingestion_crawls_comments_within_budget(monkeypatch, temp_db):
+    monkeypatch.setattr(settings, "subreddits", "a,b")
+    monkeypatch.setattr(settings, "comment_min_comments", 20)
+    monkeypatch.setattr(settings, "comment_posts_per_cycle", 1)
+    client = FakeRedditClient(delays={}, failing=set(), num_comments=30)
+
+    await poll_reddit(client)
+    assert len(client.comment_requests) == 1
+    assert _count_rows("comments") == 2
+
+    await poll_reddit(client)
+    assert len(client.comment_requests) == 2
+    assert _count_rows("comments") == 4
+
+    await poll_reddit(client)
+    assert len(client.comment_requests) == 2
+
+    connection = get_connection()
+    rows = connection.execute(
+        "SELECT sentiment_compound, terms_indexed FROM comments"
+    ).fetchall()
+    connection.close()
+    assert all(row["sentiment_compound"] > 0 for row in rows)
+    assert all(row["terms_indexed"] == 1 for row in rows)
+
+
+def _fresh_posts(count: int, num_comments: int = 30) -> list:
+    from app.models.schemas import PostIn
+
+    now = datetime.now(tz=timezone.utc).isoformat()
+    return [
+        PostIn(
+            id=f"c{index}",
+            timestamp=now,
+            subreddit="a",
+            title="comment crawl",
+            body="",
+            score=1,
+            comment_count=num_comments,
+        )
+        for index in range(count)
+    ]
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("anyio_backend", ["asyncio"])
+async def test_comment_crawl_stops_scheduling_when_rate_limit_runs_short(
+    monkeypatch, temp_db
+):
+    from app.services.comments import crawl_comments
+
+    monkeypatch.setattr(settings, "comment_min_comments", 20)
+    monkeypatch.setattr(settings, "comment_posts_per_cycle", 10)
+    monkeypatch.setattr(settings, "comment_min_ratelimit_remaining", 100)
+    monkeypatch.setattr(settings, "reddit_fetch_concurrency", 1)
+    client = FakeRedditClient(delays={}, failing=set())
+    client.remaining = 500.0
+    original = client.fetch_top_comments
+
+    async def draining_fetch(post_id: str, limit: int = 25):
+        if len(client.comment_requests) == 2:
+            client.remaining = 99.0
+        return await original(post_id, limit)
+
+    client.fetch_top_comments = draining_fetch
+    comments, crawled = await crawl_comments(client, _fresh_posts(6))
+
+    assert len(client.comment_requests) == 3
+    assert len(crawled) == 3
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("anyio_backend", ["asyncio"])
+async def test_comment_crawl_lets_inflight_fetches_finish_after_deadline(
+    monkeypatch, temp_db
+):
+    import asyncio
+
+    from app.services.comments import crawl_comments
+
+    monkeypatch.setattr(settings, "comment_min_comments", 20)
+    monkeypatch.setattr(settings, "comment_posts_per_cycle", 10)
+    monkeypatch.setattr(settings, "comment_budget_seconds", 0.05)
+    monkeypatch.setattr(settings, "reddit_fetch_concurrency", 2)
+    client = FakeRedditClient(delays={}, failing=set())
+    original = client.fetch_top_comments
+    finished: list[str] = []
+
+    async def slow_fetch(post_id: str, limit: int = 25):
+        await asyncio.sleep(0.1)
+        items = await original(post_id, limit)
+        finished.append(post_id)
+        return items
+
+    client.fetch_top_comments = slow_fetch
+    comments, crawled = await crawl_comments(client, _fresh_posts(6))
+
+    assert len(client.comment_requests) == 2
+    assert sorted(finished) == sorted(client.comment_requests)
+    assert len(crawled) == 2
+    assert len(comments) == 4
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("anyio_backend", ["asyncio"])
+async def test_ingestion_refreshes_engagement_and_term_weights(monkeypatch, temp_db):
+    import math
+
+    monkeypatch.setattr(settings, "subreddits", "a,b")
+    client = FakeRedditClient(delays={}, failing=set())
+    await poll_reddit(client)
+
+    client.failing = {"a", "b"}
+    client.engagement = {"a-1": (10, 5)}
+    await poll_reddit(client)
+
+    connection = get_connection()
+    posts = {
+        row["id"]: (row["score"], row["comment_count"])
+        for row in connection.execute("SELECT id, score, comment_count FROM posts")
+    }
+    weight = connection.execute(
+        "SELECT weighted_count FROM term_hour_counts WHERE term = 'update'"
+    ).fetchone()["weighted_count"]
+    connection.close()
+
+    assert posts == {"a-1": (10, 5), "b-1": (1, 0)}
+    assert weight == pytest.approx(math.log(16) + math.log(2))
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("anyio_backend", ["asyncio"])
+async def test_ingestion_scores_while_slower_subreddits_fetch(monkeypatch, temp_db):
+    monkeypatch.setattr(settings, "subreddits", "fast,slow")
+    client = FakeRedditClient(delays={"fast": 0.01, "slow": 0.5}, failing=set())
+    scored_at: dict[str, float] = {}
+    original = ingestion_service.fetch_post_sentiment
+
+    def recording_lookup(post_ids):
+        post_ids = list(post_ids)
+        scored_at[post_ids[0].split("-")[0]] = time.monotonic()
+        return original(post_ids)
+
+    monkeypatch.setattr(ingestion_service, "fetch_post_sentiment", recording_lookup)
+
+    started = time.monotonic()
+    assert sorted(await ingestion_service.poll_reddit(client)) == ["fast-1", "slow-1"]
+
+    assert scored_at["fast"] - started < 0.4
+    assert scored_at["slow"] - started >= 0.5
+    stats = {stage["name"]: stage for stage in ingestion_service.get_pipeline_stats()}
+    assert list(stats) == ["fetch", "normalize", "lookup", "score", "extract_terms", "aggregate"]
+    assert stats["aggregate"]["items"] == 2
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("anyio_backend", ["asyncio"])
+async def test_ingestion_cycle_commits_posts_once(monkeypatch, temp_db):
+    monkeypatch.setattr(settings, "subreddits", "fast,slow")
+    client = FakeRedditClient(delays={"fast": 0.01, "slow": 0.2}, failing=set())
+    marker = _data_marker()
+    visible_mid_cycle: list[int] = []
+    original = ingestion_service.fetch_post_sentiment
+
+    def observing_lookup(post_ids):
+        visible_mid_cycle.append(_count_rows("posts"))
+        return original(post_ids)
+
+    monkeypatch.setattr(ingestion_service, "fetch_post_sentiment", observing_lookup)
+
+    await ingestion_service.poll_reddit(client)
+
+    assert visible_mid_cycle == [0, 0]
+    assert _count_rows("posts") == 2
+    assert _count_rows("term_hour_counts") > 0
+    assert _data_marker() == marker + 1
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("anyio_backend", ["asyncio"])
+async def test_ingestion_holds_only_new_posts_until_commit(monkeypatch, temp_db):
+    monkeypatch.setattr(settings, "subreddits", "fast,slow")
+    client = FakeRedditClient(delays={"fast": 0.01, "slow": 0.02}, failing=set())
+    held: list[list[str]] = []
+    original = ingestion_service._commit_cycle
+
+    def recording_commit(totals, *args):
+        held.append(sorted(post.id for post in totals.posts))
+        return original(totals, *args)
+
+    monkeypatch.setattr(ingestion_service, "_commit_cycle", recording_commit)
+
+    await ingestion_service.poll_reddit(client)
+    assert sorted(await ingestion_service.poll_reddit(client)) == ["fast-1", "slow-1"]
+
+    assert held == [["fast-1", "slow-1"], []]
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("anyio_backend", ["asyncio"])
+async def test_ingestion_cycle_is_one_transaction(monkeypatch, temp_db):
+    monkeypatch.setattr(settings, "subreddits", "a,b")
+    client = FakeRedditClient(delays={}, failing=set())
+
+    def failing_detections(end):
+        raise RuntimeError("detection failed")
+
+    monkeypatch.setattr(ingestion_service, "store_window_detections", failing_detections)
+    with pytest.raises(RuntimeError):
+        await ingestion_service.poll_reddit(client)
+
+    assert _count_rows("posts") == 0
+    assert _count_rows("term_hour_counts") == 0
+    assert _count_rows("subreddit_fetch_cursors") == 0
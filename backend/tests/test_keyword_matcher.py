@@ -0,0 +1,111 @@
+from __future__ import annotations
+
+from datetime import datetime, timezone
+
+from app.models.schemas import PostIn
+from app.repositories.keywords import resolve_keyword_ids
+from app.repositories.posts import store_posts
+from app.db.database import get_connection
+from app.services.keyword_matcher import KeywordMatcher, get_keyword_matcher, index_post_keywords
+
+
+def test_matcher_counts_multi_word_phrases():
+    matcher = KeywordMatcher(
+        [(1, "ai releases"), (2, "ai"), (3, "launch-week"), (4, "climate")]
+    )
+    counts = matcher.match("New AI releases! Launch week recap: ai releases, AI, climate-ai")
+    assert counts[1] == 2
+    assert counts[2] == 4
+    assert counts[3] == 1
+    assert counts[4] == 1
+    assert matcher.size == 4
+
+
+def test_index_post_keywords_fills_join_table(client):
+    now = datetime.now(tz=timezone.utc).isoformat()
+    store_posts(
+        [
+            PostIn(
+                id="k1",
+                timestamp=now,
+                subreddit="technology",
+                title="Big AI releases this week",
+                body="More ai releases and inflation worries",
+                score=4,
+                comment_count=1,
+            )
+        ]
+    )
+
+    assert index_post_keywords() == 1
+    assert index_post_keywords() == 0
+
+    ids = resolve_keyword_ids(["ai releases", "inflation"])
+    connection = get_connection()
+    cursor = connection.cursor()
+    cursor.execute("SELECT keyword_id, count FROM post_keywords WHERE post_id = 'k1';")
+    rows = {row["keyword_id"]: row["count"] for row in cursor.fetchall()}
+    connection.close()
+    assert rows[ids["ai releases"]] == 2
+    assert rows[ids["inflation"]] == 1
+
+    response = client.get("/analytics/events/ai releases?hours=1")
+    assert response.status_code == 200
+    assert response.json()["volumeTrend"]
+
+
+def test_new_keywords_rescan_recent_posts(temp_db):
+    now = datetime.now(tz=timezone.utc).isoformat()
+    store_posts(
+        [
+            PostIn(
+                id="k2",
+                timestamp=now,
+                subreddit="science",
+                title="Telescope photos",
+                body="telescope upgrade",
+                score=1,
+                comment_count=0,
+            )
+        ]
+    )
+    index_post_keywords()
+    telescope_id = resolve_keyword_ids(["telescope"])["telescope"]
+    assert index_post_keywords() == 1
+
+    connection = get_connection()
+    cursor = connection.cursor()
+    cursor.execute(
+        "SELECT count FROM post_keywords WHERE post_id = 'k2' AND keyword_id = ?;",
+        (telescope_id,),
+    )
+    row = cursor.fetchone()
+    connection.close()
+    assert row["count"] == 2
+
+
+def test_new_keywords_extend_matcher_and_skip_unrelated_posts(temp_db):
+    now = datetime.now(tz=timezone.utc).isoformat()
+    store_posts(
+        [
+            PostIn(id="k3", timestamp=now, subreddit="science", title="Comet sighting"),
+            PostIn(id="k4", timestamp=now, subreddit="science", title="Budget vote"),
+        ]
+    )
+    index_post_keywords()
+    matcher = get_keyword_matcher()
+    size = matcher.size
+
+    comet_id = resolve_keyword_ids(["comet"])["comet"]
+    assert index_post_keywords() == 1
+    assert get_keyword_matcher() is matcher
+    assert matcher.size == size + 1
+
+    connection = get_connection()
+    cursor = connection.cursor()
+    cursor.execute("SELECT post_id FROM post_keywords WHERE keyword_id = ?;", (comet_id,))
+    assert [row["post_id"] for row in cursor.fetchall()] == ["k3"]
+    cursor.execute("SELECT DISTINCT keyword_version FROM posts;")
+    versions = [row["keyword_version"] for row in cursor.fetchall()]
+    connection.close()
+    assert versions == [matcher.version]
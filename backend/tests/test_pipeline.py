@@ -0,0 +1,52 @@
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+
+from app.services.pipeline import Pipeline, Stage
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("anyio_backend", ["asyncio"])
+async def test_bounded_queues_apply_backpressure():
+    seen: list[int] = []
+
+    async def double(item: int) -> int:
+        return item * 2
+
+    async def slow_sink(item: int) -> None:
+        await asyncio.sleep(0.01)
+        seen.append(item)
+
+    pipeline = Pipeline(
+        [Stage("double", double, queue_size=1), Stage("sink", slow_sink, queue_size=1)]
+    )
+
+    async def source(emit) -> None:
+        for item in range(6):
+            await emit(item)
+
+    await pipeline.run(source)
+
+    assert seen == [0, 2, 4, 6, 8, 10]
+    stats = {stage["name"]: stage for stage in pipeline.stats()}
+    assert stats["fetch"]["batches"] == 6
+    assert stats["sink"]["batches"] == 6
+    assert stats["double"]["max_queue_depth"] <= 1
+    assert stats["sink"]["max_queue_depth"] <= 1
+    assert stats["fetch"]["blocked_seconds"] > 0
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("anyio_backend", ["asyncio"])
+async def test_stage_failure_stops_pipeline():
+    async def explode(item: int) -> int:
+        raise ValueError("bad item")
+
+    async def source(emit) -> None:
+        for item in range(100):
+            await emit(item)
+
+    with pytest.raises(ValueError):
+        await asyncio.wait_for(Pipeline([Stage("explode", explode, queue_size=1)]).run(source), 5)
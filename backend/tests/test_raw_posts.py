@@ -1,7 +1,10 @@
 from __future__ import annotations
 
+import json
 from datetime import datetime, timezone
 
+from app.core.config import settings
+
 from app.models.schemas import PostIn
 from app.repositories.posts import store_posts
 
@@ -33,3 +36,57 @@ def test_raw_posts_with_data(client):
     data = response.json()
     assert len(data) == 1
     assert data[0]["id"] == "post-1"
+
+
+def _store_history(count: int) -> None:
+    store_posts(
+        [
+            PostIn(
+                id=f"post-{index:03d}",
+                timestamp=f"2024-05-01T{index // 4:02d}:00:00+00:00",
+                subreddit="news" if index % 2 else "technology",
+                title=f"Post {index}",
+                score=index,
+            )
+            for index in range(count)
+        ]
+    )
+
+
+def test_raw_posts_keyset_pagination(client):
+    _store_history(25)
+
+    seen: list[str] = []
+    url = "/raw/posts?limit=10"
+    while True:
+        response = client.get(url)
+        assert response.status_code == 200
+        seen.extend(item["id"] for item in response.json())
+        cursor = response.headers.get("x-next-cursor")
+        if not cursor:
+            break
+        url = f"/raw/posts?limit=10&cursor={cursor}"
+
+    assert seen == sorted((f"post-{index:03d}" for index in range(25)), reverse=True)
+    assert client.get("/raw/posts?cursor=not-a-cursor").status_code == 400
+
+
+def test_raw_posts_export_streams_ndjson(client, monkeypatch):
+    monkeypatch.setattr(settings, "raw_export_batch_size", 3)
+    _store_history(25)
+
+    response = client.get(
+        "/raw/posts/export?subreddit=news&since=2024-05-01T01:00:00Z&until=2024-05-01T05:00:00Z"
+    )
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+    assert response.headers["content-encoding"] == "gzip"
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert [row["id"] for row in rows] == [
+        f"post-{index:03d}" for index in range(4, 20) if index % 2
+    ]
+    assert {row["subreddit"] for row in rows} == {"news"}
+
+    plain = client.get("/raw/posts/export", headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in plain.headers
+    assert len(plain.text.splitlines()) == 25
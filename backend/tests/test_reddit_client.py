@@ -0,0 +1,161 @@
+from __future__ import annotations
+
+import threading
+import time
+from types import SimpleNamespace
+
+from app.clients import reddit as reddit_module
+from app.clients.reddit import (
+    RedditClient,
+    RequestStats,
+    _CountingRequestor,
+    _InstancePool,
+    fetch_concurrency,
+)
+from app.core.config import settings
+from app.models.schemas import FetchCursor
+
+
+class FakeSubreddit:
+    def __init__(self, submissions, calls):
+        self.submissions = submissions
+        self.calls = calls
+
+    def new(self, limit=100, params=None):
+        self.calls.append((limit, params))
+        start = 0
+        if params and params.get("after"):
+            start = [item.name for item in self.submissions].index(params["after"]) + 1
+        return iter(self.submissions[start : start + limit])
+
+
+def _client(count: int):
+    submissions = [
+        SimpleNamespace(
+            id=f"p{index}",
+            name=f"t3_p{index}",
+            created_utc=float(10_000 - index),
+            title=f"post {index}",
+            selftext="",
+            score=0,
+            num_comments=0,
+        )
+        for index in range(count)
+    ]
+    calls: list = []
+    client = RedditClient.__new__(RedditClient)
+    reddit = SimpleNamespace(subreddit=lambda name: FakeSubreddit(submissions, calls))
+    client._pool = _InstancePool(lambda: reddit, 1)
+    return client, calls
+
+
+def test_fetch_stops_at_cursor_without_extra_pages():
+    client, calls = _client(300)
+    cursor = FetchCursor(subreddit="news", last_fullname="t3_p7", last_created_utc=9_993.0)
+
+    items = client._fetch_new_posts_sync("news", 10, cursor)
+
+    assert [item["id"] for item in items] == [f"p{index}" for index in range(7)]
+    assert calls == [(10, None)]
+
+
+def test_fetch_pages_forward_until_cursor_is_reached():
+    client, calls = _client(300)
+    cursor = FetchCursor(subreddit="news", last_fullname="t3_p150", last_created_utc=9_850.0)
+
+    items = client._fetch_new_posts_sync("news", 20, cursor)
+
+    assert len(items) == 150
+    assert len({item["id"] for item in items}) == 150
+    assert calls == [(20, None), (100, {"after": "t3_p19"}), (100, {"after": "t3_p119"})]
+
+
+def test_fetch_uses_created_utc_when_cursor_post_is_gone():
+    client, _ = _client(50)
+    cursor = FetchCursor(subreddit="news", last_fullname="t3_deleted", last_created_utc=9_995.5)
+
+    items = client._fetch_new_posts_sync("news", 20, cursor)
+
+    assert [item["id"] for item in items] == [f"p{index}" for index in range(5)]
+
+
+class FakeSession:
+    def __init__(self, status_codes):
+        self.headers = {}
+        self.status_codes = list(status_codes)
+
+    def request(self, method, url, **kwargs):
+        return SimpleNamespace(status_code=self.status_codes.pop(0))
+
+    def close(self):
+        pass
+
+
+def test_counting_requestor_tracks_requests_per_cycle():
+    stats = RequestStats()
+    requestor = _CountingRequestor(
+        "reddit-trends/test", session=FakeSession([200, 200, 503]), stats=stats
+    )
+
+    requestor.request("POST", "https://www.reddit.com/api/v1/access_token")
+    requestor.request("GET", "https://oauth.reddit.com/r/news/new")
+    assert stats.end_cycle() == 2
+    requestor.request("GET", "https://oauth.reddit.com/r/news/new")
+    assert stats.end_cycle() == 1
+
+    snapshot = stats.snapshot()
+    assert snapshot["requests"] == 3
+    assert snapshot["errors"] == 1
+    assert snapshot["token_requests"] == 1
+    assert snapshot["cycles"] == 2
+
+
+def test_reddit_client_is_shared_until_closed(client):
+    reddit_module.close_reddit_client()
+    assert client.get("/meta/reddit").json()["active"] is False
+
+    first = reddit_module.get_reddit_client()
+    assert reddit_module.get_reddit_client() is first
+    assert client.get("/meta/reddit").json()["active"] is True
+
+    reddit_module.close_reddit_client()
+    assert reddit_module.get_reddit_client() is not first
+    reddit_module.close_reddit_client()
+
+
+def test_instance_pool_gives_each_thread_its_own_instance():
+    created: list[object] = []
+
+    def factory():
+        created.append(object())
+        return created[-1]
+
+    pool = _InstancePool(factory, 3)
+    held: list[object] = []
+    barrier = threading.Barrier(3)
+
+    def work():
+        with pool.checkout() as instance:
+            held.append(instance)
+            barrier.wait(timeout=5)
+            time.sleep(0.01)
+
+    threads = [threading.Thread(target=work) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(set(map(id, held))) == 3
+    with pool.checkout() as instance:
+        assert instance in created
+    assert len(created) == 3
+
+
+def test_fetch_concurrency_shrinks_with_rate_limit(monkeypatch):
+    monkeypatch.setattr(settings, "reddit_fetch_concurrency", 4)
+    assert fetch_concurrency(None) == 4
+    assert fetch_concurrency(500.0) == 4
+    assert fetch_concurrency(2.0) == 2
+    assert fetch_concurrency(103.0, reserve=100) == 3
+    assert fetch_concurrency(0.0) == 1
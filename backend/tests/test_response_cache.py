@@ -0,0 +1,150 @@
+from __future__ import annotations
+
+import threading
+
+import pytest
+
+from app.db.database import get_connection, get_data_generation, read_connection, write_connection
+from app.services.response_cache import ResponseCache
+
+
+def test_entries_are_scoped_to_data_generation(temp_db):
+    cache = ResponseCache(max_entries=8, ttl_seconds=0)
+    calls: list[int] = []
+
+    def compute() -> int:
+        calls.append(1)
+        return len(calls)
+
+    assert cache.get_or_compute("trends", 24, compute) == 1
+    assert cache.get_or_compute("trends", 24, compute) == 1
+
+    with read_connection() as connection:
+        connection.execute("SELECT COUNT(*) FROM posts;").fetchone()
+    with write_connection():
+        pass
+    assert cache.get_or_compute("trends", 24, compute) == 1
+
+    generation = get_data_generation()
+    with write_connection() as connection:
+        connection.execute("INSERT INTO subreddits (name) VALUES ('news');")
+    assert get_data_generation() == generation + 1
+    assert cache.get_or_compute("trends", 24, compute) == 2
+    assert cache.stats()["size"] == 1
+    assert cache.stats()["hits"] == 2
+
+
+def test_concurrent_misses_compute_once(temp_db):
+    cache = ResponseCache(max_entries=8, ttl_seconds=0)
+    release = threading.Event()
+    calls: list[int] = []
+
+    def compute() -> list[int]:
+        calls.append(1)
+        release.wait(5)
+        return [1, 2, 3]
+
+    results: list[list[int]] = []
+    threads = [
+        threading.Thread(target=lambda: results.append(cache.get_or_compute("dashboard", 24, compute)))
+        for _ in range(4)
+    ]
+    for thread in threads:
+        thread.start()
+    while cache.stats()["coalesced"] < 3:
+        threading.Event().wait(0.01)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert results == [[1, 2, 3]] * 4
+    assert cache.stats()["inflight"] == 0
+
+
+def test_failed_compute_is_not_cached(temp_db):
+    cache = ResponseCache(max_entries=8, ttl_seconds=0)
+
+    def fail() -> int:
+        raise RuntimeError("boom")
+
+    with pytest.raises(RuntimeError):
+        cache.get_or_compute("trends", 24, fail)
+    assert cache.get_or_compute("trends", 24, lambda: 7) == 7
+
+
+def test_cache_is_bounded(temp_db):
+    cache = ResponseCache(max_entries=2, ttl_seconds=0)
+    for hours in range(5):
+        cache.get_or_compute("trends", hours, lambda: hours)
+    assert cache.stats()["size"] == 2
+    assert cache.get_or_compute("trends", 4, lambda: -1) == 4
+    assert cache.get_or_compute("trends", 0, lambda: -1) == -1
+
+
+def test_response_cache_endpoint(client):
+    client.get("/analytics/trends?hours=1")
+    client.get("/analytics/trends?hours=1")
+    response = client.get("/meta/response-cache")
+    assert response.status_code == 200
+    payload = response.json()
+    assert payload["hits"] >= 1
+    assert payload["maxEntries"] > 0
+
+
+def test_conditional_get_returns_not_modified(client):
+    first = client.get("/analytics/dashboard?hours=1")
+    etag = first.headers["etag"]
+    assert etag.startswith('"')
+
+    repeat = client.get("/analytics/dashboard?hours=1", headers={"If-None-Match": etag})
+    assert repeat.status_code == 304
+    assert repeat.content == b""
+    assert repeat.headers["etag"] == etag
+
+    other = client.get("/analytics/dashboard?hours=2", headers={"If-None-Match": etag})
+    assert other.status_code == 200
+    assert other.headers["etag"] != etag
+
+    with write_connection() as connection:
+        connection.execute("INSERT INTO subreddits (name) VALUES ('news');")
+    changed = client.get("/analytics/dashboard?hours=1", headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.headers["etag"] != etag
+
+    raw = client.get("/raw/posts?limit=5")
+    assert client.get(
+        "/raw/posts?limit=5", headers={"If-None-Match": raw.headers["etag"]}
+    ).status_code == 304
+
+
+def test_etag_follows_shared_marker_not_local_generation(temp_db, monkeypatch):
+    from app.core.config import settings
+    from app.db import database
+    from app.services import response_cache
+    from app.services.response_cache import response_etag
+
+    monkeypatch.setattr(settings, "data_generation_poll_seconds", 0)
+    monkeypatch.setattr(response_cache.response_cache, "ttl_seconds", 0.01)
+    database.refresh_data_marker()
+    etag = response_etag("/analytics/trends", [("hours", "1")])
+    monkeypatch.setattr(database, "_data_generation", database._data_generation + 7)
+    threading.Event().wait(0.02)
+    assert response_etag("/analytics/trends", [("hours", "1")]) == etag
+
+    connection = get_connection()
+    connection.execute("UPDATE data_generation SET value = value + 1 WHERE id = 1;")
+    connection.commit()
+    connection.close()
+    assert response_etag("/analytics/trends", [("hours", "1")]) == etag
+    database.refresh_data_marker()
+    assert response_etag("/analytics/trends", [("hours", "1")]) != etag
+
+
+def test_export_stream_carries_etag(client):
+    first = client.get("/raw/posts/export")
+    assert first.status_code == 200
+    etag = first.headers["etag"]
+
+    repeat = client.get("/raw/posts/export", headers={"If-None-Match": etag})
+    assert repeat.status_code == 304
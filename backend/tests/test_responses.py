@@ -0,0 +1,87 @@
+from __future__ import annotations
+
+import json
+
+from app.api import responses
+from app.api.responses import negotiate_encoding
+from app.core.config import settings
+from app.db.database import write_connection
+
+
+def test_negotiate_encoding_respects_quality():
+    assert negotiate_encoding("") == "identity"
+    assert negotiate_encoding("gzip, deflate") == "gzip"
+    assert negotiate_encoding("gzip;q=0, deflate") == "identity"
+
+
+def test_dumps_falls_back_to_stdlib(monkeypatch):
+    rows = [{"keyword": "café", "spike": 1.5, "raw_mentions": None}]
+    fast = responses.dumps(rows)
+    monkeypatch.setattr(responses, "orjson", None)
+    assert json.loads(responses.dumps(rows)) == json.loads(fast) == rows
+
+
+def test_list_endpoint_serves_rows_and_compresses(client, monkeypatch):
+    with write_connection() as connection:
+        connection.execute("INSERT INTO subreddits (name) VALUES ('news');")
+        connection.executemany(
+            """
+            INSERT INTO posts (id, timestamp, subreddit_id, title, body, score, comment_count)
+            VALUES (?, '2024-05-01T10:00:00+00:00', 1, 'title', 'body', 3, 1);
+            """,
+            [(f"p{index}",) for index in range(20)],
+        )
+
+    plain = client.get("/raw/posts?limit=20", headers={"Accept-Encoding": "identity"})
+    assert plain.status_code == 200
+    assert plain.headers["content-type"] == "application/json"
+    assert "content-encoding" not in plain.headers
+    rows = plain.json()
+    assert len(rows) == 20
+    assert rows[0]["subreddit"] == "news"
+
+    monkeypatch.setattr(settings, "response_compress_min_bytes", 1)
+    packed = client.get("/raw/posts?limit=20", headers={"Accept-Encoding": "gzip"})
+    assert packed.headers["content-encoding"] == "gzip"
+    assert packed.headers["etag"] == f"W/{plain.headers['etag']}"
+    assert packed.json() == rows
+
+    revalidated = client.get(
+        "/raw/posts?limit=20",
+        headers={"Accept-Encoding": "gzip", "If-None-Match": packed.headers["etag"]},
+    )
+    assert revalidated.status_code == 304
+
+
+def test_compressed_variant_shares_identity_generation(client, monkeypatch):
+    from app.api.routes import raw as raw_routes
+
+    with write_connection() as connection:
+        connection.execute("INSERT INTO subreddits (name) VALUES ('news');")
+        connection.execute(
+            """
+            INSERT INTO posts (id, timestamp, subreddit_id, title, body, score, comment_count)
+            VALUES ('p0', '2024-05-01T10:00:00+00:00', 1, 'title', 'body', 3, 1);
+            """
+        )
+    original = raw_routes.fetch_posts
+    calls: list[int] = []
+
+    def racing_fetch(*args, **kwargs):
+        rows = original(*args, **kwargs)
+        if not calls:
+            with write_connection() as connection:
+                connection.execute(
+                    """
+                    INSERT INTO posts (id, timestamp, subreddit_id, title, score)
+                    VALUES ('p1', '2024-05-01T11:00:00+00:00', 1, 'title', 3);
+                    """
+                )
+        calls.append(1)
+        return rows
+
+    monkeypatch.setattr(raw_routes, "fetch_posts", racing_fetch)
+    monkeypatch.setattr(settings, "response_compress_min_bytes", 1)
+    headers = {"Accept-Encoding": "gzip"}
+    assert len(client.get("/raw/posts?limit=20", headers=headers).json()) == 1
+    assert len(client.get("/raw/posts?limit=20", headers=headers).json()) == 2
@@ -0,0 +1,113 @@
+from __future__ import annotations
+
+from datetime import datetime, timedelta, timezone
+from uuid import uuid4
+
+from app.db.database import get_connection, write_connection
+from app.models.schemas import PostIn, SentimentRecord, TrendSnapshotRecord
+from app.repositories.dashboard import fetch_kpis_window, fetch_volume_series
+from app.repositories.keywords import get_or_create_keyword_id
+from app.repositories.posts import store_posts
+from app.repositories.rollups import rebuild_rollups
+from app.repositories.sentiment import store_sentiment
+from app.repositories.subreddits import get_or_create_subreddit_id
+from app.repositories.trends import store_trends
+
+
+def _post(post_id: str, when: datetime, subreddit: str) -> PostIn:
+    return PostIn(
+        id=post_id,
+        timestamp=when.isoformat(),
+        subreddit=subreddit,
+        title="title",
+        body="body",
+    )
+
+
+def _rollup_rows() -> list[tuple]:
+    connection = get_connection()
+    rows = [
+        tuple(row)
+        for row in connection.execute(
+            "SELECT * FROM hourly_rollups ORDER BY hour_bucket"
+        ).fetchall()
+    ]
+    connection.close()
+    return rows
+
+
+def test_rollups_track_ingest_writes(temp_db):
+    now = datetime.now(tz=timezone.utc).replace(minute=30)
+    earlier = now - timedelta(hours=3)
+    store_posts(
+        [
+            _post("r1", now, "news"),
+            _post("r2", now, "science"),
+            _post("r3", earlier, "news"),
+        ]
+    )
+    store_posts([_post("r1", now, "news")])
+
+    news_id = get_or_create_subreddit_id("news")
+    store_sentiment(
+        [
+            SentimentRecord(
+                id=str(uuid4()),
+                timestamp=now.isoformat(),
+                context="subreddit",
+                label="news",
+                sentiment=value,
+                subreddit_id=news_id,
+            )
+            for value in (0.5, -0.1)
+        ]
+    )
+
+    window_end = now.replace(minute=0, second=0, microsecond=0)
+    store_trends(
+        [
+            TrendSnapshotRecord(
+                id=str(uuid4()),
+                timestamp=window_end.isoformat(),
+                keyword="launch",
+                velocity=1.0,
+                spike=2.0,
+                context="global",
+                keyword_id=get_or_create_keyword_id("launch"),
+                raw_mentions=12,
+                window_start=(window_end - timedelta(hours=1)).isoformat(),
+                window_end=window_end.isoformat(),
+            )
+        ]
+    )
+
+    current, previous = fetch_kpis_window(hours=2)
+    assert current == {
+        "mentions": 2,
+        "active_subreddits": 2,
+        "avg_sentiment": 0.2,
+        "spikes": 1,
+    }
+    assert previous["mentions"] == 1
+    assert previous["active_subreddits"] == 1
+    assert sum(point["value"] for point in fetch_volume_series(hours=4)) == 3
+
+    incremental = _rollup_rows()
+    rebuild_rollups()
+    assert _rollup_rows() == incremental
+
+
+def test_post_rollups_add_inserted_rows_without_recounting(temp_db):
+    now = datetime.now(tz=timezone.utc).replace(minute=30)
+    store_posts([_post("r1", now, "news")])
+
+    statements: list[str] = []
+    with write_connection() as connection:
+        connection.set_trace_callback(statements.append)
+        try:
+            store_posts([_post("r1", now, "news"), _post("r2", now, "news")])
+        finally:
+            connection.set_trace_callback(None)
+
+    assert not any("COUNT(" in statement for statement in statements)
+    assert _rollup_rows()[0][1] == 2
@@ -1,9 +1,23 @@
 from __future__ import annotations
 
+import sqlite3
+
 import anyio
 import pytest
 
-from app.services.scheduler import run_interval
+from app.core.config import settings
+from app.repositories.leases import acquire_lease, fetch_lease, release_lease
+from app.services import scheduler
+from app.services.scheduler import (
+    LEASE_NAME,
+    ScheduledJob,
+    get_instance_id,
+    get_job_stats,
+    is_leader,
+    run_as_leader,
+    run_interval,
+    run_jobs,
+)
 
 
 @pytest.mark.anyio
@@ -19,3 +33,137 @@ async def test_scheduler_runs_task():
         tg.cancel_scope.cancel()
 
     assert calls["count"] >= 1
+
+
+def test_lease_is_exclusive_until_it_expires(temp_db):
+    assert acquire_lease(LEASE_NAME, "worker-a", 30) is not None
+    assert acquire_lease(LEASE_NAME, "worker-b", 30) is None
+    renewed = acquire_lease(LEASE_NAME, "worker-a", 30, 300, "2024-05-01T10:00:00+00:00")
+    assert renewed["owner"] == "worker-a"
+    assert renewed["last_run"] == "2024-05-01T10:00:00+00:00"
+
+    assert release_lease(LEASE_NAME, "worker-a")
+    taken = acquire_lease(LEASE_NAME, "worker-b", 30)
+    assert taken["owner"] == "worker-b"
+    assert taken["last_run"] == "2024-05-01T10:00:00+00:00"
+    assert acquire_lease(LEASE_NAME, "worker-a", 30) is None
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("anyio_backend", ["asyncio"])
+async def test_leader_job_waits_for_lease(temp_db, monkeypatch):
+    monkeypatch.setattr(settings, "leader_lease_seconds", 0.2)
+    monkeypatch.setattr(settings, "leader_heartbeat_seconds", 0.02)
+    acquire_lease(LEASE_NAME, "other-worker", 0.15)
+    started = anyio.Event()
+
+    async def job():
+        started.set()
+        await anyio.sleep_forever()
+
+    async with anyio.create_task_group() as tg:
+        tg.start_soon(run_as_leader, job)
+        await anyio.sleep(0.05)
+        assert not started.is_set()
+        assert not is_leader()
+        with anyio.fail_after(2):
+            await started.wait()
+        assert is_leader()
+        assert fetch_lease(LEASE_NAME)["owner"] == get_instance_id()
+        tg.cancel_scope.cancel()
+
+    assert not is_leader()
+    assert fetch_lease(LEASE_NAME)["expires_at"] == 0
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("anyio_backend", ["asyncio"])
+async def test_busy_renewal_keeps_lease_until_expiry(temp_db, monkeypatch):
+    monkeypatch.setattr(settings, "leader_lease_seconds", 0.5)
+    monkeypatch.setattr(settings, "leader_heartbeat_seconds", 0.02)
+    busy = {"on": False, "attempts": 0}
+    original = scheduler.acquire_lease
+
+    def flaky_acquire(*args):
+        if busy["on"]:
+            busy["attempts"] += 1
+            raise sqlite3.OperationalError("database is locked")
+        return original(*args)
+
+    monkeypatch.setattr(scheduler, "acquire_lease", flaky_acquire)
+    stopped = anyio.Event()
+
+    async def job():
+        try:
+            await anyio.sleep_forever()
+        finally:
+            stopped.set()
+
+    async with anyio.create_task_group() as tg:
+        tg.start_soon(run_as_leader, job)
+        with anyio.fail_after(2):
+            while not is_leader():
+                await anyio.sleep(0.01)
+        busy["on"] = True
+        await anyio.sleep(0.2)
+        assert is_leader()
+        assert not stopped.is_set()
+        assert busy["attempts"] >= 2
+        with anyio.fail_after(2):
+            await stopped.wait()
+        assert not is_leader()
+        busy["on"] = False
+        with anyio.fail_after(2):
+            while not is_leader():
+                await anyio.sleep(0.01)
+        tg.cancel_scope.cancel()
+
+
+def test_polling_state_reports_other_leader(client, monkeypatch):
+    monkeypatch.setattr(scheduler, "_enabled", True)
+    acquire_lease(LEASE_NAME, "worker-b", 30, 120, None, "2024-05-01T10:05:00+00:00")
+    client.post("/meta/ingestion", json={"enabled": False})
+
+    payload = client.get("/meta/polling").json()
+    assert payload["leader"] == "worker-b"
+    assert payload["isLeader"] is False
+    assert payload["intervalSeconds"] == 120
+    assert payload["nextRun"] == "2024-05-01T10:05:00+00:00"
+    assert payload["enabled"] is False
+    assert fetch_lease(LEASE_NAME)["enabled"] == 0
+
+
+def test_aligned_job_ticks_on_wall_clock_boundaries():
+    job = ScheduledJob("rollover", None, 3600, align=True, offset=30)
+    assert job.first_tick(7200 + 29) == 7200 + 30
+    assert job.first_tick(7200 + 30) == 7200 + 30
+    assert job.first_tick(7200 + 31) == 10800 + 30
+    assert ScheduledJob("poll", None, 300).first_tick(1234.5) == 1234.5
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("anyio_backend", ["asyncio"])
+async def test_fixed_rate_skips_ticks_while_running(monkeypatch):
+    monkeypatch.setattr(scheduler, "_enabled", True)
+    release = anyio.Event()
+    calls = {"count": 0}
+
+    async def slow():
+        calls["count"] += 1
+        await release.wait()
+
+    job = ScheduledJob("slow", slow, 0.02)
+    async with anyio.create_task_group() as tg:
+        tg.start_soon(run_jobs, [job])
+        await anyio.sleep(0.15)
+        stats = {item["name"]: item for item in get_job_stats()}["slow"]
+        assert calls["count"] == 1
+        assert stats["running"] is True
+        assert stats["skipped"] >= 3
+        release.set()
+        await anyio.sleep(0.05)
+        tg.cancel_scope.cancel()
+
+    assert calls["count"] >= 2
+    assert job.runs >= 1
+    assert "slow" not in {item["name"] for item in get_job_stats()}
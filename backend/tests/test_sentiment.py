@@ -2,9 +2,16 @@ from __future__ import annotations
 
 from datetime import datetime, timezone
 
+import pytest
+
 from app.models.schemas import PostIn
 from app.repositories.sentiment import store_sentiment
-from app.services.sentiment import aggregate_sentiment, backfill_post_sentiment, score_text
+from app.services.sentiment import (
+    backfill_post_sentiment,
+    build_sentiment_records,
+    score_posts,
+    score_text,
+)
 from app.repositories.posts import store_posts
 from app.db.database import get_connection
 
@@ -32,7 +39,9 @@ def test_sentiment_aggregation(client):
         ),
     ]
 
-    records = aggregate_sentiment(posts)
+    records = build_sentiment_records(
+        {"technology": [compound for _, compound, *_ in score_posts(posts)]}
+    )
     assert records
     store_sentiment(records)
 
@@ -90,3 +99,103 @@ def test_post_sentiment_backfill(temp_db):
     row = cursor.fetchone()
     connection.close()
     assert row["sentiment_compound"] is not None
+
+
+def test_parallel_scoring_matches_sequential():
+    from app.services.sentiment import score_text_detail, score_texts, shutdown_scoring_pool
+
+    texts = [
+        "This is amazing and wonderful",
+        "This is terrible and awful",
+        "",
+        "Markets were flat today",
+        "Great launch, awful bugs",
+    ] * 3
+    try:
+        parallel = list(
+            score_texts(texts, workers=2, chunk_size=2, parallel_threshold=0)
+        )
+    finally:
+        shutdown_scoring_pool()
+    assert parallel == [score_text_detail(text) for text in texts]
+
+
+def test_sentiment_cache_dedupes_and_persists(temp_db, monkeypatch):
+    from app.services import sentiment as sentiment_service
+
+    analyzed: list[str] = []
+    original = sentiment_service._analyze
+
+    def counting_analyze(text: str) -> dict[str, float]:
+        analyzed.append(text)
+        return original(text)
+
+    monkeypatch.setattr(sentiment_service, "_analyze", counting_analyze)
+    sentiment_service.sentiment_cache.clear()
+
+    texts = ["Cache me  if you can", "Cache me if you can", "Another unique line"]
+    scores = list(sentiment_service.score_texts(texts))
+    assert scores[0] == scores[1]
+    assert len(analyzed) == 2
+    assert sentiment_service.flush_sentiment_cache() == 2
+
+    sentiment_service.sentiment_cache.clear()
+    before = sentiment_service.get_sentiment_cache_stats()
+    assert sentiment_service.score_text_detail("Cache me if you can") == scores[0]
+    after = sentiment_service.get_sentiment_cache_stats()
+    assert len(analyzed) == 2
+    assert after["store_hits"] == before["store_hits"] + 1
+
+    sentiment_service.score_text("Another unique line")
+    assert sentiment_service.get_sentiment_cache_stats()["memory_hits"] >= 1
+
+
+def test_read_path_scoring_does_not_write(temp_db):
+    from app.db.database import get_data_generation
+    from app.services import sentiment as sentiment_service
+
+    sentiment_service.sentiment_cache.clear()
+    generation = get_data_generation()
+    list(sentiment_service.score_texts(["Read only scoring line"], persist=False))
+    assert sentiment_service.get_sentiment_cache_stats()["pending"] == 0
+    assert sentiment_service.flush_sentiment_cache() == 0
+
+    list(sentiment_service.score_texts(["Worker scoring line"]))
+    assert sentiment_service.flush_sentiment_cache() == 1
+    assert get_data_generation() == generation
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("anyio_backend", ["asyncio"])
+async def test_worker_backfill_scores_off_db_thread(temp_db, monkeypatch):
+    import threading
+
+    from app import worker
+    from app.services import sentiment as sentiment_service
+
+    now = datetime.now(tz=timezone.utc).isoformat()
+    store_posts(
+        [
+            PostIn(
+                id="t1",
+                timestamp=now,
+                subreddit="technology",
+                title="Wonderful release",
+                body="",
+                score=1,
+                comment_count=0,
+            )
+        ]
+    )
+    threads: list[str] = []
+    original = sentiment_service.score_unscored_posts
+
+    def recording_score(rows):
+        threads.append(threading.current_thread().name)
+        return original(rows)
+
+    monkeypatch.setattr(worker, "score_unscored_posts", recording_score)
+    await worker.backfill_sentiment()
+
+    assert threads and threads[0].startswith("reddit-trends-blocking")
+    assert sentiment_service.fetch_unscored_posts() == []
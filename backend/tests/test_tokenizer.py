@@ -0,0 +1,30 @@
+from __future__ import annotations
+
+from app.services.nlp import filter_stopwords, tokenize
+from app.services.tokenizer import extract_post_terms, extract_terms
+
+
+def _legacy_terms(text: str) -> list[str]:
+    tokens = filter_stopwords(tokenize(text))
+    return [
+        token
+        for token in tokens
+        if token.isalpha()
+        and len(token) >= 4
+        and token not in {"says", "said", "new", "original", "today", "breaking"}
+    ]
+
+
+def test_extract_terms_matches_nltk_pipeline():
+    samples = [
+        "Breaking: Markets RALLY after the inflation report, analysts said today",
+        "abc² İstanbul rocks_2024 node.js launch5 über-cool Ｆｕｌｌwidth",
+        "",
+    ]
+    for text in samples:
+        assert extract_terms(text) == _legacy_terms(text)
+
+
+def test_extract_post_terms_adds_bigrams_and_drops_urls():
+    terms = extract_post_terms("Disney parks https://example.com/disney expansion")
+    assert terms == ["disney", "parks", "expansion", "disney parks", "parks expansion"]
@@ -6,7 +6,8 @@ from app.models.schemas import PostIn, TrendSnapshotRecord
 from app.repositories.posts import store_posts
 from app.repositories.keywords import get_or_create_keyword_id
 from app.repositories.trends import store_trends
-from app.db.database import get_connection
+from app.core.config import settings
+from app.db.database import get_connection, get_pool_stats
 from app.services.trends import detect_trends
 
 
@@ -183,3 +184,71 @@ def test_trend_api_gating(client):
     assert response.status_code == 200
     data = response.json()
     assert any(item["keyword"] == "validterm" for item in data)
+
+
+def test_trend_windows_read_indexed_term_counts(temp_db, monkeypatch):
+    from app.services import trends as trends_service
+
+    now = datetime.now(tz=timezone.utc)
+    current = (now - timedelta(hours=1)).replace(minute=5).isoformat()
+    store_posts(
+        [
+            PostIn(
+                id=f"w{index}",
+                timestamp=current,
+                subreddit="technology",
+                title="Disney update",
+                body="disney disney",
+                score=3,
+                comment_count=1,
+            )
+            for index in range(2)
+        ]
+    )
+
+    first = trends_service.detect_trends_for_window(now)
+
+    connection = get_connection()
+    cursor = connection.cursor()
+    cursor.execute(
+        """
+        SELECT raw_count, unique_posts
+        FROM term_hour_counts
+        WHERE term = 'disney'
+        """
+    )
+    row = cursor.fetchone()
+    cursor.execute("SELECT COUNT(*) AS count FROM posts WHERE terms_indexed IS NULL;")
+    pending = int(cursor.fetchone()["count"])
+    connection.close()
+    assert row["raw_count"] == 6
+    assert row["unique_posts"] == 2
+    assert pending == 0
+
+    def fail_extract(text: str) -> list[str]:
+        raise AssertionError("posts should not be tokenized twice")
+
+    monkeypatch.setattr(trends_service, "_extract_terms_for_post", fail_extract)
+    second = trends_service.detect_trends_for_window(now)
+    trends_service.detect_emerging_topics_for_window(now)
+    assert [(record.keyword, record.raw_mentions) for record in first] == [
+        (record.keyword, record.raw_mentions) for record in second
+    ]
+    assert any(record.keyword == "disney" for record in second)
+
+
+def test_recent_window_recompute_commits_each_window(temp_db, monkeypatch):
+    from app import worker
+
+    monkeypatch.setattr(settings, "backfill_trends_hours", 3)
+    writer_busy: list[bool] = []
+    original = worker.store_window_detections
+
+    def recording_store(end):
+        writer_busy.append(bool(get_pool_stats()["writer_busy"]))
+        return original(end)
+
+    monkeypatch.setattr(worker, "store_window_detections", recording_store)
+    worker._recompute_recent_windows()
+
+    assert writer_busy == [False, False, False]